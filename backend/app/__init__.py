@@ -8,12 +8,13 @@ from flask_talisman import Talisman
 from celery import Celery
 import os
 from dotenv import load_dotenv
+from .utils.db_routing import RoutingSession
 
 # Load environment variables
 load_dotenv()
 
 # Initialize extensions
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 jwt = JWTManager()
 mail = Mail()
@@ -27,23 +28,112 @@ def create_app(config_name='development'):
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')
     app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///pla.db')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    
+    # Optional read replica for read-only endpoints and analytics tasks
+    if os.getenv('DATABASE_REPLICA_URL'):
+        app.config['SQLALCHEMY_BINDS'] = {'replica': os.getenv('DATABASE_REPLICA_URL')}
+    # Seconds a user who just wrote keeps reading from the primary
+    app.config['REPLICA_READ_YOUR_WRITES_SECONDS'] = int(os.getenv('REPLICA_READ_YOUR_WRITES_SECONDS', 5))
+    # Where those markers live: 'redis' (at REDIS_URL, seen by every worker) or 'memory' (per process)
+    app.config['REPLICA_READ_YOUR_WRITES_SYNC'] = os.getenv('REPLICA_READ_YOUR_WRITES_SYNC', 'redis' if os.getenv('REDIS_URL') else 'memory')
     app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'jwt-secret-key')
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = False  # For development
     
     # Mail configuration
     app.config['MAIL_SERVER'] = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
     app.config['MAIL_PORT'] = int(os.getenv('SMTP_PORT', 587))
-    app.config['MAIL_USE_TLS'] = True
+    app.config['MAIL_USE_TLS'] = os.getenv('SMTP_USE_TLS', 'true').lower() == 'true'
     app.config['MAIL_USERNAME'] = os.getenv('SMTP_USERNAME')
     app.config['MAIL_PASSWORD'] = os.getenv('SMTP_PASSWORD')
+    app.config['MAIL_DEFAULT_SENDER'] = os.getenv('SMTP_SENDER', os.getenv('SMTP_USERNAME'))
     
     # File upload configuration
     app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_FILE_SIZE', 20971520))
     app.config['UPLOAD_FOLDER'] = os.getenv('UPLOAD_FOLDER', 'uploads')
     
+    # Parser worker pool size and limits (per API worker process)
+    app.config['PARSER_MAX_WORKERS'] = int(os.getenv('PARSER_MAX_WORKERS', 2))
+    app.config['PARSER_CPU_SECONDS'] = int(os.getenv('PARSER_CPU_SECONDS', 30))
+    app.config['PARSER_WALL_SECONDS'] = int(os.getenv('PARSER_WALL_SECONDS', 60))
+    app.config['PARSER_MAX_RSS_MB'] = int(os.getenv('PARSER_MAX_RSS_MB', 512))
+    app.config['PARSER_QUEUE_TIMEOUT'] = int(os.getenv('PARSER_QUEUE_TIMEOUT', 120))
+    # Hard address-space cap set in each worker; allocations past it fail instead of exhausting the host
+    app.config['PARSER_MAX_ADDRESS_SPACE_MB'] = int(os.getenv('PARSER_MAX_ADDRESS_SPACE_MB', 2048))
+    # Files a worker parses before it is replaced (0 keeps workers until they fail)
+    app.config['PARSER_MAX_TASKS_PER_WORKER'] = int(os.getenv('PARSER_MAX_TASKS_PER_WORKER', 100))
+    
+    # PDF text extraction backend: pypdf2, pypdfium2, pypdf, pdfminer or auto (fastest installed;
+    # run `flask parser calibrate` first, as other backends can extract different Q/A)
+    app.config['PDF_BACKEND'] = os.getenv('PDF_BACKEND', 'pypdf2')
+    
     # OpenAI configuration
     app.config['OPENAI_API_KEY'] = os.getenv('OPENAI_API_KEY')
     
+    # Keyset pagination defaults for list endpoints
+    app.config['PAGE_SIZE'] = int(os.getenv('PAGE_SIZE', 20))
+    app.config['MAX_PAGE_SIZE'] = int(os.getenv('MAX_PAGE_SIZE', 100))
+    
+    # Task rows written per transaction by the bulk plan importer
+    app.config['PLAN_IMPORT_CHUNK_SIZE'] = int(os.getenv('PLAN_IMPORT_CHUNK_SIZE', 5000))
+    
+    # Retention: expired rows are purged in batches, optionally archived as gzip NDJSON first
+    app.config['RETENTION_CHAT_LOG_DAYS'] = int(os.getenv('RETENTION_CHAT_LOG_DAYS', 90))
+    app.config['RETENTION_REMINDER_DAYS'] = int(os.getenv('RETENTION_REMINDER_DAYS', 90))
+    app.config['RETENTION_BATCH_SIZE'] = int(os.getenv('RETENTION_BATCH_SIZE', 1000))
+    app.config['RETENTION_PAUSE_SECONDS'] = float(os.getenv('RETENTION_PAUSE_SECONDS', 0.1))
+    app.config['RETENTION_ARCHIVE_DIR'] = os.getenv('RETENTION_ARCHIVE_DIR')
+    
+    # Rows per streamed read and per insert batch for data exports and imports
+    app.config['EXPORT_CHUNK_SIZE'] = int(os.getenv('EXPORT_CHUNK_SIZE', 1000))
+    
+    # Due reminders are claimed in batches; REMINDER_WORKERS drainers run per beat trigger
+    app.config['REMINDER_BATCH_SIZE'] = int(os.getenv('REMINDER_BATCH_SIZE', 100))
+    app.config['REMINDER_LEASE_SECONDS'] = int(os.getenv('REMINDER_LEASE_SECONDS', 300))
+    app.config['REMINDER_WORKERS'] = int(os.getenv('REMINDER_WORKERS', 1))
+    # Deliveries of one firing that may fail transiently before it is dropped
+    app.config['REMINDER_MAX_ATTEMPTS'] = int(os.getenv('REMINDER_MAX_ATTEMPTS', 5))
+    # Reminder delivery: 'email' (sent in batches of REMINDER_EMAIL_BATCH_SIZE per SMTP session) or 'log'
+    app.config['REMINDER_DELIVERY'] = os.getenv('REMINDER_DELIVERY', 'log')
+    app.config['REMINDER_EMAIL_BATCH_SIZE'] = int(os.getenv('REMINDER_EMAIL_BATCH_SIZE', 100))
+    # Sorted-set index of reminder fire times: 'redis' (at REDIS_URL), 'memory' (per process) or 'off'
+    app.config['REMINDER_INDEX_BACKEND'] = os.getenv('REMINDER_INDEX_BACKEND', 'off')
+    
+    # Users whose study patterns are analyzed (and reminders inserted) per transaction by the nightly batch
+    app.config['STUDY_PATTERN_CHUNK_SIZE'] = int(os.getenv('STUDY_PATTERN_CHUNK_SIZE', 5000))
+    
+    # Nightly insights: groups generated at once, and reminders inserted per transaction
+    app.config['DAILY_INSIGHT_CONCURRENCY'] = int(os.getenv('DAILY_INSIGHT_CONCURRENCY', 4))
+    app.config['DAILY_INSIGHT_CHUNK_SIZE'] = int(os.getenv('DAILY_INSIGHT_CHUNK_SIZE', 1000))
+    
+    # Seconds a per-user local quiz index is reused before being rebuilt
+    app.config['QUIZ_INDEX_TTL'] = int(os.getenv('QUIZ_INDEX_TTL', 300))
+    # Where quiz index invalidations are counted: redis (seen by every worker) or memory (single process only)
+    app.config['QUIZ_INDEX_SYNC'] = os.getenv('QUIZ_INDEX_SYNC', 'redis' if os.getenv('REDIS_URL') else 'memory')
+    # Largest quiz a request may ask for
+    app.config['QUIZ_MAX_QUESTIONS'] = int(os.getenv('QUIZ_MAX_QUESTIONS', 50))
+    
+    # JSON serializer for responses: orjson, stdlib or auto (orjson when installed)
+    app.config['JSON_SERIALIZER'] = os.getenv('JSON_SERIALIZER', 'auto')
+    
+    # Serialized model dictionaries kept per worker process (0 disables the cache)
+    app.config['SERIALIZATION_CACHE_SIZE'] = int(os.getenv('SERIALIZATION_CACHE_SIZE', 2048))
+    
+    # Analytics ranges are capped at ANALYTICS_MAX_DAYS and grouped into at most ANALYTICS_MAX_POINTS buckets
+    app.config['ANALYTICS_MAX_DAYS'] = int(os.getenv('ANALYTICS_MAX_DAYS', 1825))
+    app.config['ANALYTICS_MAX_POINTS'] = int(os.getenv('ANALYTICS_MAX_POINTS', 120))
+    
+    # Per-user dashboard/analytics response cache: redis, off, or memory for single-process
+    # deployments only (other workers keep serving entries a write invalidated elsewhere).
+    # Defaults to redis when REDIS_URL is set and off otherwise
+    app.config['PROGRESS_CACHE_BACKEND'] = os.getenv('PROGRESS_CACHE_BACKEND', 'redis' if os.getenv('REDIS_URL') else 'off')
+    app.config['PROGRESS_CACHE_TTL'] = int(os.getenv('PROGRESS_CACHE_TTL', 300))
+    app.config['PROGRESS_CACHE_SIZE'] = int(os.getenv('PROGRESS_CACHE_SIZE', 10000))
+    app.config['REDIS_URL'] = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+    
+    # JSON responses
+    from .utils.serialization import get_json_provider
+    app.json = get_json_provider(app.config['JSON_SERIALIZER'])(app)
+    
     # Initialize extensions
     db.init_app(app)
     migrate.init_app(app, db)
@@ -73,12 +163,18 @@ def create_app(config_name='development'):
     from .routes.ai import ai_bp
     from .routes.uploads import uploads_bp
     from .routes.progress import progress_bp
+    from .routes.data import data_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(planner_bp, url_prefix='/api/planner')
     app.register_blueprint(ai_bp, url_prefix='/api/ai')
     app.register_blueprint(uploads_bp, url_prefix='/api/uploads')
     app.register_blueprint(progress_bp, url_prefix='/api/progress')
+    app.register_blueprint(data_bp, url_prefix='/api/data')
+    
+    # CLI commands
+    from .cli import register_commands
+    register_commands(app)
     
     # Health check endpoint
     @app.route('/api/health')
@@ -0,0 +1,259 @@
+import click
+import glob
+import os
+from flask.cli import AppGroup
+
+parser_cli = AppGroup('parser', help='File parser maintenance commands.')
+
+@parser_cli.command('calibrate')
+@click.argument('corpus', type=click.Path(exists=True))
+@click.option('--reference', default=None, help='Backend whose Q/A extraction is treated as correct (default: pypdf2).')
+@click.option('--repeat', default=3, show_default=True, help='Extraction runs per file, averaged.')
+def calibrate_parser(corpus, reference, repeat):
+    """Benchmark the installed PDF backends on a directory (or single file) of PDFs."""
+    from .services.file_parser import calibrate_pdf_backends
+    
+    if os.path.isdir(corpus):
+        file_paths = sorted(glob.glob(os.path.join(corpus, '**', '*.pdf'), recursive=True))
+    else:
+        file_paths = [corpus]
+    
+    if not file_paths:
+        raise click.ClickException(f'No PDF files found in {corpus}')
+    
+    report = calibrate_pdf_backends(file_paths, reference=reference, repeat=repeat)
+    
+    click.echo(f"Corpus: {report['files']} file(s), reference backend: {report['reference']}")
+    for error in report['skipped']:
+        click.echo(f'    skipped: {error}')
+    click.echo(f"{'backend':<12}{'seconds':>10}{'files/s':>10}{'chars':>12}{'same Q/A':>10}{'similarity':>12}")
+    for result in report['results']:
+        click.echo(
+            f"{result['backend']:<12}{result['seconds']:>10}{result['files_per_second'] or '-':>10}"
+            f"{result['characters']:>12}{result['matching_files']:>7}/{report['files']:<2}{result['text_similarity']:>12}"
+        )
+        for error in result['errors']:
+            click.echo(f'    error: {error}')
+    
+    click.echo(f"\nRecommended: PDF_BACKEND={report['recommended']}")
+
+plans_cli = AppGroup('plans', help='Study plan maintenance commands.')
+
+@plans_cli.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--user-email', default=None, help='Owner of plans that do not name a user_email.')
+@click.option('--format', 'file_format', type=click.Choice(['json', 'csv']), default=None,
+              help='File format (default: from the file extension).')
+@click.option('--chunk-size', type=int, default=None, help='Task rows per transaction (default: PLAN_IMPORT_CHUNK_SIZE).')
+def import_plans(path, user_email, file_format, chunk_size):
+    """Bulk import plans and tasks from a JSON or CSV file."""
+    from flask import current_app
+    from .models import User
+    from .services.plan_import import PlanImporter, PlanImportError
+    from .services.progress_cache import progress_cache
+    
+    file_format = file_format or path.rsplit('.', 1)[-1].lower()
+    with open(path, encoding='utf-8-sig') as import_file:
+        content = import_file.read()
+    
+    default_user_id = None
+    if user_email:
+        user = User.query.filter_by(email=user_email.strip().lower()).first()
+        if not user:
+            raise click.ClickException(f'No user with email {user_email}')
+        default_user_id = user.id
+    
+    importer = PlanImporter(chunk_size=chunk_size or current_app.config['PLAN_IMPORT_CHUNK_SIZE'])
+    try:
+        plans = importer.parse(content, file_format)
+        importer.resolve_users(plans, default_user_id=default_user_id)
+    except PlanImportError as e:
+        for error in e.errors:
+            click.echo(f'error: {error}', err=True)
+        raise click.ClickException('Import file is invalid, nothing was written')
+    
+    report = importer.import_plans(plans)
+    for user_id in sorted({plan['user_id'] for plan in plans}):
+        progress_cache.invalidate(user_id)
+    click.echo(
+        f"Imported {report['plans']} plan(s) and {report['tasks']} task(s): {report['rows']} rows "
+        f"in {report['chunks']} chunk(s), {report['seconds']}s ({report['rows_per_second']} rows/s)"
+    )
+
+stats_cli = AppGroup('stats', help='Progress rollup commands.')
+
+@stats_cli.command('rebuild')
+@click.option('--user-email', default=None, help='Only rebuild this user (default: every user).')
+@click.option('--batch-size', type=int, default=500, show_default=True, help='Users replaced per transaction.')
+def rebuild_stats_command(user_email, batch_size):
+    """Recompute the daily and topic progress rollups from the tasks table."""
+    import time
+    from .models import User
+    from .models.stats import rebuild_stats
+    
+    user_ids = None
+    if user_email:
+        user = User.query.filter_by(email=user_email.strip().lower()).first()
+        if not user:
+            raise click.ClickException(f'No user with email {user_email}')
+        user_ids = [user.id]
+    
+    started = time.perf_counter()
+    report = rebuild_stats(user_ids=user_ids, batch_size=max(1, batch_size))
+    click.echo(
+        f"Rebuilt rollups for {report['users']} user(s) in {report['batches']} batch(es), "
+        f"{time.perf_counter() - started:.3f}s"
+    )
+
+@stats_cli.command('patterns')
+@click.option('--chunk-size', type=int, default=None, help='Users per transaction (default: STUDY_PATTERN_CHUNK_SIZE).')
+def analyze_patterns_command(chunk_size):
+    """Analyze every active user's 30-day study pattern and insert suggestion reminders."""
+    from flask import current_app
+    from .services.study_patterns import StudyPatternAnalyzer
+    
+    analyzer = StudyPatternAnalyzer(chunk_size=chunk_size or current_app.config['STUDY_PATTERN_CHUNK_SIZE'])
+    report = analyzer.run()
+    click.echo(
+        f"Analyzed {report['users']} user(s), inserted {report['reminders']} reminder(s) "
+        f"in {report['chunks']} chunk(s), {report['seconds']}s ({report['users_per_second']} users/s)"
+    )
+
+retention_cli = AppGroup('retention', help='Data retention commands.')
+
+@retention_cli.command('run')
+@click.option('--archive-dir', default=None, help='Archive purged rows as gzip NDJSON here first (default: RETENTION_ARCHIVE_DIR).')
+@click.option('--batch-size', type=int, default=None, help='Rows per delete batch (default: RETENTION_BATCH_SIZE).')
+@click.option('--pause', type=float, default=None, help='Seconds to sleep between batches (default: RETENTION_PAUSE_SECONDS).')
+def run_retention(archive_dir, batch_size, pause):
+    """Purge expired chat logs and inactive reminders in batches."""
+    from flask import current_app
+    from .services.retention import RetentionPipeline
+    
+    pipeline = RetentionPipeline.from_config(
+        current_app.config, archive_dir=archive_dir, batch_size=batch_size, pause_seconds=pause
+    )
+    for report in pipeline.run():
+        click.echo(
+            f"{report['table']}: deleted {report['deleted']} rows in {report['batches']} batch(es), "
+            f"{report['seconds']}s ({report['rows_per_second']} rows/s)"
+        )
+        if report['archive']:
+            click.echo(f"    archived to {report['archive']}")
+
+data_cli = AppGroup('data', help='Data export and import commands.')
+
+@data_cli.command('export')
+@click.argument('path', type=click.Path(dir_okay=False, writable=True, allow_dash=True))
+@click.option('--user-email', default=None, help='Only export this user (default: every user).')
+@click.option('--chunk-size', type=int, default=None, help='Rows per streamed read (default: EXPORT_CHUNK_SIZE).')
+def export_data(path, user_email, chunk_size):
+    """Stream user data to a gzip-compressed NDJSON file ('-' for stdout)."""
+    import sys
+    import time
+    from flask import current_app
+    from .models import User
+    from .services.data_export import DataExporter
+    
+    user_id = None
+    if user_email:
+        user = User.query.filter_by(email=user_email.strip().lower()).first()
+        if not user:
+            raise click.ClickException(f'No user with email {user_email}')
+        user_id = user.id
+    
+    # Migrations need the password hashes to recreate accounts elsewhere
+    exporter = DataExporter(user_id=user_id, include_credentials=True,
+                            chunk_size=chunk_size or current_app.config['EXPORT_CHUNK_SIZE'])
+    started = time.perf_counter()
+    written = 0
+    output = sys.stdout.buffer if path == '-' else open(path, 'wb')
+    try:
+        for chunk in exporter.stream():
+            output.write(chunk)
+            written += len(chunk)
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+    click.echo(f'Exported {written} compressed bytes in {time.perf_counter() - started:.3f}s', err=True)
+
+@data_cli.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--user-email', default=None, help='Import every row into this existing account.')
+@click.option('--chunk-size', type=int, default=None, help='Rows per insert transaction (default: EXPORT_CHUNK_SIZE).')
+def import_data(path, user_email, chunk_size):
+    """Load a gzip NDJSON data export, matching accounts by email."""
+    from flask import current_app
+    from .models import User
+    from .services.data_export import DataImporter, ExportFormatError
+    from .services.progress_cache import progress_cache
+    from .services.quiz_builder import quiz_builder
+    
+    user_id = None
+    if user_email:
+        user = User.query.filter_by(email=user_email.strip().lower()).first()
+        if not user:
+            raise click.ClickException(f'No user with email {user_email}')
+        user_id = user.id
+    
+    importer = DataImporter(chunk_size=chunk_size or current_app.config['EXPORT_CHUNK_SIZE'], user_id=user_id)
+    try:
+        with open(path, 'rb') as export_file:
+            report = importer.import_file(export_file)
+    except ExportFormatError as e:
+        for error in e.errors:
+            click.echo(f'error: {error}', err=True)
+        raise click.ClickException('Import failed')
+    for user_id in report['user_ids']:
+        quiz_builder.invalidate(user_id)
+        progress_cache.invalidate(user_id)
+    
+    click.echo(
+        f"Imported {report['rows']} rows for {report['users']} user(s) in {report['chunks']} chunk(s), "
+        f"{report['seconds']}s ({report['rows_per_second']} rows/s)"
+    )
+    for table, count in report['tables'].items():
+        click.echo(f'    {table}: {count}')
+
+reminders_cli = AppGroup('reminders', help='Reminder scheduling commands.')
+
+@reminders_cli.command('reindex')
+@click.option('--batch-size', type=int, default=1000, show_default=True, help='Reminders read per batch.')
+def reindex_reminders(batch_size):
+    """Rebuild the reminder index from the reminders table."""
+    import time
+    from flask import current_app
+    from .services.reminder_index import reminder_index
+    
+    if not reminder_index.enabled():
+        raise click.ClickException('The reminder index is off (set REMINDER_INDEX_BACKEND)')
+    started = time.perf_counter()
+    indexed = reminder_index.rebuild(batch_size=batch_size)
+    click.echo(
+        f"Indexed {indexed} active reminder(s) in the {current_app.config['REMINDER_INDEX_BACKEND']} index, "
+        f"{time.perf_counter() - started:.3f}s"
+    )
+
+@reminders_cli.command('insights')
+@click.option('--concurrency', type=int, default=None, help='Groups generated at once (default: DAILY_INSIGHT_CONCURRENCY).')
+def generate_insights_command(concurrency):
+    """Generate today's study insights, one model call per group of users with the same tasks and persona."""
+    from flask import current_app
+    from .services.daily_insights import DailyInsightPipeline
+    
+    report = DailyInsightPipeline.from_config(current_app.config, concurrency=concurrency).run()
+    click.echo(
+        f"Generated insights for {report['users']} user(s) from {report['groups']} group(s), "
+        f"inserted {report['reminders']} reminder(s), {report['seconds']}s ({report['users_per_second']} users/s)"
+    )
+    for error in report['errors']:
+        click.echo(f'error: {error}', err=True)
+
+def register_commands(app):
+    """Attach the custom CLI command groups to the app"""
+    app.cli.add_command(parser_cli)
+    app.cli.add_command(plans_cli)
+    app.cli.add_command(stats_cli)
+    app.cli.add_command(retention_cli)
+    app.cli.add_command(data_cli)
+    app.cli.add_command(reminders_cli)
@@ -1,7 +1,9 @@
 from .user import User
-from .plan import Plan, Task
+from .plan import Plan, Task, PlanTopic
 from .upload import Upload
+from .question import Question, Answer, Concept
 from .reminder import Reminder
 from .chat_log import ChatLog
+from .stats import UserDailyStats, UserTopicStats
 
-__all__ = ['User', 'Plan', 'Task', 'Upload', 'Reminder', 'ChatLog'] 
\ No newline at end of file
+__all__ = ['User', 'Plan', 'Task', 'PlanTopic', 'Upload', 'Question', 'Answer', 'Concept', 'Reminder', 'ChatLog', 'UserDailyStats', 'UserTopicStats'] 
\ No newline at end of file
@@ -3,6 +3,9 @@ from datetime import datetime
 
 class ChatLog(db.Model):
     __tablename__ = 'chat_logs'
+    __table_args__ = (
+        db.Index('ix_chat_logs_user_id_session_id_timestamp', 'user_id', 'session_id', 'timestamp'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
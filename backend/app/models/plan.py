@@ -1,9 +1,16 @@
 from .. import db
+from ..utils.serialization import loads, serialization_cache
 from datetime import datetime
 import json
 
+# Optional heavy fields of a plan, see Plan.to_dict
+PLAN_EXPANSIONS = ('plan_data', 'tasks')
+
 class Plan(db.Model):
     __tablename__ = 'plans'
+    __table_args__ = (
+        db.Index('ix_plans_user_id_created_at', 'user_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -11,12 +18,13 @@ class Plan(db.Model):
     topics = db.Column(db.Text, nullable=False)  # JSON string of topics
     start_date = db.Column(db.Date, nullable=False)
     target_date = db.Column(db.Date, nullable=False)
-    json_blob = db.Column(db.Text)  # Complete plan data
+    json_blob = db.deferred(db.Column(db.Text))  # Complete plan data, only loaded when accessed
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     tasks = db.relationship('Task', backref='plan', lazy=True, cascade='all, delete-orphan')
+    topic_rows = db.relationship('PlanTopic', lazy=True, order_by='PlanTopic.position', cascade='all, delete-orphan')
     
     def __init__(self, user_id, title, topics, start_date, target_date, json_blob=None):
         self.user_id = user_id
@@ -25,41 +33,92 @@ class Plan(db.Model):
         self.start_date = start_date
         self.target_date = target_date
         self.json_blob = json_blob
+        self.topic_rows = [
+            PlanTopic(user_id=user_id, topic=topic, position=position)
+            for position, topic in enumerate(PlanTopic.normalize(self.get_topics()))
+        ]
     
-    def get_topics(self):
-        """Get topics as list"""
+    def _decode_json(self, attribute, default):
+        """Decode a JSON text column once per loaded value"""
+        raw = getattr(self, attribute)
+        cache = self.__dict__.setdefault('_decoded_json', {})
+        cached = cache.get(attribute)
+        if cached is not None and cached[0] is raw:
+            return cached[1]
+        
         try:
-            return json.loads(self.topics)
+            value = loads(raw) if raw else default
         except:
-            return []
+            value = default
+        cache[attribute] = (raw, value)
+        return value
+    
+    def get_topics(self):
+        """Get topics as list"""
+        return self._decode_json('topics', [])
     
     def get_plan_data(self):
         """Get plan data as dict"""
-        try:
-            return json.loads(self.json_blob) if self.json_blob else {}
-        except:
+        return self._decode_json('json_blob', {})
+    
+    @classmethod
+    def task_counts(cls, plan_ids):
+        """Map plan id -> (total_tasks, completed_tasks) with one grouped query"""
+        if not plan_ids:
             return {}
+        
+        rows = db.session.query(
+            Task.plan_id,
+            db.func.count(Task.id),
+            db.func.sum(db.case((Task.status == 'completed', 1), else_=0))
+        ).filter(Task.plan_id.in_(plan_ids)).group_by(Task.plan_id).all()
+        return {plan_id: (total, completed or 0) for plan_id, total, completed in rows}
     
-    def to_dict(self):
-        """Convert plan to dictionary"""
-        return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'title': self.title,
-            'topics': self.get_topics(),
-            'start_date': self.start_date.isoformat(),
-            'target_date': self.target_date.isoformat(),
-            'plan_data': self.get_plan_data(),
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
-            'tasks': [task.to_dict() for task in self.tasks]
-        }
+    def _column_dict(self, include_plan_data=False):
+        """Plan columns as a dictionary, cached until the plan is next updated"""
+        def build():
+            data = {
+                'id': self.id,
+                'user_id': self.user_id,
+                'title': self.title,
+                'topics': self.get_topics(),
+                'start_date': self.start_date.isoformat(),
+                'target_date': self.target_date.isoformat(),
+                'created_at': self.created_at.isoformat(),
+                'updated_at': self.updated_at.isoformat()
+            }
+            if include_plan_data:
+                data['plan_data'] = self.get_plan_data()
+            return data
+        
+        return serialization_cache.fetch(self, 'plan_data' if include_plan_data else 'summary', build)
+    
+    def to_summary(self, task_counts=(0, 0)):
+        """Lightweight projection for list views; never touches json_blob or tasks"""
+        data = self._column_dict()
+        data['total_tasks'], data['completed_tasks'] = task_counts
+        return data
+    
+    def to_dict(self, expand=PLAN_EXPANSIONS, task_counts=None):
+        """Convert plan to dictionary, including the requested heavy fields"""
+        if task_counts is None and 'tasks' in expand:
+            task_counts = (len(self.tasks), sum(1 for task in self.tasks if task.status == 'completed'))
+        
+        # Task progress changes without touching the plan row, so it is never cached
+        data = self._column_dict(include_plan_data='plan_data' in expand)
+        data['total_tasks'], data['completed_tasks'] = task_counts or (0, 0)
+        if 'tasks' in expand:
+            data['tasks'] = [task.to_dict() for task in self.tasks]
+        return data
     
     def __repr__(self):
         return f'<Plan {self.title}>'
 
 class Task(db.Model):
     __tablename__ = 'tasks'
+    __table_args__ = (
+        db.Index('ix_tasks_plan_id_date', 'plan_id', 'date'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     plan_id = db.Column(db.Integer, db.ForeignKey('plans.id'), nullable=False)
@@ -80,7 +139,7 @@ class Task(db.Model):
     
     def to_dict(self):
         """Convert task to dictionary"""
-        return {
+        return serialization_cache.fetch(self, 'full', lambda: {
             'id': self.id,
             'plan_id': self.plan_id,
             'date': self.date.isoformat(),
@@ -90,7 +149,68 @@ class Task(db.Model):
             'order_index': self.order_index,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat()
-        }
+        })
+    
+    def __repr__(self):
+        return f'<Task {self.title}>' 
+
+class PlanTopic(db.Model):
+    """One row per topic of a plan, so topics can be filtered and grouped in SQL"""
+    __tablename__ = 'plan_topics'
+    __table_args__ = (
+        db.Index('ix_plan_topics_user_id_topic', 'user_id', 'topic'),
+        db.Index('ix_plan_topics_plan_id', 'plan_id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    plan_id = db.Column(db.Integer, db.ForeignKey('plans.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    topic = db.Column(db.String(200), nullable=False)
+    position = db.Column(db.Integer, nullable=False, default=0)  # Order within the plan's topic list
+    
+    @staticmethod
+    def normalize(topics):
+        """Trimmed, non-empty, de-duplicated topics in their original order"""
+        seen = set()
+        normalized = []
+        for topic in topics:
+            topic = str(topic).strip()[:200]
+            if topic and topic not in seen:
+                seen.add(topic)
+                normalized.append(topic)
+        return normalized
+    
+    @classmethod
+    def topic_stats(cls, user_id):
+        """(topic, total_tasks, completed_tasks) for each of a user's topics in one grouped query"""
+        return db.session.query(
+            cls.topic,
+            db.func.count(Task.id),
+            db.func.coalesce(db.func.sum(db.case((Task.status == 'completed', 1), else_=0)), 0)
+        ).outerjoin(
+            Task, Task.plan_id == cls.plan_id
+        ).filter(
+            cls.user_id == user_id
+        ).group_by(cls.topic).order_by(cls.topic).all()
+    
+    @classmethod
+    def mastered_topic_count_subquery(cls, user_id, threshold=0.8):
+        """Scalar subquery counting distinct topics of plans with at least `threshold` of their tasks completed"""
+        mastered_plans = db.select(Task.plan_id).join(Plan).where(
+            Plan.user_id == user_id
+        ).group_by(Task.plan_id).having(
+            db.func.sum(db.case((Task.status == 'completed', 1), else_=0)) >= threshold * db.func.count(Task.id)
+        )
+        
+        return db.select(db.func.count(db.distinct(cls.topic))).where(
+            cls.user_id == user_id,
+            cls.plan_id.in_(mastered_plans)
+        ).scalar_subquery()
+    
+    @classmethod
+    def mastered_topic_count(cls, user_id, threshold=0.8):
+        """Distinct topics covered by a plan with at least `threshold` of its tasks completed"""
+        return db.session.execute(db.select(cls.mastered_topic_count_subquery(user_id, threshold))).scalar()
     
     def __repr__(self):
-        return f'<Task {self.title}>' 
\ No newline at end of file
+        return f'<PlanTopic {self.topic}>'
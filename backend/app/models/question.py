@@ -0,0 +1,139 @@
+from .. import db
+from datetime import datetime
+
+class Question(db.Model):
+    __tablename__ = 'questions'
+    __table_args__ = (
+        db.Index('ix_questions_user_id_upload_id', 'user_id', 'upload_id'),
+        db.Index('ix_questions_upload_id_position', 'upload_id', 'position'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    upload_id = db.Column(db.Integer, db.ForeignKey('uploads.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    position = db.Column(db.Integer, nullable=False)  # Order within the document
+    text = db.Column(db.Text, nullable=False)
+    line_number = db.Column(db.Integer)
+    times_seen = db.Column(db.Integer, default=0, server_default='0', nullable=False)  # Times served in a local quiz
+    times_wrong = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    last_seen_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    answers = db.relationship('Answer', backref='question', lazy=True, order_by='Answer.position',
+                              cascade='all, delete-orphan', passive_deletes=True)
+    
+    def __init__(self, upload_id, user_id, position, text, line_number=None):
+        self.upload_id = upload_id
+        self.user_id = user_id
+        self.position = position
+        self.text = text
+        self.line_number = line_number
+    
+    @classmethod
+    def clear_for_upload(cls, upload_id):
+        """Delete the extracted questions, answers and concepts of an upload"""
+        Answer.query.filter_by(upload_id=upload_id).delete(synchronize_session=False)
+        Question.query.filter_by(upload_id=upload_id).delete(synchronize_session=False)
+        Concept.query.filter_by(upload_id=upload_id).delete(synchronize_session=False)
+    
+    @classmethod
+    def replace_for_upload(cls, upload, parsed_data):
+        """Store parsed Q/A pairs and concepts for an upload using bulk inserts"""
+        cls.clear_for_upload(upload.id)
+        
+        questions = parsed_data.get('questions', [])
+        if questions:
+            inserted = db.session.execute(
+                db.insert(Question).returning(Question.id, sort_by_parameter_order=True),
+                [
+                    {
+                        'upload_id': upload.id,
+                        'user_id': upload.user_id,
+                        'position': position,
+                        'text': question['question'],
+                        'line_number': question.get('line_number')
+                    }
+                    for position, question in enumerate(questions)
+                ]
+            ).scalars().all()
+            
+            answer_rows = [
+                {
+                    'question_id': question_id,
+                    'upload_id': upload.id,
+                    'position': position,
+                    'text': answer
+                }
+                for question_id, question in zip(inserted, questions)
+                for position, answer in enumerate(question.get('answers', []))
+            ]
+            if answer_rows:
+                db.session.execute(db.insert(Answer), answer_rows)
+        
+        concepts = parsed_data.get('concepts', [])
+        if concepts:
+            db.session.execute(db.insert(Concept), [
+                {
+                    'upload_id': upload.id,
+                    'user_id': upload.user_id,
+                    'position': position,
+                    'term': concept['term'][:255],
+                    'definition': concept['definition']
+                }
+                for position, concept in enumerate(concepts)
+            ])
+    
+    def to_dict(self):
+        """Convert question to dictionary"""
+        return {
+            'id': self.id,
+            'upload_id': self.upload_id,
+            'question': self.text,
+            'line_number': self.line_number,
+            'answers': [answer.text for answer in self.answers]
+        }
+    
+    def __repr__(self):
+        return f'<Question {self.text[:50]}>'
+
+class Answer(db.Model):
+    __tablename__ = 'answers'
+    __table_args__ = (
+        db.Index('ix_answers_question_id_position', 'question_id', 'position'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    question_id = db.Column(db.Integer, db.ForeignKey('questions.id', ondelete='CASCADE'), nullable=False)
+    upload_id = db.Column(db.Integer, db.ForeignKey('uploads.id', ondelete='CASCADE'), nullable=False, index=True)
+    position = db.Column(db.Integer, nullable=False)
+    text = db.Column(db.Text, nullable=False)
+    
+    def __repr__(self):
+        return f'<Answer {self.text[:50]}>'
+
+class Concept(db.Model):
+    __tablename__ = 'concepts'
+    __table_args__ = (
+        db.Index('ix_concepts_user_id_upload_id', 'user_id', 'upload_id'),
+        db.Index('ix_concepts_upload_id_position', 'upload_id', 'position'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    upload_id = db.Column(db.Integer, db.ForeignKey('uploads.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    position = db.Column(db.Integer, nullable=False)
+    term = db.Column(db.String(255), nullable=False)
+    definition = db.Column(db.Text, nullable=False)
+    
+    def to_dict(self):
+        """Convert concept to dictionary"""
+        return {
+            'id': self.id,
+            'upload_id': self.upload_id,
+            'term': self.term,
+            'definition': self.definition
+        }
+    
+    def __repr__(self):
+        return f'<Concept {self.term}>'
@@ -3,6 +3,10 @@ from datetime import datetime, timedelta
 
 class Reminder(db.Model):
     __tablename__ = 'reminders'
+    __table_args__ = (
+        db.Index('ix_reminders_is_active_next_fire_at', 'is_active', 'next_fire_at'),
+        db.Index('ix_reminders_user_id_is_active_next_fire_at', 'user_id', 'is_active', 'next_fire_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -12,6 +16,7 @@ class Reminder(db.Model):
     tier = db.Column(db.Integer, default=1)  # 1-4 for spaced repetition tiers
     next_fire_at = db.Column(db.DateTime, nullable=False)
     is_active = db.Column(db.Boolean, default=True)
+    delivery_attempts = db.Column(db.Integer, default=0, server_default='0', nullable=False)  # Failed sends of this firing
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -23,20 +28,25 @@ class Reminder(db.Model):
         self.task_id = task_id
         self.next_fire_at = self._calculate_next_fire()
     
-    def _calculate_next_fire(self):
-        """Calculate next fire time based on tier"""
-        now = datetime.utcnow()
-        if self.tier == 1:
+    @staticmethod
+    def next_fire_for_tier(tier, now=None):
+        """Fire time of a reminder at `tier`, counted from now"""
+        now = now or datetime.utcnow()
+        if tier == 1:
             return now + timedelta(days=1)  # 0-2 days
-        elif self.tier == 2:
+        elif tier == 2:
             return now + timedelta(days=4)  # 3-5 days
-        elif self.tier == 3:
+        elif tier == 3:
             return now + timedelta(days=10)  # 7-14 days
-        elif self.tier == 4:
+        elif tier == 4:
             return now + timedelta(days=30)  # 30+ days
         else:
             return now + timedelta(days=1)
     
+    def _calculate_next_fire(self):
+        """Calculate next fire time based on tier"""
+        return self.next_fire_for_tier(self.tier)
+    
     def advance_tier(self):
         """Advance to next tier and recalculate fire time"""
         if self.tier < 4:
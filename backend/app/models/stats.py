@@ -0,0 +1,266 @@
+from .. import db
+from ..utils.db_routing import RoutingSession
+from .plan import Plan, Task, PlanTopic
+from sqlalchemy import event, inspect, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+
+# Counter columns shared by both rollup tables
+COUNTER_COLUMNS = ('total_tasks', 'completed_tasks', 'skipped_tasks')
+
+# Time buckets the daily rollup can be grouped into; weeks start on Monday
+DATE_BUCKETS = ('day', 'week', 'month')
+
+class date_bucket(FunctionElement):
+    """First day of the day/week/month holding a date, rendered per dialect"""
+    type = db.Date()
+    name = 'date_bucket'
+    inherit_cache = False
+    
+    def __init__(self, expression, bucket):
+        if bucket not in DATE_BUCKETS:
+            raise ValueError(f'Unknown date bucket {bucket!r}')
+        self.bucket = bucket
+        super().__init__(expression)
+
+@compiles(date_bucket)
+def _date_bucket(element, compiler, **kw):
+    # The unit is rendered inline so GROUP BY and SELECT stay the same expression
+    column = compiler.process(element.clauses, **kw)
+    if element.bucket == 'day':
+        return column
+    return f"CAST(date_trunc('{element.bucket}', {column}) AS DATE)"
+
+@compiles(date_bucket, 'sqlite')
+def _date_bucket_sqlite(element, compiler, **kw):
+    column = compiler.process(element.clauses, **kw)
+    if element.bucket == 'day':
+        return column
+    if element.bucket == 'week':
+        return f"date({column}, '-6 days', 'weekday 1')"
+    return f"date({column}, 'start of month')"
+
+class UserDailyStats(db.Model):
+    """Task counters per user per scheduled day, kept in step with the tasks table"""
+    __tablename__ = 'user_daily_stats'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    total_tasks = db.Column(db.Integer, nullable=False, default=0)
+    completed_tasks = db.Column(db.Integer, nullable=False, default=0)
+    skipped_tasks = db.Column(db.Integer, nullable=False, default=0)
+    
+    @classmethod
+    def for_range(cls, user_id, start_date, end_date):
+        """A user's days with tasks between two dates, oldest first"""
+        return cls.query.filter(
+            cls.user_id == user_id,
+            cls.date >= start_date,
+            cls.date <= end_date
+        ).order_by(cls.date).all()
+    
+    @classmethod
+    def bucket_query(cls, user_id, start_date, end_date, bucket):
+        """Select of a user's counters summed per day, week or month between two dates"""
+        start = date_bucket(cls.date, bucket)
+        return db.select(
+            start.label('start'),
+            func.sum(cls.total_tasks).label('total_tasks'),
+            func.sum(cls.completed_tasks).label('completed_tasks'),
+            func.count().label('active_days')
+        ).where(
+            cls.user_id == user_id,
+            cls.date >= start_date,
+            cls.date <= end_date
+        ).group_by(start).order_by(start)
+    
+    @classmethod
+    def buckets(cls, user_id, start_date, end_date, bucket):
+        """A user's bucketed counters with tasks, oldest first"""
+        return db.session.execute(cls.bucket_query(user_id, start_date, end_date, bucket)).all()
+    
+    def __repr__(self):
+        return f'<UserDailyStats {self.user_id} {self.date}>'
+
+class UserTopicStats(db.Model):
+    """Task counters per user per topic; a task counts once for each topic of its plan"""
+    __tablename__ = 'user_topic_stats'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    topic = db.Column(db.String(200), primary_key=True)
+    total_tasks = db.Column(db.Integer, nullable=False, default=0)
+    completed_tasks = db.Column(db.Integer, nullable=False, default=0)
+    skipped_tasks = db.Column(db.Integer, nullable=False, default=0)
+    
+    @classmethod
+    def for_user(cls, user_id):
+        """A user's topics with tasks, alphabetically"""
+        return cls.query.filter_by(user_id=user_id).order_by(cls.topic).all()
+    
+    def __repr__(self):
+        return f'<UserTopicStats {self.user_id} {self.topic}>'
+
+class StatsDeltas:
+    """Counter changes for both rollups, accumulated in memory and applied as upserts"""
+    
+    def __init__(self):
+        self.daily = {}
+        self.topics = {}
+    
+    @staticmethod
+    def _bump(deltas, key, status, sign):
+        counters = deltas.setdefault(key, [0, 0, 0])
+        counters[0] += sign
+        if status == 'completed':
+            counters[1] += sign
+        elif status == 'skipped':
+            counters[2] += sign
+    
+    def add(self, user_id, topics, task_date, status, sign=1):
+        """Count one task in (sign=1) or out of (sign=-1) the rollups"""
+        self._bump(self.daily, (user_id, task_date), status, sign)
+        for topic in topics:
+            self._bump(self.topics, (user_id, topic), status, sign)
+    
+    def apply(self, connection):
+        """Upsert the accumulated deltas on `connection`, then clear them"""
+        for table, key_columns, deltas in (
+            (UserDailyStats.__table__, ('user_id', 'date'), self.daily),
+            (UserTopicStats.__table__, ('user_id', 'topic'), self.topics),
+        ):
+            rows = [
+                dict(zip(key_columns + COUNTER_COLUMNS, key + tuple(counters)))
+                for key, counters in deltas.items() if any(counters)
+            ]
+            if not rows:
+                continue
+            _upsert_counters(connection, table, key_columns, rows)
+            
+            # Rows only exist for days and topics that still have tasks
+            users = {row['user_id'] for row in rows if row['total_tasks'] < 0}
+            if users:
+                connection.execute(table.delete().where(table.c.user_id.in_(users), table.c.total_tasks <= 0))
+        
+        self.daily.clear()
+        self.topics.clear()
+
+def _upsert_counters(connection, table, key_columns, rows):
+    """Add each row's counters to the existing row for its key, inserting missing keys"""
+    dialect = connection.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        insert = (postgresql if dialect == 'postgresql' else sqlite).insert(table)
+        connection.execute(insert.on_conflict_do_update(
+            index_elements=list(key_columns),
+            set_={column: table.c[column] + insert.excluded[column] for column in COUNTER_COLUMNS}
+        ), rows)
+        return
+    
+    # Other databases: update in place, insert the keys that did not exist yet
+    for row in rows:
+        key = db.and_(*(table.c[column] == row[column] for column in key_columns))
+        result = connection.execute(
+            table.update().where(key).values({column: table.c[column] + row[column] for column in COUNTER_COLUMNS})
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert(), row)
+
+def _committed(task, attribute):
+    """Value of a task attribute as it is stored in the database"""
+    history = inspect(task).attrs[attribute].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(task, attribute)
+
+@event.listens_for(RoutingSession, 'before_flush')
+def _track_task_changes(session, flush_context, instances):
+    """Fold task inserts, status or date changes and deletes into the rollups in the same transaction"""
+    changes = []  # (plan id or pending Plan, date, status, sign)
+    for task in session.new:
+        if isinstance(task, Task):
+            changes.append((task.plan_id or task.plan, task.date, task.status or 'pending', 1))
+    for task in session.deleted:
+        if isinstance(task, Task) and inspect(task).has_identity:
+            changes.append((_committed(task, 'plan_id'), _committed(task, 'date'), _committed(task, 'status'), -1))
+    for task in session.dirty:
+        if isinstance(task, Task) and session.is_modified(task) and any(
+            inspect(task).attrs[attribute].history.has_changes() for attribute in ('plan_id', 'date', 'status')
+        ):
+            changes.append((_committed(task, 'plan_id'), _committed(task, 'date'), _committed(task, 'status'), -1))
+            changes.append((task.plan_id, task.date, task.status, 1))
+    if not changes:
+        return
+    
+    # Owner and topics of every plan involved, read before this flush deletes anything
+    connection = session.connection()
+    plan_ids = {plan for plan, _, _, _ in changes if isinstance(plan, int)}
+    owners = {}
+    if plan_ids:
+        rows = connection.execute(
+            db.select(Plan.id, Plan.user_id, PlanTopic.topic)
+            .outerjoin(PlanTopic, PlanTopic.plan_id == Plan.id)
+            .where(Plan.id.in_(plan_ids))
+            .order_by(Plan.id, PlanTopic.position)
+        ).all()
+        for plan_id, user_id, topic in rows:
+            owner = owners.setdefault(plan_id, (user_id, []))
+            if topic is not None:
+                owner[1].append(topic)
+    
+    deltas = StatsDeltas()
+    for plan, task_date, status, sign in changes:
+        if isinstance(plan, Plan):
+            user_id, topics = plan.user_id, [row.topic for row in plan.topic_rows]
+        elif plan in owners:
+            user_id, topics = owners[plan]
+        else:
+            continue
+        deltas.add(int(user_id), topics, task_date, status or 'pending', sign)
+    deltas.apply(connection)
+
+def rebuild_stats(user_ids=None, batch_size=500):
+    """Recompute both rollups from the tasks table for some or all users.
+    
+    Users are processed in id-ordered batches, each replaced in one
+    transaction with set-based INSERT ... SELECT statements.
+    """
+    from .user import User
+    
+    completed = db.func.coalesce(db.func.sum(db.case((Task.status == 'completed', 1), else_=0)), 0)
+    skipped = db.func.coalesce(db.func.sum(db.case((Task.status == 'skipped', 1), else_=0)), 0)
+    
+    watermark = 0
+    users = 0
+    batches = 0
+    while True:
+        query = db.select(User.id).where(User.id > watermark).order_by(User.id).limit(batch_size)
+        if user_ids is not None:
+            query = query.where(User.id.in_(user_ids))
+        batch = db.session.execute(query).scalars().all()
+        if not batch:
+            break
+        
+        for model in (UserDailyStats, UserTopicStats):
+            db.session.execute(db.delete(model).where(model.user_id.in_(batch)))
+        
+        db.session.execute(db.insert(UserDailyStats).from_select(
+            ['user_id', 'date', *COUNTER_COLUMNS],
+            db.select(Plan.user_id, Task.date, db.func.count(Task.id), completed, skipped)
+            .join(Plan, Task.plan_id == Plan.id)
+            .where(Plan.user_id.in_(batch))
+            .group_by(Plan.user_id, Task.date)
+        ))
+        db.session.execute(db.insert(UserTopicStats).from_select(
+            ['user_id', 'topic', *COUNTER_COLUMNS],
+            db.select(PlanTopic.user_id, PlanTopic.topic, db.func.count(Task.id), completed, skipped)
+            .join(Task, Task.plan_id == PlanTopic.plan_id)
+            .where(PlanTopic.user_id.in_(batch))
+            .group_by(PlanTopic.user_id, PlanTopic.topic)
+        ))
+        db.session.commit()
+        
+        users += len(batch)
+        batches += 1
+        watermark = batch[-1]
+    
+    return {'users': users, 'batches': batches}
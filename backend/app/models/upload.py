@@ -1,9 +1,16 @@
 from .. import db
+from ..utils.serialization import loads, serialization_cache
 from datetime import datetime
 import json
 
+# Optional heavy fields of an upload, see Upload.to_dict
+UPLOAD_EXPANSIONS = ('parsed_data',)
+
 class Upload(db.Model):
     __tablename__ = 'uploads'
+    __table_args__ = (
+        db.Index('ix_uploads_user_id_created_at', 'user_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -11,7 +18,7 @@ class Upload(db.Model):
     file_url = db.Column(db.String(500), nullable=False)
     file_type = db.Column(db.String(10), nullable=False)  # pdf, docx
     file_size = db.Column(db.Integer, nullable=False)
-    parsed_json = db.Column(db.Text)  # Extracted Q/A pairs and concepts
+    parsed_json = db.deferred(db.Column(db.Text))  # Extracted Q/A pairs and concepts, only loaded when accessed
     status = db.Column(db.String(20), default='uploaded')  # uploaded, processing, completed, failed
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -26,7 +33,7 @@ class Upload(db.Model):
     def get_parsed_data(self):
         """Get parsed data as dict"""
         try:
-            return json.loads(self.parsed_json) if self.parsed_json else {}
+            return loads(self.parsed_json) if self.parsed_json else {}
         except:
             return {}
     
@@ -35,20 +42,72 @@ class Upload(db.Model):
         self.parsed_json = json.dumps(data)
         self.status = 'completed'
     
-    def to_dict(self):
-        """Convert upload to dictionary"""
+    def mark_failed(self, reason):
+        """Record a failed parse along with the reason"""
+        self.parsed_json = json.dumps({
+            'error': reason,
+            'questions': [],
+            'concepts': [],
+            'total_questions': 0,
+            'total_concepts': 0
+        })
+        self.status = 'failed'
+    
+    @classmethod
+    def extraction_counts(cls, user_id, upload_ids):
+        """Map upload id -> (total_questions, total_concepts) from the indexed tables"""
+        from .question import Question, Concept
+        
+        if not upload_ids:
+            return {}
+        
+        question_counts = dict(db.session.query(
+            Question.upload_id, db.func.count(Question.id)
+        ).filter(
+            Question.user_id == user_id,
+            Question.upload_id.in_(upload_ids)
+        ).group_by(Question.upload_id).all())
+        
+        concept_counts = dict(db.session.query(
+            Concept.upload_id, db.func.count(Concept.id)
+        ).filter(
+            Concept.user_id == user_id,
+            Concept.upload_id.in_(upload_ids)
+        ).group_by(Concept.upload_id).all())
+        
         return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'filename': self.filename,
-            'file_url': self.file_url,
-            'file_type': self.file_type,
-            'file_size': self.file_size,
-            'parsed_data': self.get_parsed_data(),
-            'status': self.status,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
+            upload_id: (question_counts.get(upload_id, 0), concept_counts.get(upload_id, 0))
+            for upload_id in upload_ids
         }
     
+    def to_summary(self, extraction_counts=(0, 0)):
+        """Lightweight projection for list views; never touches parsed_json"""
+        data = self.to_dict(expand=())
+        data['total_questions'], data['total_concepts'] = extraction_counts
+        return data
+    
+    def to_dict(self, expand=UPLOAD_EXPANSIONS):
+        """Convert upload to dictionary, including the requested heavy fields"""
+        include_parsed_data = 'parsed_data' in expand
+        
+        def build():
+            data = {
+                'id': self.id,
+                'user_id': self.user_id,
+                'filename': self.filename,
+                'file_url': self.file_url,
+                'file_type': self.file_type,
+                'file_size': self.file_size,
+                'status': self.status,
+                'created_at': self.created_at.isoformat(),
+                'updated_at': self.updated_at.isoformat()
+            }
+            if include_parsed_data:
+                data['parsed_data'] = self.get_parsed_data()
+            return data
+        
+        # Cached until the upload is next updated (e.g. reparsed)
+        return serialization_cache.fetch(self, 'parsed_data' if include_parsed_data else 'summary', build)
+    
     def __repr__(self):
         return f'<Upload {self.filename}>' 
\ No newline at end of file
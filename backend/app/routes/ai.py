@@ -1,7 +1,11 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..models import ChatLog, User
 from ..services.gpt_handler import GPTHandler
+from ..services.quiz_builder import quiz_builder
+from ..services.progress_cache import progress_cache
+from ..utils.pagination import keyset_paginate, get_page_size, cursor_for, InvalidCursor
+from ..utils.db_routing import replica_reads
 from .. import db
 import uuid
 from datetime import datetime
@@ -46,19 +50,51 @@ def explain_topic():
 def generate_quiz():
     """Generate quiz questions for a topic"""
     try:
+        user_id = get_jwt_identity()
         data = request.get_json()
         
-        if not data or not data.get('topic'):
+        if not data:
             return jsonify({'error': 'Topic is required'}), 400
         
-        topic = data['topic']
+        topic = data.get('topic')
         num_questions = data.get('num_questions', 5)
+        source = data.get('source', 'ai')  # ai, uploads
+        upload_ids = data.get('upload_ids')
+        
+        if source not in ['ai', 'uploads']:
+            return jsonify({'error': 'Invalid source. Use ai or uploads'}), 400
+        
+        max_questions = current_app.config['QUIZ_MAX_QUESTIONS']
+        if isinstance(num_questions, bool) or not isinstance(num_questions, int) or not 1 <= num_questions <= max_questions:
+            return jsonify({'error': f'num_questions must be an integer from 1 to {max_questions}'}), 400
+        
+        if source == 'ai' and not topic:
+            return jsonify({'error': 'Topic is required'}), 400
+        
+        # Assemble from the user's own uploaded questions when enough exist;
+        # the LLM is only used when the local pool is too small
+        if source == 'uploads':
+            pool_size = quiz_builder.pool_size(user_id, topic, upload_ids)
+            
+            if pool_size >= num_questions or (pool_size and not topic):
+                questions = quiz_builder.build_quiz(user_id, num_questions, topic, upload_ids)
+                
+                return jsonify({
+                    'topic': topic,
+                    'source': 'uploads',
+                    'questions': questions,
+                    'total_questions': len(questions)
+                }), 200
+            
+            if not topic:
+                return jsonify({'error': 'No uploaded questions available. Provide a topic to generate a quiz'}), 400
         
         # Generate quiz
         questions = gpt_handler.generate_quiz(topic, num_questions)
         
         return jsonify({
             'topic': topic,
+            'source': 'ai',
             'questions': questions,
             'total_questions': len(questions)
         }), 200
@@ -66,6 +102,30 @@ def generate_quiz():
     except Exception as e:
         return jsonify({'error': 'Failed to generate quiz', 'details': str(e)}), 500
 
+@ai_bp.route('/quiz/results', methods=['POST'])
+@jwt_required()
+def record_quiz_results():
+    """Record answers to a locally assembled quiz"""
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json()
+        
+        if not data or not isinstance(data.get('results'), list):
+            return jsonify({'error': 'Results must be a list'}), 400
+        
+        missed = quiz_builder.record_results(user_id, data['results'])
+        
+        return jsonify({
+            'message': 'Quiz results recorded',
+            'missed_questions': missed
+        }), 200
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to record quiz results', 'details': str(e)}), 500
+
 @ai_bp.route('/chat', methods=['POST'])
 @jwt_required()
 def chat():
@@ -124,6 +184,7 @@ def chat():
         db.session.add(ai_chat)
         
         db.session.commit()
+        progress_cache.invalidate(user_id)  # Analytics includes chat activity
         
         return jsonify({
             'session_id': session_id,
@@ -137,27 +198,50 @@ def chat():
 
 @ai_bp.route('/chat/history/<session_id>', methods=['GET'])
 @jwt_required()
+@replica_reads
 def get_chat_history(session_id):
-    """Get chat history for a session"""
+    """Get chat history for a session.
+    
+    Returns the latest page of messages by default. Pass ?before=<previous_cursor>
+    to page back through older messages, or ?since=<latest_cursor> to fetch only
+    messages added after the last poll.
+    """
     try:
         user_id = get_jwt_identity()
+        limit = get_page_size()
+        key = [ChatLog.timestamp, ChatLog.id]
+        query = ChatLog.query.filter_by(user_id=user_id, session_id=session_id)
+        since = request.args.get('since')
         
-        # Get chat history
-        chat_logs = ChatLog.query.filter_by(
-            user_id=user_id,
-            session_id=session_id
-        ).order_by(ChatLog.timestamp.asc()).all()
+        if since:
+            # Delta mode: oldest-first from the cursor, so nothing is skipped
+            chat_logs, _ = keyset_paginate(query, key, cursor=since, limit=limit, descending=False)
+            previous_cursor = None
+        else:
+            chat_logs, previous_cursor = keyset_paginate(
+                query, key, cursor=request.args.get('before'), limit=limit
+            )
+            chat_logs.reverse()  # Chronological order
+        
+        latest_cursor = since
+        if chat_logs and not request.args.get('before'):
+            latest_cursor = cursor_for(chat_logs[-1], key)
         
         return jsonify({
             'session_id': session_id,
-            'messages': [chat.to_dict() for chat in chat_logs]
+            'messages': [chat.to_dict() for chat in chat_logs],
+            'previous_cursor': previous_cursor,
+            'latest_cursor': latest_cursor
         }), 200
         
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to get chat history', 'details': str(e)}), 500
 
 @ai_bp.route('/chat/sessions', methods=['GET'])
 @jwt_required()
+@replica_reads
 def get_chat_sessions():
     """Get all chat sessions for user"""
     try:
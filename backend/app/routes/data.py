@@ -0,0 +1,57 @@
+from flask import Blueprint, request, jsonify, current_app, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from ..services.data_export import DataExporter, DataImporter, ExportFormatError
+from ..services.progress_cache import progress_cache
+from ..services.quiz_builder import quiz_builder
+from ..utils.db_routing import read_engine, wrote_recently
+from .. import db
+from datetime import datetime
+
+data_bp = Blueprint('data', __name__)
+
+@data_bp.route('/export', methods=['GET'])
+@jwt_required()
+def export_data():
+    """Download all of the user's data as gzip-compressed NDJSON, streamed as it is read"""
+    try:
+        user_id = get_jwt_identity()
+        
+        # Users who just wrote read the primary, like the replica_reads views
+        engine = db.engine if wrote_recently(user_id) else read_engine()
+        exporter = DataExporter(user_id=user_id, chunk_size=current_app.config['EXPORT_CHUNK_SIZE'], engine=engine)
+        
+        filename = f"pla-export-{user_id}-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.ndjson.gz"
+        response = current_app.response_class(stream_with_context(exporter.stream()), mimetype='application/gzip')
+        response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+        response.cache_control.no_store = True
+        return response
+    
+    except Exception as e:
+        return jsonify({'error': 'Failed to export data', 'details': str(e)}), 500
+
+@data_bp.route('/import', methods=['POST'])
+@jwt_required()
+def import_data():
+    """Import a data export (gzip NDJSON file) into the current user's account"""
+    try:
+        user_id = get_jwt_identity()
+        
+        if 'file' not in request.files:
+            return jsonify({'error': 'Provide the export as a file'}), 400
+        
+        # Larger uploads are spooled to a temporary file, so the export is read twice without holding it in memory
+        importer = DataImporter(chunk_size=current_app.config['EXPORT_CHUNK_SIZE'], user_id=user_id)
+        report = importer.import_file(request.files['file'].stream)
+        quiz_builder.invalidate(user_id)
+        progress_cache.invalidate(user_id)
+        
+        return jsonify({
+            'message': 'Data imported successfully',
+            'import': report
+        }), 201
+    
+    except ExportFormatError as e:
+        return jsonify({'error': 'Invalid export file', 'details': e.errors}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to import data', 'details': str(e)}), 500
@@ -1,7 +1,13 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..models import Plan, Task, User
+from ..models.plan import PLAN_EXPANSIONS
 from ..services.gpt_handler import GPTHandler
+from ..services.plan_import import PlanImporter, PlanImportError
+from ..services.progress_cache import progress_cache
+from ..utils.pagination import keyset_paginate, get_page_size, InvalidCursor
+from ..utils.projection import get_expansions, InvalidProjection
+from ..utils.db_routing import replica_reads
 from .. import db
 from datetime import datetime, date
 import json
@@ -9,6 +15,16 @@ import json
 planner_bp = Blueprint('planner', __name__)
 gpt_handler = GPTHandler()
 
+def plan_query(expand):
+    """Plan query that eagerly loads only the requested heavy fields"""
+    query = Plan.query
+    if 'plan_data' in expand:
+        query = query.options(db.undefer(Plan.json_blob))
+    if 'tasks' in expand:
+        # Load every plan's tasks in one batched query instead of one per plan
+        query = query.options(db.selectinload(Plan.tasks))
+    return query
+
 @planner_bp.route('/create', methods=['POST'])
 @jwt_required()
 def create_plan():
@@ -71,6 +87,7 @@ def create_plan():
                 db.session.add(task)
         
         db.session.commit()
+        progress_cache.invalidate(user_id)
         
         return jsonify({
             'message': 'Study plan created successfully',
@@ -81,41 +98,136 @@ def create_plan():
         db.session.rollback()
         return jsonify({'error': 'Failed to create plan', 'details': str(e)}), 500
 
+@planner_bp.route('/import', methods=['POST'])
+@jwt_required()
+def import_plans():
+    """Bulk import plans with their tasks from a JSON or CSV file (or a JSON body)"""
+    try:
+        user_id = get_jwt_identity()
+        
+        if 'file' in request.files:
+            file = request.files['file']
+            file_format = file.filename.rsplit('.', 1)[-1].lower() if '.' in file.filename else ''
+            content = file.read().decode('utf-8-sig')
+        elif request.is_json:
+            file_format = 'json'
+            content = request.get_data(as_text=True)
+        else:
+            return jsonify({'error': 'Provide a JSON or CSV file, or a JSON body'}), 400
+        
+        importer = PlanImporter(chunk_size=current_app.config['PLAN_IMPORT_CHUNK_SIZE'])
+        plans = importer.parse(content, file_format)
+        
+        # Imports through the API always belong to the caller
+        for plan in plans:
+            plan['user_id'] = int(user_id)
+        
+        report = importer.import_plans(plans)
+        progress_cache.invalidate(user_id)
+        
+        return jsonify({
+            'message': 'Plans imported successfully',
+            'import': report
+        }), 201
+        
+    except PlanImportError as e:
+        return jsonify({'error': 'Invalid import file', 'details': e.errors}), 400
+    except UnicodeDecodeError:
+        return jsonify({'error': 'Import files must be UTF-8 encoded'}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to import plans', 'details': str(e)}), 500
+
 @planner_bp.route('/plans', methods=['GET'])
 @jwt_required()
+@replica_reads
 def get_plans():
-    """Get all plans for current user"""
+    """Get plan summaries for current user, newest first, one page at a time"""
     try:
         user_id = get_jwt_identity()
-        plans = Plan.query.filter_by(user_id=user_id).order_by(Plan.created_at.desc()).all()
+        expand = get_expansions(PLAN_EXPANSIONS)
+        plans, next_cursor = keyset_paginate(
+            plan_query(expand).filter_by(user_id=user_id),
+            [Plan.created_at, Plan.id],
+            cursor=request.args.get('cursor'),
+            limit=get_page_size()
+        )
+        
+        if 'tasks' in expand:
+            plan_list = [plan.to_dict(expand) for plan in plans]
+        else:
+            # Progress comes from one grouped count query instead of loading tasks
+            task_counts = Plan.task_counts([plan.id for plan in plans])
+            plan_list = [plan.to_dict(expand, task_counts.get(plan.id, (0, 0))) for plan in plans]
         
         return jsonify({
-            'plans': [plan.to_dict() for plan in plans]
+            'plans': plan_list,
+            'next_cursor': next_cursor
         }), 200
         
+    except (InvalidCursor, InvalidProjection) as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to get plans', 'details': str(e)}), 500
 
 @planner_bp.route('/plans/<int:plan_id>', methods=['GET'])
 @jwt_required()
+@replica_reads
 def get_plan(plan_id):
-    """Get specific plan by ID"""
+    """Get specific plan by ID, with its plan data and tasks unless ?fields=summary"""
     try:
         user_id = get_jwt_identity()
-        plan = Plan.query.filter_by(id=plan_id, user_id=user_id).first()
+        expand = get_expansions(PLAN_EXPANSIONS, default=PLAN_EXPANSIONS)
+        plan = plan_query(expand).filter_by(id=plan_id, user_id=user_id).first()
         
         if not plan:
             return jsonify({'error': 'Plan not found'}), 404
         
+        task_counts = None if 'tasks' in expand else Plan.task_counts([plan.id]).get(plan.id, (0, 0))
+        
         return jsonify({
-            'plan': plan.to_dict()
+            'plan': plan.to_dict(expand, task_counts)
         }), 200
         
+    except InvalidProjection as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to get plan', 'details': str(e)}), 500
 
+@planner_bp.route('/plans/<int:plan_id>/tasks', methods=['GET'])
+@jwt_required()
+@replica_reads
+def get_plan_tasks(plan_id):
+    """Get a plan's tasks in date order, one page at a time"""
+    try:
+        user_id = get_jwt_identity()
+        
+        # Verify plan belongs to user
+        plan = Plan.query.filter_by(id=plan_id, user_id=user_id).first()
+        if not plan:
+            return jsonify({'error': 'Plan not found'}), 404
+        
+        tasks, next_cursor = keyset_paginate(
+            Task.query.filter_by(plan_id=plan_id),
+            [Task.date, Task.id],
+            cursor=request.args.get('cursor'),
+            limit=get_page_size(),
+            descending=False
+        )
+        
+        return jsonify({
+            'tasks': [task.to_dict() for task in tasks],
+            'next_cursor': next_cursor
+        }), 200
+        
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': 'Failed to get tasks', 'details': str(e)}), 500
+
 @planner_bp.route('/plans/<int:plan_id>/tasks/<date>', methods=['GET'])
 @jwt_required()
+@replica_reads
 def get_tasks_for_date(plan_id, date):
     """Get tasks for a specific date"""
     try:
@@ -167,6 +279,7 @@ def update_task(task_id):
             task.status = data['status']
         
         db.session.commit()
+        progress_cache.invalidate(user_id)
         
         return jsonify({
             'message': 'Task updated successfully',
@@ -190,6 +303,7 @@ def delete_plan(plan_id):
         
         db.session.delete(plan)
         db.session.commit()
+        progress_cache.invalidate(user_id)
         
         return jsonify({
             'message': 'Plan deleted successfully'
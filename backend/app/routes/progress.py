@@ -1,148 +1,60 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..models import Plan, Task, Upload, ChatLog
+from ..models import Plan, PlanTopic, Upload, ChatLog, UserDailyStats, UserTopicStats
+from ..models.stats import DATE_BUCKETS
+from ..services.analytics import DailySeries, choose_bucket, bucket_end
+from ..services.progress_cache import progress_cache
+from ..services.reminder_index import reminder_index, INDEX_ERRORS
+from ..utils.db_routing import replica_reads
 from .. import db
 from datetime import datetime, timedelta
 from sqlalchemy import func, and_
 
 progress_bp = Blueprint('progress', __name__)
 
+# Streaks and trends cover at most this many trailing days, so their cost does not grow with the range
+TREND_WINDOW_DAYS = 90
+
 @progress_bp.route('/dashboard', methods=['GET'])
 @jwt_required()
+@replica_reads
 def get_dashboard():
-    """Get user dashboard data"""
+    """Get user dashboard data, or 304 when the client's ETag is still current"""
     try:
         user_id = get_jwt_identity()
-        
-        # Get date range (last 30 days)
-        end_date = datetime.now().date()
-        start_date = end_date - timedelta(days=30)
-        
-        # Plan adherence
-        total_tasks = Task.query.join(Plan).filter(
-            Plan.user_id == user_id,
-            Task.date >= start_date,
-            Task.date <= end_date
-        ).count()
-        
-        completed_tasks = Task.query.join(Plan).filter(
-            Plan.user_id == user_id,
-            Task.date >= start_date,
-            Task.date <= end_date,
-            Task.status == 'completed'
-        ).count()
-        
-        adherence_rate = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
-        
-        # Topics mastered (plans with high completion rate)
-        plans = Plan.query.filter_by(user_id=user_id).all()
-        mastered_topics = []
-        
-        for plan in plans:
-            plan_tasks = Task.query.filter_by(plan_id=plan.id).all()
-            if plan_tasks:
-                completion_rate = sum(1 for task in plan_tasks if task.status == 'completed') / len(plan_tasks)
-                if completion_rate >= 0.8:  # 80% completion rate
-                    mastered_topics.extend(plan.get_topics())
-        
-        # Time spent (estimated based on task completion)
-        estimated_time = completed_tasks * 45  # 45 minutes per task
-        
-        # Efficiency score (combination of adherence and consistency)
-        consistency_score = self._calculate_consistency_score(user_id, start_date, end_date)
-        efficiency_score = (adherence_rate * 0.7) + (consistency_score * 0.3)
-        
-        # Recent activity
-        recent_plans = Plan.query.filter_by(user_id=user_id).order_by(Plan.created_at.desc()).limit(5).all()
-        recent_uploads = Upload.query.filter_by(user_id=user_id).order_by(Upload.created_at.desc()).limit(5).all()
-        
-        return jsonify({
-            'dashboard': {
-                'plan_adherence': round(adherence_rate, 1),
-                'topics_mastered': len(set(mastered_topics)),
-                'time_spent_minutes': estimated_time,
-                'efficiency_score': round(efficiency_score, 1),
-                'total_plans': len(plans),
-                'total_uploads': Upload.query.filter_by(user_id=user_id).count(),
-                'recent_plans': [plan.to_dict() for plan in recent_plans],
-                'recent_uploads': [upload.to_dict() for upload in recent_uploads]
-            }
-        }), 200
-        
+        return progress_cache.response(user_id, 'dashboard', lambda: {'dashboard': _dashboard_data(user_id)})
+    
     except Exception as e:
         return jsonify({'error': 'Failed to get dashboard data', 'details': str(e)}), 500
 
 @progress_bp.route('/analytics', methods=['GET'])
 @jwt_required()
+@replica_reads
 def get_analytics():
-    """Get detailed analytics"""
+    """Get detailed analytics, or 304 when the client's ETag is still current"""
     try:
         user_id = get_jwt_identity()
         
-        # Get date range from query params
+        # Get date range from query params; long ranges are capped and grouped into coarser buckets
         days = request.args.get('days', 30, type=int)
-        end_date = datetime.now().date()
-        start_date = end_date - timedelta(days=days)
-        
-        # Daily task completion
-        daily_completions = db.session.query(
-            Task.date,
-            func.count(Task.id).label('total'),
-            func.sum(func.case([(Task.status == 'completed', 1)], else_=0)).label('completed')
-        ).join(Plan).filter(
-            Plan.user_id == user_id,
-            Task.date >= start_date,
-            Task.date <= end_date
-        ).group_by(Task.date).all()
-        
-        # Topic breakdown
-        topic_stats = {}
-        plans = Plan.query.filter_by(user_id=user_id).all()
-        
-        for plan in plans:
-            for topic in plan.get_topics():
-                if topic not in topic_stats:
-                    topic_stats[topic] = {'total_tasks': 0, 'completed_tasks': 0}
-                
-                plan_tasks = Task.query.filter_by(plan_id=plan.id).all()
-                topic_stats[topic]['total_tasks'] += len(plan_tasks)
-                topic_stats[topic]['completed_tasks'] += sum(1 for task in plan_tasks if task.status == 'completed')
-        
-        # Chat activity
-        chat_sessions = ChatLog.query.filter_by(user_id=user_id).count()
-        
-        return jsonify({
-            'analytics': {
-                'daily_completions': [
-                    {
-                        'date': str(day.date),
-                        'total': day.total,
-                        'completed': day.completed,
-                        'rate': round((day.completed / day.total * 100) if day.total > 0 else 0, 1)
-                    }
-                    for day in daily_completions
-                ],
-                'topic_stats': [
-                    {
-                        'topic': topic,
-                        'total_tasks': stats['total_tasks'],
-                        'completed_tasks': stats['completed_tasks'],
-                        'completion_rate': round((stats['completed_tasks'] / stats['total_tasks'] * 100) if stats['total_tasks'] > 0 else 0, 1)
-                    }
-                    for topic, stats in topic_stats.items()
-                ],
-                'chat_activity': {
-                    'total_sessions': chat_sessions,
-                    'avg_messages_per_session': self._calculate_avg_messages_per_session(user_id)
-                }
-            }
-        }), 200
-        
+        bucket = request.args.get('bucket', 'auto')
+        if days < 1:
+            return jsonify({'error': 'days must be a positive number'}), 400
+        if bucket != 'auto' and bucket not in DATE_BUCKETS:
+            return jsonify({'error': f"bucket must be auto, {', '.join(DATE_BUCKETS)}"}), 400
+        
+        days = min(days, current_app.config['ANALYTICS_MAX_DAYS'])
+        bucket = choose_bucket(days, bucket, current_app.config['ANALYTICS_MAX_POINTS'])
+        return progress_cache.response(
+            user_id, f'analytics:{days}:{bucket}', lambda: {'analytics': _analytics_data(user_id, days, bucket)}
+        )
+    
     except Exception as e:
         return jsonify({'error': 'Failed to get analytics', 'details': str(e)}), 500
 
 @progress_bp.route('/reminders', methods=['GET'])
 @jwt_required()
+@replica_reads
 def get_reminders():
     """Get active reminders for user"""
     try:
@@ -150,17 +62,30 @@ def get_reminders():
         
         from ..models import Reminder
         
-        # Get active reminders
-        reminders = Reminder.query.filter(
+        now = datetime.utcnow()
+        query = Reminder.query.filter(
             Reminder.user_id == user_id,
             Reminder.is_active == True,
-            Reminder.next_fire_at <= datetime.utcnow()
-        ).order_by(Reminder.next_fire_at.asc()).all()
+            Reminder.next_fire_at <= now
+        )
+        
+        # The reminder index narrows the lookup to the ids it has due; the rows still decide
+        if reminder_index.enabled():
+            try:
+                due_ids = reminder_index.due_for_user(user_id, now)
+                if not due_ids:
+                    return jsonify({'reminders': []}), 200
+                query = query.filter(Reminder.id.in_(due_ids))
+            except INDEX_ERRORS as e:
+                current_app.logger.warning('Reminder index unavailable, scanning the table: %s', e)
+        
+        # Get active reminders
+        reminders = query.order_by(Reminder.next_fire_at.asc()).all()
         
         return jsonify({
             'reminders': [reminder.to_dict() for reminder in reminders]
         }), 200
-        
+    
     except Exception as e:
         return jsonify({'error': 'Failed to get reminders', 'details': str(e)}), 500
 
@@ -188,60 +113,111 @@ def dismiss_reminder(reminder_id):
             'message': 'Reminder dismissed successfully',
             'reminder': reminder.to_dict()
         }), 200
-        
+    
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to dismiss reminder', 'details': str(e)}), 500
 
-def _calculate_consistency_score(self, user_id, start_date, end_date):
-    """Calculate consistency score based on daily activity"""
-    try:
-        # Get daily task counts
-        daily_tasks = db.session.query(
-            Task.date,
-            func.count(Task.id).label('task_count')
-        ).join(Plan).filter(
-            Plan.user_id == user_id,
-            Task.date >= start_date,
-            Task.date <= end_date
-        ).group_by(Task.date).all()
-        
-        if not daily_tasks:
-            return 0
-        
-        # Calculate consistency (lower variance = higher consistency)
-        task_counts = [day.task_count for day in daily_tasks]
-        mean_count = sum(task_counts) / len(task_counts)
-        
-        if mean_count == 0:
-            return 0
-        
-        variance = sum((count - mean_count) ** 2 for count in task_counts) / len(task_counts)
-        consistency = max(0, 100 - (variance * 10))  # Scale variance to 0-100
-        
-        return min(100, consistency)
-        
-    except Exception:
-        return 0
+def _dashboard_data(user_id):
+    """Dashboard metrics for a user"""
+    # Get date range (last 30 days)
+    end_date = datetime.now().date()
+    start_date = end_date - timedelta(days=30)
+    
+    # Per-day totals for the window from the daily rollup, one row per day
+    # however many tasks there are; adherence and consistency derive from them
+    metrics = DailySeries.load([user_id], start_date, end_date).summaries()[int(user_id)]
+    total_tasks = metrics['total_tasks']
+    completed_tasks = metrics['completed_tasks']
+    
+    adherence_rate = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
+    
+    # Account-wide counts in a single round trip; topics mastered are the
+    # topics of plans with an 80% completion rate
+    totals = db.session.execute(db.select(
+        PlanTopic.mastered_topic_count_subquery(user_id, threshold=0.8).label('topics_mastered'),
+        db.select(func.count(Plan.id)).where(Plan.user_id == user_id).scalar_subquery().label('total_plans'),
+        db.select(func.count(Upload.id)).where(Upload.user_id == user_id).scalar_subquery().label('total_uploads')
+    )).one()
+    
+    # Time spent (estimated based on task completion)
+    estimated_time = completed_tasks * 45  # 45 minutes per task
+    
+    # Efficiency score (combination of adherence and consistency)
+    efficiency_score = (adherence_rate * 0.7) + (metrics['consistency_score'] * 0.3)
+    
+    # Recent activity (summaries only, the blob columns stay unloaded)
+    recent_plans = Plan.query.filter_by(user_id=user_id).order_by(Plan.created_at.desc()).limit(5).all()
+    recent_uploads = Upload.query.filter_by(user_id=user_id).order_by(Upload.created_at.desc()).limit(5).all()
+    plan_task_counts = Plan.task_counts([plan.id for plan in recent_plans])
+    upload_counts = Upload.extraction_counts(user_id, [upload.id for upload in recent_uploads])
+    
+    return {
+        'plan_adherence': round(adherence_rate, 1),
+        'topics_mastered': totals.topics_mastered,
+        'time_spent_minutes': estimated_time,
+        'efficiency_score': round(efficiency_score, 1),
+        'total_plans': totals.total_plans,
+        'total_uploads': totals.total_uploads,
+        'recent_plans': [plan.to_summary(plan_task_counts.get(plan.id, (0, 0))) for plan in recent_plans],
+        'recent_uploads': [upload.to_summary(upload_counts[upload.id]) for upload in recent_uploads]
+    }
 
-def _calculate_avg_messages_per_session(self, user_id):
-    """Calculate average messages per chat session"""
-    try:
-        from sqlalchemy import func
-        
-        # Get session counts
-        session_counts = db.session.query(
-            ChatLog.session_id,
-            func.count(ChatLog.id).label('message_count')
-        ).filter_by(user_id=user_id).group_by(ChatLog.session_id).all()
-        
-        if not session_counts:
-            return 0
-        
-        total_messages = sum(session.message_count for session in session_counts)
-        avg_messages = total_messages / len(session_counts)
-        
-        return round(avg_messages, 1)
-        
-    except Exception:
-        return 0 
\ No newline at end of file
+def _analytics_data(user_id, days, bucket='day'):
+    """Analytics for a user over the last `days` days, completions grouped per `bucket`"""
+    end_date = datetime.now().date()
+    start_date = end_date - timedelta(days=days)
+    
+    # Task completion (summed per bucket in SQL) and topic breakdown, both read from the rollups
+    buckets = UserDailyStats.buckets(user_id, start_date, end_date, bucket)
+    trend_days = min(days, TREND_WINDOW_DAYS)
+    series = DailySeries.load([user_id], end_date - timedelta(days=trend_days), end_date)
+    metrics = series.summaries()[int(user_id)]
+    topic_stats = UserTopicStats.for_user(user_id)
+    
+    # Chat activity
+    chat_activity = db.session.query(
+        func.count(ChatLog.id).label('messages'),
+        func.count(func.distinct(ChatLog.session_id)).label('sessions')
+    ).filter(ChatLog.user_id == user_id).one()
+    
+    return {
+        'range': {
+            'start_date': str(start_date),
+            'end_date': str(end_date),
+            'days': days,
+            'bucket': bucket
+        },
+        'completions': [
+            {
+                'start': str(max(row.start, start_date)),
+                'end': str(min(bucket_end(row.start, bucket), end_date)),
+                'total': row.total_tasks,
+                'completed': row.completed_tasks,
+                'active_days': row.active_days,
+                'rate': round(row.completed_tasks / row.total_tasks * 100, 1) if row.total_tasks else 0
+            }
+            for row in buckets
+        ],
+        'trends': {
+            'window_days': trend_days,
+            'consistency_score': round(metrics['consistency_score'], 1),
+            'current_streak': metrics['current_streak'],
+            'longest_streak': metrics['longest_streak'],
+            'rolling_7_day_rate': None if metrics['rolling_completion_rate'] is None else round(metrics['rolling_completion_rate'] * 100, 1),
+            'completion_trend': round(metrics['completion_trend'] * 100, 2)  # Percentage points per day
+        },
+        'topic_stats': [
+            {
+                'topic': topic.topic,
+                'total_tasks': topic.total_tasks,
+                'completed_tasks': topic.completed_tasks,
+                'completion_rate': round((topic.completed_tasks / topic.total_tasks * 100) if topic.total_tasks > 0 else 0, 1)
+            }
+            for topic in topic_stats
+        ],
+        'chat_activity': {
+            'total_sessions': chat_activity.sessions,
+            'avg_messages_per_session': round(chat_activity.messages / chat_activity.sessions, 1) if chat_activity.sessions else 0
+        }
+    }
\ No newline at end of file
@@ -1,8 +1,15 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from werkzeug.utils import secure_filename
-from ..models import Upload
+from ..models import Upload, Question
+from ..models.upload import UPLOAD_EXPANSIONS
 from ..services.file_parser import FileParser
+from ..services.parser_pool import ParserPool
+from ..services.quiz_builder import quiz_builder
+from ..services.progress_cache import progress_cache
+from ..utils.pagination import keyset_paginate, get_page_size, InvalidCursor
+from ..utils.projection import get_expansions, InvalidProjection
+from ..utils.db_routing import replica_reads
 from .. import db
 import os
 import uuid
@@ -10,12 +17,29 @@ from datetime import datetime
 
 uploads_bp = Blueprint('uploads', __name__)
 file_parser = FileParser()
+parser_pool = ParserPool()
 
 def allowed_file(filename):
     """Check if file extension is allowed"""
     ALLOWED_EXTENSIONS = {'pdf', 'docx'}
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def stored_file_path(upload):
+    """Resolved path of an upload's file, or None when it is not inside UPLOAD_FOLDER"""
+    if not upload.file_url:
+        return None
+    folder = os.path.realpath(current_app.config['UPLOAD_FOLDER'])
+    path = os.path.realpath(upload.file_url)
+    if path == folder or os.path.commonpath([folder, path]) != folder:
+        return None
+    return path
+
+def upload_query(expand):
+    """Upload query that loads parsed_json up front only when it was requested"""
+    if 'parsed_data' in expand:
+        return Upload.query.options(db.undefer(Upload.parsed_json))
+    return Upload.query
+
 @uploads_bp.route('/exam', methods=['POST'])
 @jwt_required()
 def upload_exam():
@@ -55,81 +79,139 @@ def upload_exam():
             os.remove(file_path)  # Clean up
             return jsonify({'error': validation['error']}), 400
         
+        # Parse in an isolated, resource-limited worker before touching the database, so no
+        # write transaction is held open while the upload waits for a worker and is parsed
+        try:
+            parsed_data = parser_pool.parse(file_path, file_extension)
+            parse_error = parsed_data.get('error')
+        except Exception as e:
+            parsed_data, parse_error = None, str(e)
+        
         # Create upload record
         upload = Upload(
             user_id=user_id,
             filename=filename,
             file_url=file_path,
             file_type=file_extension,
-            file_size=validation['file_size'],
-            status='uploaded'
+            file_size=validation['file_size']
         )
-        
         db.session.add(upload)
-        db.session.flush()  # Get upload ID
         
-        # Parse file content
-        try:
-            if file_extension == 'pdf':
-                parsed_data = file_parser.parse_pdf(file_path)
-            else:  # docx
-                parsed_data = file_parser.parse_docx(file_path)
-            
-            # Update upload with parsed data
-            upload.set_parsed_data(parsed_data)
-            
-            db.session.commit()
-            
-            return jsonify({
-                'message': 'File uploaded and parsed successfully',
-                'upload': upload.to_dict()
-            }), 201
-            
-        except Exception as parse_error:
+        if parse_error:
             # If parsing fails, still save the upload but mark as failed
-            upload.status = 'failed'
+            upload.mark_failed(parse_error)
             db.session.commit()
+            progress_cache.invalidate(user_id)
             
             return jsonify({
                 'message': 'File uploaded but parsing failed',
                 'upload': upload.to_dict(),
-                'parse_error': str(parse_error)
+                'parse_error': parse_error
             }), 201
-            
+        
+        # Update upload with parsed data
+        db.session.flush()  # Get upload ID
+        upload.set_parsed_data(parsed_data)
+        Question.replace_for_upload(upload, parsed_data)
+        
+        db.session.commit()
+        quiz_builder.invalidate(user_id)
+        progress_cache.invalidate(user_id)
+        
+        return jsonify({
+            'message': 'File uploaded and parsed successfully',
+            'upload': upload.to_dict()
+        }), 201
+    
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to upload file', 'details': str(e)}), 500
 
 @uploads_bp.route('/uploads', methods=['GET'])
 @jwt_required()
+@replica_reads
 def get_uploads():
-    """Get all uploads for current user"""
+    """Get upload summaries for current user, newest first, one page at a time"""
     try:
         user_id = get_jwt_identity()
-        uploads = Upload.query.filter_by(user_id=user_id).order_by(Upload.created_at.desc()).all()
+        expand = get_expansions(UPLOAD_EXPANSIONS)
+        uploads, next_cursor = keyset_paginate(
+            upload_query(expand).filter_by(user_id=user_id),
+            [Upload.created_at, Upload.id],
+            cursor=request.args.get('cursor'),
+            limit=get_page_size()
+        )
+        
+        # Per-upload counts come from the indexed question/concept tables
+        counts = Upload.extraction_counts(user_id, [upload.id for upload in uploads])
+        
+        upload_list = []
+        for upload in uploads:
+            upload_data = upload.to_dict(expand)
+            upload_data['total_questions'], upload_data['total_concepts'] = counts[upload.id]
+            upload_list.append(upload_data)
         
         return jsonify({
-            'uploads': [upload.to_dict() for upload in uploads]
+            'uploads': upload_list,
+            'next_cursor': next_cursor
         }), 200
-        
+    
+    except (InvalidCursor, InvalidProjection) as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to get uploads', 'details': str(e)}), 500
 
+@uploads_bp.route('/questions', methods=['GET'])
+@jwt_required()
+@replica_reads
+def get_questions():
+    """Get extracted questions across uploads, optionally filtered"""
+    try:
+        user_id = get_jwt_identity()
+        upload_id = request.args.get('upload_id', type=int)
+        search = request.args.get('search', '').strip()
+        limit = min(request.args.get('limit', 50, type=int), 200)
+        
+        query = Question.query.filter(Question.user_id == user_id)
+        if upload_id:
+            query = query.filter(Question.upload_id == upload_id)
+        if search:
+            # Match the search text literally, not as LIKE wildcards
+            pattern = search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            query = query.filter(Question.text.ilike(f'%{pattern}%', escape='\\'))
+        
+        total = query.count()
+        questions = query.options(db.selectinload(Question.answers)).order_by(
+            Question.upload_id.desc(), Question.position.asc()
+        ).limit(limit).all()
+        
+        return jsonify({
+            'questions': [question.to_dict() for question in questions],
+            'total_questions': total
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': 'Failed to get questions', 'details': str(e)}), 500
+
 @uploads_bp.route('/uploads/<int:upload_id>', methods=['GET'])
 @jwt_required()
+@replica_reads
 def get_upload(upload_id):
-    """Get specific upload by ID"""
+    """Get specific upload by ID, with its parsed data unless ?fields=summary"""
     try:
         user_id = get_jwt_identity()
-        upload = Upload.query.filter_by(id=upload_id, user_id=user_id).first()
+        expand = get_expansions(UPLOAD_EXPANSIONS, default=UPLOAD_EXPANSIONS)
+        upload = upload_query(expand).filter_by(id=upload_id, user_id=user_id).first()
         
         if not upload:
             return jsonify({'error': 'Upload not found'}), 404
         
         return jsonify({
-            'upload': upload.to_dict()
+            'upload': upload.to_dict(expand)
         }), 200
         
+    except InvalidProjection as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to get upload', 'details': str(e)}), 500
 
@@ -144,17 +226,21 @@ def delete_upload(upload_id):
         if not upload:
             return jsonify({'error': 'Upload not found'}), 404
         
-        # Delete file from filesystem
+        # Delete file from filesystem, never anything outside UPLOAD_FOLDER
         try:
-            if os.path.exists(upload.file_url):
-                os.remove(upload.file_url)
+            file_path = stored_file_path(upload)
+            if file_path and os.path.exists(file_path):
+                os.remove(file_path)
         except Exception as file_error:
             # Log file deletion error but continue with database deletion
             print(f"Error deleting file {upload.file_url}: {file_error}")
         
         # Delete from database
+        Question.clear_for_upload(upload.id)
         db.session.delete(upload)
         db.session.commit()
+        quiz_builder.invalidate(user_id)
+        progress_cache.invalidate(user_id)
         
         return jsonify({
             'message': 'Upload deleted successfully'
@@ -175,19 +261,23 @@ def reparse_upload(upload_id):
         if not upload:
             return jsonify({'error': 'Upload not found'}), 404
         
-        if not os.path.exists(upload.file_url):
+        file_path = stored_file_path(upload)
+        if not file_path or not os.path.exists(file_path):
             return jsonify({'error': 'File not found on disk'}), 404
         
         # Reparse file
         try:
-            if upload.file_type == 'pdf':
-                parsed_data = file_parser.parse_pdf(upload.file_url)
-            else:  # docx
-                parsed_data = file_parser.parse_docx(upload.file_url)
+            parsed_data = parser_pool.parse(file_path, upload.file_type)
+            
+            if parsed_data.get('error'):
+                raise RuntimeError(parsed_data['error'])
             
             # Update upload with new parsed data
             upload.set_parsed_data(parsed_data)
+            Question.replace_for_upload(upload, parsed_data)
             db.session.commit()
+            quiz_builder.invalidate(user_id)
+            progress_cache.invalidate(user_id)
             
             return jsonify({
                 'message': 'File reparsed successfully',
@@ -195,8 +285,12 @@ def reparse_upload(upload_id):
             }), 200
             
         except Exception as parse_error:
-            upload.status = 'failed'
+            db.session.rollback()
+            upload.mark_failed(str(parse_error))
+            Question.clear_for_upload(upload.id)
             db.session.commit()
+            quiz_builder.invalidate(user_id)
+            progress_cache.invalidate(user_id)
             
             return jsonify({
                 'error': 'Failed to reparse file',
@@ -0,0 +1,186 @@
+import calendar
+import numpy as np
+from datetime import timedelta
+from typing import Dict, Any
+
+from .. import db
+from ..models import UserDailyStats
+from ..models.stats import DATE_BUCKETS
+
+# Shortest length of each bucket in days, to bound how many buckets a range spans
+BUCKET_MIN_DAYS = {'day': 1, 'week': 7, 'month': 28}
+
+def choose_bucket(days, requested='auto', max_points=120):
+    """Finest bucket, no finer than `requested`, that keeps `days` days within `max_points` buckets"""
+    candidates = DATE_BUCKETS if requested == 'auto' else DATE_BUCKETS[DATE_BUCKETS.index(requested):]
+    for bucket in candidates:
+        # A range can start and end in partial buckets
+        if days // BUCKET_MIN_DAYS[bucket] + 2 <= max_points:
+            return bucket
+    return candidates[-1]
+
+def bucket_end(start, bucket):
+    """Last day of the bucket starting on `start`"""
+    if bucket == 'week':
+        return start + timedelta(days=6)
+    if bucket == 'month':
+        return start.replace(day=calendar.monthrange(start.year, start.month)[1])
+    return start
+
+class DailySeries:
+    """Daily task totals for one or more users as dense NumPy matrices.
+    
+    `total` and `completed` have one row per user (in `user_ids` order) and one
+    column per day from `start_date` to `end_date`; days without tasks are 0.
+    Every metric is computed for all rows at once, so a single user is just a
+    one-row matrix and a whole cohort costs the same handful of array passes.
+    """
+    
+    def __init__(self, user_ids, start_date, end_date, total, completed):
+        self.user_ids = [int(user_id) for user_id in user_ids]
+        self.start_date = start_date
+        self.end_date = end_date
+        self.total = np.asarray(total, dtype=np.float64).reshape(len(self.user_ids), -1)
+        self.completed = np.asarray(completed, dtype=np.float64).reshape(len(self.user_ids), -1)
+    
+    @classmethod
+    def from_rows(cls, user_ids, start_date, end_date, rows):
+        """Series from (user_id, date, total, completed) rows"""
+        user_ids = [int(user_id) for user_id in user_ids]
+        days = (end_date - start_date).days + 1
+        total = np.zeros((len(user_ids), days))
+        completed = np.zeros((len(user_ids), days))
+        
+        rows = [row for row in rows if start_date <= row[1] <= end_date]
+        if rows:
+            index = {user_id: position for position, user_id in enumerate(user_ids)}
+            user_index = np.fromiter((index[int(row[0])] for row in rows), dtype=np.intp, count=len(rows))
+            day_index = np.fromiter(((row[1] - start_date).days for row in rows), dtype=np.intp, count=len(rows))
+            # Scatter-add, so duplicate (user, day) rows are summed
+            np.add.at(total, (user_index, day_index), [row[2] or 0 for row in rows])
+            np.add.at(completed, (user_index, day_index), [row[3] or 0 for row in rows])
+        return cls(user_ids, start_date, end_date, total, completed)
+    
+    @classmethod
+    def load(cls, user_ids, start_date, end_date):
+        """Series for some users from the daily rollup, in one query"""
+        user_ids = [int(user_id) for user_id in user_ids]
+        rows = db.session.query(
+            UserDailyStats.user_id,
+            UserDailyStats.date,
+            UserDailyStats.total_tasks,
+            UserDailyStats.completed_tasks
+        ).filter(
+            UserDailyStats.user_id.in_(user_ids),
+            UserDailyStats.date >= start_date,
+            UserDailyStats.date <= end_date
+        ).all() if user_ids else []
+        return cls.from_rows(user_ids, start_date, end_date, rows)
+    
+    @property
+    def active(self):
+        """Boolean matrix of the days that have tasks"""
+        return self.total > 0
+    
+    def totals(self):
+        """(total, completed) tasks per user over the whole window"""
+        return self.total.sum(axis=1), self.completed.sum(axis=1)
+    
+    def daily_completion_rates(self):
+        """Completed / total per day, NaN on days without tasks"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(self.active, self.completed / self.total, np.nan)
+    
+    def average_completion_rate(self):
+        """Mean of the daily completion rates over active days, 0 for users with none"""
+        active = self.active
+        days = active.sum(axis=1)
+        rates = np.nan_to_num(self.daily_completion_rates())
+        return np.divide(rates.sum(axis=1), days, out=np.zeros(len(self.user_ids)), where=days > 0)
+    
+    def consistency(self):
+        """Consistency score (0-100) per user: lower variance of tasks per active day scores higher"""
+        active = self.active
+        days = active.sum(axis=1)
+        safe_days = np.maximum(days, 1)
+        mean = np.where(active, self.total, 0).sum(axis=1) / safe_days
+        variance = np.where(active, (self.total - mean[:, None]) ** 2, 0).sum(axis=1) / safe_days
+        # Scale variance to 0-100
+        return np.where(days > 0, np.clip(100 - variance * 10, 0, 100), 0.0)
+    
+    def streaks(self):
+        """(current, longest) runs of consecutive days with at least one completed task.
+        
+        The last day does not break the current streak while it has no
+        completions yet, since it is usually today and still in progress.
+        """
+        studied = self.completed > 0
+        days = studied.shape[1]
+        if days == 0:
+            empty = np.zeros(len(self.user_ids), dtype=np.int64)
+            return empty, empty
+        
+        # Length of the run ending at each day: distance to the last day without study
+        index = np.arange(days)
+        last_break = np.maximum.accumulate(np.where(studied, -1, index), axis=1)
+        run = index - last_break
+        longest = run.max(axis=1)
+        current = run[:, -1]
+        if days > 1:
+            current = np.where(studied[:, -1], current, run[:, -2])
+        return current, longest
+    
+    def rolling_completion_rate(self, window=7):
+        """Completed / total over the trailing `window` days ending on each day, NaN without tasks"""
+        window = max(1, int(window))
+        zeros = np.zeros((len(self.user_ids), 1))
+        total = np.cumsum(np.hstack([zeros, self.total]), axis=1)
+        completed = np.cumsum(np.hstack([zeros, self.completed]), axis=1)
+        
+        ends = np.arange(1, total.shape[1])
+        starts = np.maximum(ends - window, 0)
+        window_total = total[:, ends] - total[:, starts]
+        window_completed = completed[:, ends] - completed[:, starts]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(window_total > 0, window_completed / window_total, np.nan)
+    
+    def trend_slope(self):
+        """Least-squares slope of the daily completion rate, in rate per day (0 with under two active days)"""
+        rates = self.daily_completion_rates()
+        active = ~np.isnan(rates)
+        points = active.sum(axis=1)
+        safe_points = np.maximum(points, 1)
+        
+        x = np.broadcast_to(np.arange(rates.shape[1], dtype=np.float64), rates.shape)
+        x_mean = np.where(active, x, 0).sum(axis=1) / safe_points
+        y_mean = np.where(active, rates, 0).sum(axis=1) / safe_points
+        dx = np.where(active, x - x_mean[:, None], 0)
+        dy = np.where(active, rates - y_mean[:, None], 0)
+        
+        denominator = (dx * dx).sum(axis=1)
+        return np.divide((dx * dy).sum(axis=1), denominator, out=np.zeros(len(self.user_ids)),
+                         where=(points >= 2) & (denominator > 0))
+    
+    def summaries(self, window=7) -> Dict[int, Dict[str, Any]]:
+        """Every metric per user id, as plain Python numbers"""
+        total, completed = self.totals()
+        current_streak, longest_streak = self.streaks()
+        rolling = self.rolling_completion_rate(window)
+        latest_rolling = rolling[:, -1] if rolling.shape[1] else np.full(len(self.user_ids), np.nan)
+        
+        # Whole columns go through tolist() once; indexing NumPy scalars per user is far slower
+        columns = zip(
+            self.user_ids,
+            total.astype(np.int64).tolist(),
+            completed.astype(np.int64).tolist(),
+            self.active.sum(axis=1).tolist(),
+            self.average_completion_rate().tolist(),
+            self.consistency().tolist(),
+            current_streak.tolist(),
+            longest_streak.tolist(),
+            np.where(np.isnan(latest_rolling), None, latest_rolling).tolist(),
+            self.trend_slope().tolist()
+        )
+        keys = ('total_tasks', 'completed_tasks', 'active_days', 'average_completion_rate', 'consistency_score',
+                'current_streak', 'longest_streak', 'rolling_completion_rate', 'completion_trend')
+        return {user_id: dict(zip(keys, values)) for user_id, *values in columns}
@@ -0,0 +1,127 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime
+from typing import Dict, List, Any, Optional, Callable, Tuple
+
+from .. import db
+from ..models import User, Plan, Task, Reminder
+from .reminder_index import insert_reminders
+
+DAILY_INSIGHT_TITLE = 'Daily Study Insight'
+DAILY_INSIGHT_TIER = 1
+MAX_REPORTED_ERRORS = 20
+
+def normalize_title(title: str) -> str:
+    """Task title compared case- and whitespace-insensitively"""
+    return ' '.join((title or '').split()).casefold()
+
+class DailyInsightPipeline:
+    """Generates the nightly study insights once per distinct study situation.
+    
+    Users whose tasks for the day have the same normalized titles and who
+    share a persona (typically everyone on one plan template) get the same
+    prompt, so they are grouped and the model is called once per group.
+    Up to `concurrency` groups are generated at a time on a thread pool;
+    the rows for each group's users are bulk-inserted from the calling
+    thread in transactions of at most `chunk_size` reminders. A group whose
+    generation fails is reported and skipped without affecting the others.
+    Users who already have today's insight are left out, so a rerun only
+    fills in what is missing.
+    """
+    
+    def __init__(self, generate: Optional[Callable[[List[str], str], str]] = None, concurrency: int = 4,
+                 chunk_size: int = 1000):
+        self.generate = generate
+        self.concurrency = max(1, concurrency)
+        self.chunk_size = max(1, chunk_size)
+    
+    @classmethod
+    def from_config(cls, config, **overrides):
+        """Pipeline configured from the DAILY_INSIGHT_* app settings"""
+        options = {
+            'concurrency': config['DAILY_INSIGHT_CONCURRENCY'],
+            'chunk_size': config['DAILY_INSIGHT_CHUNK_SIZE'],
+        }
+        options.update({key: value for key, value in overrides.items() if value is not None})
+        return cls(**options)
+    
+    def groups(self, day: date, since: datetime) -> Dict[Tuple[str, Tuple[str, ...]], Dict[str, Any]]:
+        """Users with tasks on `day` and no insight since `since`, keyed by (persona, normalized titles)"""
+        has_insight = db.select(Reminder.id).where(
+            Reminder.user_id == Plan.user_id,
+            Reminder.title == DAILY_INSIGHT_TITLE,
+            Reminder.created_at >= since
+        ).exists()
+        query = db.select(Plan.user_id, User.persona, Task.title).select_from(Task).join(
+            Plan, Task.plan_id == Plan.id
+        ).join(User, Plan.user_id == User.id).where(
+            Task.date == day, ~has_insight
+        ).order_by(Plan.user_id, Task.id)
+        
+        # user_id -> (persona, titles in task order)
+        users: Dict[int, Tuple[str, List[str]]] = {}
+        for user_id, persona, title in db.session.execute(query):
+            users.setdefault(user_id, (persona or 'student', []))[1].append(title)
+        
+        groups = {}
+        for user_id, (persona, titles) in users.items():
+            key = (persona, tuple(sorted({normalize_title(title) for title in titles})))
+            # The first user's titles, as written, go into the prompt for the whole group
+            groups.setdefault(key, {'persona': persona, 'titles': titles, 'user_ids': []})['user_ids'].append(user_id)
+        return groups
+    
+    def _generator(self):
+        """Default generator: the OpenAI client, created here because worker threads have no app context"""
+        from .gpt_handler import GPTHandler
+        handler = GPTHandler()
+        handler._get_client()
+        return handler.daily_insight
+    
+    def run(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Generate and insert today's insights and report the calls saved"""
+        now = now or datetime.utcnow()
+        started = time.perf_counter()
+        groups = list(self.groups(now.date(), datetime.combine(now.date(), datetime.min.time())).values())
+        next_fire_at = Reminder.next_fire_for_tier(DAILY_INSIGHT_TIER, now)
+        
+        generate = self.generate or (self._generator() if groups else None)
+        reminders = 0
+        errors = []
+        rows: List[Dict[str, Any]] = []
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            futures = {pool.submit(generate, group['titles'], group['persona']): group for group in groups}
+            for future in as_completed(futures):
+                group = futures[future]
+                try:
+                    insight = future.result()
+                except Exception as e:
+                    errors.append(f"{group['persona']} group of {len(group['user_ids'])} user(s): {e}")
+                    continue
+                rows.extend(
+                    {
+                        'user_id': user_id,
+                        'title': DAILY_INSIGHT_TITLE,
+                        'content': insight,
+                        'tier': DAILY_INSIGHT_TIER,
+                        'next_fire_at': next_fire_at,
+                        'is_active': True
+                    }
+                    for user_id in group['user_ids']
+                )
+                while len(rows) >= self.chunk_size:
+                    reminders += insert_reminders(rows[:self.chunk_size])
+                    rows = rows[self.chunk_size:]
+        if rows:
+            reminders += insert_reminders(rows)
+        
+        users = sum(len(group['user_ids']) for group in groups)
+        seconds = time.perf_counter() - started
+        return {
+            'users': users,
+            'groups': len(groups),
+            'failed_groups': len(errors),
+            'reminders': reminders,
+            'errors': errors[:MAX_REPORTED_ERRORS],
+            'seconds': round(seconds, 3),
+            'users_per_second': round(users / seconds) if seconds > 0 and users else 0
+        }
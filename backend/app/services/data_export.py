@@ -0,0 +1,397 @@
+import gzip
+import io
+import json
+import time
+import zlib
+from array import array
+from bisect import bisect_left
+from datetime import date, datetime
+from typing import Dict, List, Any, Optional
+from sqlalchemy.sql import sqltypes
+
+from .. import db
+from ..models import User, Plan, PlanTopic, Task, Upload, Question, Answer, Concept, Reminder, ChatLog
+from ..models.stats import rebuild_stats
+from ..utils.db_routing import read_engine
+from .reminder_index import reminder_index
+
+EXPORT_FORMAT = 'pla-export'
+EXPORT_VERSION = 1
+MAX_REPORTED_ERRORS = 20
+
+# Tables in dependency order: every reference points at a table exported earlier
+EXPORT_MODELS = (User, Plan, PlanTopic, Task, Upload, Question, Answer, Concept, Reminder, ChatLog)
+EXPORT_TABLES = {model.__tablename__: model.__table__ for model in EXPORT_MODELS}
+
+# Foreign keys between exported tables: {table: {column: referenced table}}
+REFERENCES = {
+    name: {fk.parent.name: fk.column.table.name for fk in table.foreign_keys if fk.column.table.name in EXPORT_TABLES}
+    for name, table in EXPORT_TABLES.items()
+}
+# Tables whose new ids have to be remembered to rewrite the references to them
+REFERENCED_TABLES = {target for columns in REFERENCES.values() for target in columns.values()}
+
+def _integer(value):
+    if not isinstance(value, int):
+        raise ValueError(value)
+    return value
+
+def _column_parser(column):
+    """Converter from the JSON value of a column to what the database driver expects"""
+    if isinstance(column.type, sqltypes.DateTime):
+        return datetime.fromisoformat
+    if isinstance(column.type, sqltypes.Date):
+        return date.fromisoformat
+    if isinstance(column.type, sqltypes.Integer):
+        return _integer
+    return None
+
+# (column name, parser) per table, looked up once rather than per row
+COLUMN_PARSERS = {
+    name: [(column.name, _column_parser(column)) for column in table.columns]
+    for name, table in EXPORT_TABLES.items()
+}
+
+# Never included in self-service exports
+CREDENTIAL_COLUMNS = {'users': ('password_hash',)}
+
+# Never taken from an import file: a server path is only meaningful on the
+# install that wrote it, so imported uploads keep their extracted data but
+# have no file to delete or reparse
+IMPORT_OVERRIDES = {'uploads': {'file_url': '', 'status': 'failed'}}
+
+class ExportFormatError(ValueError):
+    """Raised when an import file is not a valid export; carries every problem found"""
+    
+    def __init__(self, errors: List[str]):
+        self.errors = errors[:MAX_REPORTED_ERRORS]
+        more = len(errors) - len(self.errors)
+        message = '; '.join(self.errors) + (f' (and {more} more)' if more > 0 else '')
+        super().__init__(message)
+
+def _json_default(value):
+    """Encode the column types json cannot handle on its own"""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+def gzip_stream(chunks, level: int = 6, flush_bytes: int = 64 * 1024):
+    """Gzip-compress an iterable of text chunks on the fly, yielding compressed bytes"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    pending, size = [], 0
+    for chunk in chunks:
+        data = chunk.encode('utf-8')
+        pending.append(data)
+        size += len(data)
+        if size >= flush_bytes:
+            compressed = compressor.compress(b''.join(pending))
+            pending, size = [], 0
+            if compressed:
+                yield compressed
+    yield compressor.compress(b''.join(pending)) + compressor.flush()
+
+def open_export(fileobj):
+    """Text lines of a gzip NDJSON export read from a binary file object"""
+    return io.TextIOWrapper(gzip.GzipFile(fileobj=fileobj, mode='rb'), encoding='utf-8')
+
+class IdMap:
+    """Old -> new primary keys of one table, as two int64 arrays.
+    
+    Exports list rows in id order, so old ids arrive ascending and lookups
+    are a binary search; 16 bytes per row instead of a dict entry.
+    """
+    
+    def __init__(self):
+        self.old = array('q')
+        self.new = array('q')
+    
+    def add(self, old_id: int, new_id: int):
+        if self.old and old_id <= self.old[-1]:
+            raise ValueError(f'ids must be ascending, got {old_id} after {self.old[-1]}')
+        self.old.append(old_id)
+        self.new.append(new_id)
+    
+    def get(self, old_id: int) -> Optional[int]:
+        position = bisect_left(self.old, old_id)
+        if position < len(self.old) and self.old[position] == old_id:
+            return self.new[position]
+        return None
+    
+    def values(self):
+        return self.new
+
+class DataExporter:
+    """Streams one user's data (or every user's) as gzip-compressed NDJSON.
+    
+    The first line is a header, then one {"table": ..., "row": {...}} object
+    per row, table by table in EXPORT_MODELS order and by id within a table.
+    Each table is read with a server-side cursor where the database supports
+    one, `chunk_size` rows at a time, and compressed as it is produced, so
+    memory stays flat whatever the account size. Uploaded files themselves
+    are not included, only their metadata and extracted content.
+    """
+    
+    def __init__(self, user_id: Optional[int] = None, include_credentials: bool = False,
+                 chunk_size: int = 1000, engine=None):
+        self.user_id = int(user_id) if user_id is not None else None
+        self.include_credentials = include_credentials
+        self.chunk_size = max(1, chunk_size)
+        self.engine = engine
+    
+    def _query(self, name: str, table):
+        """Rows of one table in this export's scope, by id"""
+        excluded = () if self.include_credentials else CREDENTIAL_COLUMNS.get(name, ())
+        query = db.select(*[column for column in table.columns if column.name not in excluded]).order_by(table.c.id)
+        if self.user_id is None:
+            return query
+        if name == 'users':
+            return query.where(table.c.id == self.user_id)
+        if name == 'tasks':
+            return query.where(table.c.plan_id.in_(db.select(Plan.id).where(Plan.user_id == self.user_id)))
+        if name == 'answers':
+            return query.where(table.c.upload_id.in_(db.select(Upload.id).where(Upload.user_id == self.user_id)))
+        return query.where(table.c.user_id == self.user_id)
+    
+    def lines(self):
+        """NDJSON lines of the export"""
+        yield json.dumps({
+            'format': EXPORT_FORMAT,
+            'version': EXPORT_VERSION,
+            'exported_at': datetime.utcnow(),
+            'scope': 'user' if self.user_id is not None else 'all'
+        }, default=_json_default) + '\n'
+        
+        engine = self.engine or read_engine()
+        with engine.connect() as connection:
+            options = {'stream_results': True, 'yield_per': self.chunk_size}
+            if engine.dialect.name == 'postgresql':
+                # One snapshot for every table, so no row references one created mid-export
+                options['isolation_level'] = 'REPEATABLE READ'
+            connection = connection.execution_options(**options)
+            for name, table in EXPORT_TABLES.items():
+                for partition in connection.execute(self._query(name, table)).mappings().partitions():
+                    yield ''.join(
+                        json.dumps({'table': name, 'row': dict(row)}, default=_json_default) + '\n'
+                        for row in partition
+                    )
+    
+    def stream(self):
+        """The export as gzip-compressed bytes, produced incrementally"""
+        return gzip_stream(self.lines())
+
+class DataImporter:
+    """Loads a gzip NDJSON export, streaming it twice.
+    
+    The first pass validates every line without writing anything,
+    including that each required reference points at an exported row; the
+    second inserts rows in executemany batches of `chunk_size`, committing
+    each, and rewrites references to the new primary keys. Rows get new
+    ids, so an export can be loaded next to existing data. Accounts are
+    matched by email (new ones need the password_hash of a full export),
+    or with `user_id` every row is imported into that one account.
+    Progress rollups are rebuilt for the affected accounts at the end.
+    """
+    
+    def __init__(self, chunk_size: int = 1000, user_id: Optional[int] = None):
+        self.chunk_size = max(1, chunk_size)
+        self.user_id = int(user_id) if user_id is not None else None
+    
+    def _records(self, lines):
+        """(line number, table name, row) for every row line, checking the header"""
+        header = None
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                raise ExportFormatError([f'Line {number}: invalid JSON: {e}'])
+            if header is None:
+                header = record
+                if not isinstance(record, dict) or record.get('format') != EXPORT_FORMAT:
+                    raise ExportFormatError(['Not a data export: the header line is missing'])
+                if record.get('version') != EXPORT_VERSION:
+                    raise ExportFormatError([f"Unsupported export version {record.get('version')!r}"])
+                continue
+            if not isinstance(record, dict) or not isinstance(record.get('row'), dict):
+                raise ExportFormatError([f'Line {number}: expected an object with "table" and "row"'])
+            yield number, record.get('table'), record['row']
+    
+    def _decode(self, name: str, row: Dict[str, Any], label: str, errors: List[str]) -> Dict[str, Any]:
+        """Column values of one exported row, dates parsed, unknown columns dropped"""
+        values = {}
+        for column, parse in COLUMN_PARSERS[name]:
+            if column not in row:
+                continue
+            value = row[column]
+            if value is not None and parse is not None:
+                try:
+                    value = parse(value)
+                except (TypeError, ValueError):
+                    errors.append(f'{label}: invalid {column} {value!r}')
+            values[column] = value
+        if not isinstance(values.get('id'), int):
+            errors.append(f'{label}: id is required')
+        return values
+    
+    def validate(self, lines) -> Dict[str, int]:
+        """Check a whole export without writing; returns rows per table"""
+        errors = []
+        counts = {}
+        last_ids = {}
+        # Ids of the referenced tables' rows, to check every reference resolves before anything is written
+        exported = {name: IdMap() for name in REFERENCED_TABLES}
+        position = -1
+        order = list(EXPORT_TABLES)
+        for number, name, row in self._records(lines):
+            label = f'Line {number}'
+            if name not in EXPORT_TABLES:
+                errors.append(f'{label}: unknown table {name!r}')
+                continue
+            if order.index(name) < position:
+                errors.append(f'{label}: {name} rows must come before the tables that reference them')
+            position = order.index(name)
+            
+            values = self._decode(name, row, label, errors)
+            if isinstance(values.get('id'), int):
+                if values['id'] <= last_ids.get(name, 0):
+                    errors.append(f'{label}: {name} rows must be in ascending id order')
+                elif name in exported:
+                    exported[name].add(values['id'], values['id'])
+                last_ids[name] = values['id']
+            for column, target in REFERENCES[name].items():
+                if target == 'users' and self.user_id is not None:
+                    continue  # Rewritten to the importing account
+                reference = values.get(column)
+                if (isinstance(reference, int) and not EXPORT_TABLES[name].c[column].nullable
+                        and exported[target].get(reference) is None):
+                    errors.append(f'{label}: {column} {reference} is not in the export')
+            missing = [
+                column.name for column in EXPORT_TABLES[name].columns
+                if not column.nullable and not column.primary_key and column.default is None
+                and values.get(column.name) is None
+                and not (name == 'users' and column.name == 'password_hash')
+                and column.name not in IMPORT_OVERRIDES.get(name, {})
+            ]
+            if missing:
+                errors.append(f"{label}: {name} row is missing {', '.join(missing)}")
+            counts[name] = counts.get(name, 0) + 1
+            if len(errors) > MAX_REPORTED_ERRORS:
+                break
+        
+        if self.user_id is not None and counts.get('users', 0) > 1:
+            errors.append('The export holds several accounts; only single-account exports can be imported here')
+        if not errors and not counts:
+            errors.append('The export contains no rows')
+        if errors:
+            raise ExportFormatError(errors)
+        return counts
+    
+    def _map_users(self, rows: List[Dict[str, Any]], id_map: IdMap):
+        """Match exported accounts to existing ones by email, creating the rest"""
+        if self.user_id is not None:
+            for row in rows:
+                id_map.add(row['id'], self.user_id)
+            return
+        
+        emails = [row['email'].strip().lower() for row in rows]
+        existing = dict(db.session.execute(db.select(User.email, User.id).where(User.email.in_(emails))).all())
+        new_rows = [
+            dict(row, email=email) for row, email in zip(rows, emails) if email not in existing
+        ]
+        missing = [row['email'] for row in new_rows if not row.get('password_hash')]
+        if missing:
+            raise ExportFormatError([
+                f"No account for {email} and the export has no password_hash to create it" for email in missing
+            ])
+        if new_rows:
+            new_ids = db.session.execute(
+                db.insert(User).returning(User.id, sort_by_parameter_order=True),
+                [{key: value for key, value in row.items() if key != 'id'} for row in new_rows]
+            ).scalars().all()
+            existing.update(zip((row['email'] for row in new_rows), new_ids))
+        for row, email in zip(rows, emails):
+            id_map.add(row['id'], existing[email])
+    
+    def _insert(self, name: str, rows: List[Dict[str, Any]], id_maps: Dict[str, IdMap]):
+        """Insert one batch of a table's rows with their references rewritten"""
+        if name == 'users':
+            self._map_users(rows, id_maps[name])
+            return
+        
+        for row in rows:
+            for column, target in REFERENCES[name].items():
+                if row.get(column) is None:
+                    continue
+                if target == 'users' and self.user_id is not None:
+                    row[column] = self.user_id
+                    continue
+                new_id = id_maps[target].get(row[column])
+                if new_id is None and not EXPORT_TABLES[name].c[column].nullable:
+                    raise ExportFormatError([f"{name} row {row['id']}: {column} {row[column]} is not in the export"])
+                row[column] = new_id
+            row.update(IMPORT_OVERRIDES.get(name, {}))
+        
+        table = EXPORT_TABLES[name]
+        old_ids = [row.pop('id') for row in rows]
+        if name in REFERENCED_TABLES:
+            new_ids = db.session.execute(
+                db.insert(table).returning(table.c.id, sort_by_parameter_order=True), rows
+            ).scalars().all()
+            for old_id, new_id in zip(old_ids, new_ids):
+                id_maps[name].add(old_id, new_id)
+        else:
+            db.session.execute(db.insert(table), rows)
+    
+    def import_lines(self, lines) -> Dict[str, Any]:
+        """Write a validated export in chunked transactions and report throughput"""
+        started = time.perf_counter()
+        id_maps = {name: IdMap() for name in REFERENCED_TABLES}
+        counts = {}
+        chunks = 0
+        batch, batch_table = [], None
+        try:
+            for number, name, row in self._records(lines):
+                if batch and (name != batch_table or len(batch) >= self.chunk_size):
+                    self._insert(batch_table, batch, id_maps)
+                    db.session.commit()
+                    chunks += 1
+                    batch = []
+                batch_table = name
+                batch.append(self._decode(name, row, f'Line {number}', []))
+                counts[name] = counts.get(name, 0) + 1
+            if batch:
+                self._insert(batch_table, batch, id_maps)
+                db.session.commit()
+                chunks += 1
+        except Exception:
+            db.session.rollback()
+            raise
+        
+        # Core inserts bypass the rollup hooks
+        user_ids = [self.user_id] if self.user_id is not None else sorted(set(id_maps['users'].values()))
+        if user_ids:
+            rebuild_stats(user_ids)
+            if reminder_index.enabled():
+                reminder_index.rebuild(user_ids)
+        
+        rows = sum(counts.values())
+        seconds = time.perf_counter() - started
+        return {
+            'users': len(user_ids),
+            'user_ids': user_ids,
+            'tables': counts,
+            'rows': rows,
+            'chunks': chunks,
+            'seconds': round(seconds, 3),
+            'rows_per_second': round(rows / seconds) if seconds > 0 and rows else 0
+        }
+    
+    def import_file(self, fileobj) -> Dict[str, Any]:
+        """Validate then import a seekable binary file object holding a gzip export"""
+        try:
+            self.validate(open_export(fileobj))
+            fileobj.seek(0)
+            return self.import_lines(open_export(fileobj))
+        except (OSError, EOFError, UnicodeDecodeError, zlib.error) as e:
+            raise ExportFormatError([f'Not a gzip-compressed export: {e}'])
@@ -1,11 +1,122 @@
-import PyPDF2
-from docx import Document
+import abc
+import importlib
+import importlib.util
 import re
 import os
-from typing import Dict, List, Any
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Any, Iterator, Optional
+
+# WordprocessingML namespace used by word/document.xml
+W_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+# Run-level elements that contribute text, mirroring python-docx's Run.text
+DOCX_TEXT_TAGS = {
+    W_NS + 't': None,
+    W_NS + 'tab': '\t',
+    W_NS + 'ptab': '\t',
+    W_NS + 'br': '\n',
+    W_NS + 'cr': '\n',
+    W_NS + 'noBreakHyphen': '-',
+}
+
+class PDFBackend(abc.ABC):
+    """Base class for PDF text-extraction backends"""
+    name = None
+    module = None  # Import name used to detect whether the backend is installed
+    
+    def is_available(self) -> bool:
+        """Check whether the backing library is installed"""
+        return importlib.util.find_spec(self.module) is not None
+    
+    @abc.abstractmethod
+    def extract_pages(self, file_path: str) -> Iterator[str]:
+        """Yield the text of each page in order"""
+
+class PyPDF2Backend(PDFBackend):
+    name = 'pypdf2'
+    module = 'PyPDF2'
+    
+    def extract_pages(self, file_path: str) -> Iterator[str]:
+        PyPDF2 = importlib.import_module('PyPDF2')
+        with open(file_path, 'rb') as file:
+            for page in PyPDF2.PdfReader(file).pages:
+                yield page.extract_text() or ''
+
+class PyPDFBackend(PDFBackend):
+    name = 'pypdf'
+    module = 'pypdf'
+    
+    def extract_pages(self, file_path: str) -> Iterator[str]:
+        pypdf = importlib.import_module('pypdf')
+        with open(file_path, 'rb') as file:
+            for page in pypdf.PdfReader(file).pages:
+                yield page.extract_text() or ''
+
+class PDFMinerBackend(PDFBackend):
+    name = 'pdfminer'
+    module = 'pdfminer'
+    
+    def extract_pages(self, file_path: str) -> Iterator[str]:
+        high_level = importlib.import_module('pdfminer.high_level')
+        layout = importlib.import_module('pdfminer.layout')
+        for page_layout in high_level.extract_pages(file_path):
+            yield ''.join(
+                element.get_text()
+                for element in page_layout
+                if isinstance(element, layout.LTTextContainer)
+            )
+
+class PDFiumBackend(PDFBackend):
+    name = 'pypdfium2'
+    module = 'pypdfium2'
+    
+    def extract_pages(self, file_path: str) -> Iterator[str]:
+        pdfium = importlib.import_module('pypdfium2')
+        pdf = pdfium.PdfDocument(file_path)
+        try:
+            for page in pdf:
+                text_page = page.get_textpage()
+                try:
+                    yield text_page.get_text_range()
+                finally:
+                    text_page.close()
+                    page.close()
+        finally:
+            pdf.close()
+
+PDF_BACKENDS = {backend.name: backend for backend in (PDFiumBackend, PyPDFBackend, PyPDF2Backend, PDFMinerBackend)}
+
+# Backend used unless PDF_BACKEND says otherwise; calibration compares the others against it
+DEFAULT_PDF_BACKEND = 'pypdf2'
+
+# Order tried when the backend is 'auto' (fastest first); opt in only after calibrating
+PDF_BACKEND_PREFERENCE = ['pypdfium2', 'pypdf', 'pypdf2', 'pdfminer']
+
+def available_pdf_backends() -> List[str]:
+    """Names of the PDF backends whose libraries are installed, in preference order"""
+    return [name for name in PDF_BACKEND_PREFERENCE if PDF_BACKENDS[name]().is_available()]
+
+def get_pdf_backend(name: str = DEFAULT_PDF_BACKEND) -> PDFBackend:
+    """Resolve a backend by name, or the fastest installed one for 'auto'"""
+    if name == 'auto':
+        available = available_pdf_backends()
+        if not available:
+            raise RuntimeError('No PDF extraction backend is installed')
+        name = available[0]
+    
+    if name not in PDF_BACKENDS:
+        raise ValueError(f'Unknown PDF backend: {name}. Choose from {", ".join(PDF_BACKEND_PREFERENCE)} or auto')
+    
+    backend = PDF_BACKENDS[name]()
+    if not backend.is_available():
+        raise RuntimeError(f'PDF backend {name} is not installed')
+    return backend
 
 class FileParser:
-    def __init__(self):
+    def __init__(self, pdf_backend: str = DEFAULT_PDF_BACKEND):
+        self.pdf_backend = pdf_backend
         self.question_patterns = [
             r'^\d+\.\s*(.+?)(?=\n\d+\.|\n[A-D]\.|\n$)',  # 1. Question text
             r'^[A-Z]\.\s*(.+?)(?=\n[A-Z]\.|\n$)',  # A. Question text
@@ -17,18 +128,19 @@ class FileParser:
             r'^Answer:\s*(.+?)(?=\n\d+\.|\n$)',  # Answer: text
         ]
     
+    def parse_file(self, file_path: str, file_type: str) -> Dict[str, Any]:
+        """Parse a file by type ('pdf' or 'docx')"""
+        if file_type == 'pdf':
+            return self.parse_pdf(file_path)
+        return self.parse_docx(file_path)
+    
     def parse_pdf(self, file_path: str) -> Dict[str, Any]:
         """Parse PDF file and extract Q/A pairs"""
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = ""
-                
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-                
-                return self._extract_qa_pairs(text)
-                
+            text = self.extract_pdf_text(file_path)
+            
+            return self._extract_qa_pairs(text)
+            
         except Exception as e:
             return {
                 'error': f'Failed to parse PDF: {str(e)}',
@@ -36,14 +148,15 @@ class FileParser:
                 'concepts': []
             }
     
+    def extract_pdf_text(self, file_path: str, backend: Optional[str] = None) -> str:
+        """Extract the text of a PDF with the configured (or given) backend"""
+        pdf_backend = get_pdf_backend(backend or self.pdf_backend)
+        return "".join(page + "\n" for page in pdf_backend.extract_pages(file_path))
+    
     def parse_docx(self, file_path: str) -> Dict[str, Any]:
         """Parse DOCX file and extract Q/A pairs"""
         try:
-            doc = Document(file_path)
-            text = ""
-            
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
+            text = "\n".join(self.iter_docx_text(file_path))
             
             return self._extract_qa_pairs(text)
             
@@ -54,6 +167,49 @@ class FileParser:
                 'concepts': []
             }
     
+    def iter_docx_text(self, file_path: str) -> Iterator[str]:
+        """Stream paragraph text (including table cells) from a DOCX in document order.
+        
+        word/document.xml is read incrementally straight out of the zip and every
+        paragraph is discarded once its text has been yielded, so memory stays
+        bounded by the largest paragraph rather than the whole document.
+        """
+        paragraph_tag = W_NS + 'p'
+        paragraph_depth = 0
+        parents = []
+        
+        with zipfile.ZipFile(file_path) as archive:
+            with archive.open('word/document.xml') as document:
+                for event, elem in ET.iterparse(document, events=('start', 'end')):
+                    if event == 'start':
+                        if elem.tag == paragraph_tag:
+                            paragraph_depth += 1
+                        parents.append(elem)
+                        continue
+                    
+                    parents.pop()
+                    if elem.tag == paragraph_tag:
+                        paragraph_depth -= 1
+                        yield self._docx_paragraph_text(elem)
+                    elif paragraph_depth > 0:
+                        # Runs are still needed until their paragraph closes
+                        continue
+                    
+                    # Drop the finished subtree so the tree never grows
+                    elem.clear()
+                    if parents:
+                        parents[-1].remove(elem)
+    
+    def _docx_paragraph_text(self, paragraph: ET.Element) -> str:
+        """Join the text-bearing run elements of a paragraph"""
+        parts = []
+        for run in paragraph.iter(W_NS + 'r'):
+            for elem in run:
+                if elem.tag in DOCX_TEXT_TAGS:
+                    replacement = DOCX_TEXT_TAGS[elem.tag]
+                    parts.append((elem.text or '') if replacement is None else replacement)
+        return ''.join(parts)
+    
     def _extract_qa_pairs(self, text: str) -> Dict[str, Any]:
         """Extract questions and answers from text"""
         lines = text.split('\n')
@@ -153,4 +309,97 @@ class FileParser:
         if file_extension not in ['.pdf', '.docx']:
             return {'valid': False, 'error': 'Unsupported file type. Only PDF and DOCX files are allowed.'}
         
-        return {'valid': True, 'file_size': file_size, 'file_type': file_extension} 
\ No newline at end of file
+        return {'valid': True, 'file_size': file_size, 'file_type': file_extension} 
+
+def calibrate_pdf_backends(file_paths: List[str], reference: Optional[str] = None, repeat: int = 1) -> Dict[str, Any]:
+    """Benchmark every installed PDF backend on a sample corpus.
+    
+    Each backend's Q/A extraction is compared against the reference backend
+    (PyPDF2 by default, the historical extractor) so the fastest backend that
+    still yields identical questions and concepts can be chosen.
+    """
+    parser = FileParser()
+    backends = available_pdf_backends()
+    if not backends:
+        raise RuntimeError('No PDF extraction backend is installed')
+    
+    if reference is None:
+        reference = DEFAULT_PDF_BACKEND if DEFAULT_PDF_BACKEND in backends else backends[0]
+    
+    reference_results = {}
+    reference_errors = []
+    for path in file_paths:
+        try:
+            text = parser.extract_pdf_text(path, reference)
+        except Exception as e:
+            # Files the reference cannot read are left out rather than aborting the run
+            reference_errors.append(f'{os.path.basename(path)}: {str(e)}')
+            continue
+        reference_results[path] = (parser._extract_qa_pairs(text), _word_set(text))
+    file_paths = [path for path in file_paths if path in reference_results]
+    
+    results = []
+    for name in backends:
+        elapsed = 0.0
+        characters = 0
+        matching_files = 0
+        similarity = 0.0
+        errors = []
+        
+        for path in file_paths:
+            try:
+                started = time.perf_counter()
+                for _ in range(repeat):
+                    text = parser.extract_pdf_text(path, name)
+                elapsed += (time.perf_counter() - started) / repeat
+            except Exception as e:
+                errors.append(f'{os.path.basename(path)}: {str(e)}')
+                continue
+            
+            extracted = parser._extract_qa_pairs(text)
+            expected, expected_words = reference_results[path]
+            characters += len(text)
+            if _qa_signature(extracted) == _qa_signature(expected):
+                matching_files += 1
+            similarity += _jaccard(_word_set(text), expected_words)
+        
+        results.append({
+            'backend': name,
+            'seconds': round(elapsed, 4),
+            'files_per_second': round(len(file_paths) / elapsed, 2) if elapsed > 0 else None,
+            'characters': characters,
+            'matching_files': matching_files,
+            'text_similarity': round(similarity / len(file_paths), 4) if file_paths else 0,
+            'errors': errors
+        })
+    
+    results.sort(key=lambda result: result['seconds'])
+    equivalent = [
+        result for result in results
+        if not result['errors'] and result['matching_files'] == len(file_paths)
+    ]
+    
+    return {
+        'reference': reference,
+        'files': len(file_paths),
+        'skipped': reference_errors,
+        'results': results,
+        'recommended': equivalent[0]['backend'] if equivalent else reference
+    }
+
+def _qa_signature(parsed: Dict[str, Any]):
+    """Comparable summary of an extraction result"""
+    return (
+        [question['question'] for question in parsed['questions']],
+        [concept['term'] for concept in parsed['concepts']]
+    )
+
+def _word_set(text: str) -> set:
+    """Lower-cased word set used for a rough text-quality comparison"""
+    return set(re.findall(r'\w+', text.lower()))
+
+def _jaccard(left: set, right: set) -> float:
+    """Jaccard similarity of two word sets"""
+    if not left and not right:
+        return 1.0
+    return len(left & right) / len(left | right)
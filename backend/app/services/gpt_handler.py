@@ -95,13 +95,17 @@ class GPTHandler:
             }
         ] * num_questions
     
+    def _tutor_prompt(self, user_context: str) -> Dict[str, str]:
+        """System message for Athena, the assistant's tutor persona"""
+        return {"role": "system", "content": f"You are Athena, a helpful AI tutor for the Personalized Learning Assistant. {user_context} Be encouraging, clear, and educational in your responses."}
+    
     def chat_response(self, message: str, session_history: List[Dict[str, str]] = None, user_context: str = "") -> str:
         """Generate chat response with session memory"""
         try:
             client = self._get_client()
             # Build conversation history
             messages = [
-                {"role": "system", "content": f"You are Athena, a helpful AI tutor for the Personalized Learning Assistant. {user_context} Be encouraging, clear, and educational in your responses."}
+                self._tutor_prompt(user_context)
             ]
             
             # Add session history (last 10 messages to stay within limits)
@@ -124,6 +128,29 @@ class GPTHandler:
         except Exception as e:
             return f"I'm having trouble responding right now. Please try again in a moment. Error: {str(e)}"
     
+    def daily_insight(self, task_titles: List[str], persona: str = 'student') -> str:
+        """Brief encouraging insight for a day's study tasks; errors are raised so batch callers can tell"""
+        client = self._get_client()
+        task_summary = "\n".join([f"- {title}" for title in task_titles])
+        prompt = f"""
+        Based on these study tasks for today:
+        {task_summary}
+        
+        Provide a brief, encouraging insight or tip (max 100 words) to help the student stay motivated.
+        """
+        
+        response = client.chat.completions.create(
+            model="gpt-3.5-turbo",
+            messages=[
+                self._tutor_prompt(f"User is a {persona}."),
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=500,
+            temperature=0.7
+        )
+        
+        return response.choices[0].message.content.strip()
+    
     def create_study_plan(self, topics: List[str], target_date: str, persona: str = 'student') -> Dict[str, Any]:
         """Generate a personalized study plan"""
         try:
@@ -0,0 +1,259 @@
+import atexit
+import math
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from flask import current_app
+from typing import Dict, Any, Optional, Callable, List
+
+from .file_parser import FileParser
+
+try:
+    import resource
+except ImportError:  # Windows has no rlimits; the parent-side watchdog still applies
+    resource = None
+
+# How often the parent checks on a running parse
+POLL_INTERVAL = 0.05
+
+def parse_file(file_path: str, file_type: str, parser_options: Dict[str, Any]) -> Dict[str, Any]:
+    """Default worker task: run the file parser"""
+    return FileParser(**parser_options).parse_file(file_path, file_type)
+
+def _worker_main(conn, target: Callable, cpu_seconds: int, address_space_bytes: int):
+    """Pool worker entry point: cap memory once, then parse files until told to stop"""
+    if resource is not None and address_space_bytes:
+        # Allocations past the cap fail with MemoryError instead of growing until the poll notices
+        resource.setrlimit(resource.RLIMIT_AS, (address_space_bytes, address_space_bytes))
+    
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            break  # The parent went away
+        if task is None:
+            break
+        
+        file_path, file_type, parser_options = task
+        if resource is not None and cpu_seconds:
+            # RLIMIT_CPU counts the process's whole life, so each file gets the budget on top of what was used
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            soft = math.ceil(usage.ru_utime + usage.ru_stime) + cpu_seconds
+            resource.setrlimit(resource.RLIMIT_CPU, (soft, resource.getrlimit(resource.RLIMIT_CPU)[1]))
+        
+        try:
+            conn.send(('ok', target(file_path, file_type, parser_options)))
+        except MemoryError:
+            # Exit so the pool replaces this worker rather than reusing a fragmented heap
+            conn.send(('memory', None))
+            break
+        except BaseException as e:
+            conn.send(('error', f'Parser crashed: {e.__class__.__name__}: {e}'))
+    conn.close()
+
+class _Worker:
+    """A pool process and the parent's end of its pipe"""
+    
+    def __init__(self, target: Callable, cpu_seconds: int, address_space_bytes: int):
+        self.conn, child_conn = multiprocessing.Pipe()
+        # Not daemonic: Celery's prefork workers are daemons, and daemons may not start daemonic children
+        self.process = multiprocessing.Process(
+            target=_worker_main,
+            args=(child_conn, target, cpu_seconds, address_space_bytes),
+            daemon=False
+        )
+        self.process.start()
+        child_conn.close()
+        self.tasks = 0
+    
+    def alive(self) -> bool:
+        return self.process.is_alive()
+    
+    def kill(self):
+        """Forcefully stop the process"""
+        self.process.kill()
+        self.process.join(timeout=1)
+        self.conn.close()
+    
+    def stop(self):
+        """Ask the process to exit, killing it if it does not"""
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(timeout=1)
+        self.conn.close()
+
+class ParserPool:
+    """Runs file parsing in a pool of isolated, resource-limited worker processes.
+    
+    Up to PARSER_MAX_WORKERS processes are started on demand and reused, so
+    a parse does not pay for a new process. Each worker caps its address
+    space with RLIMIT_AS and gives every file a fresh RLIMIT_CPU budget; the
+    parent also watches wall time and resident memory. A worker that blows
+    a limit is killed and replaced, and one that has parsed
+    PARSER_MAX_TASKS_PER_WORKER files is recycled. Extra uploads wait for a
+    free worker instead of piling up processes.
+    """
+    
+    def __init__(self, target: Callable = parse_file):
+        self.target = target
+        self._idle: List[_Worker] = []
+        self._size = 0
+        self._cond = threading.Condition()
+        atexit.register(self.shutdown)
+    
+    def _acquire(self, config) -> Optional[_Worker]:
+        """An idle worker, a new one if the pool is not full, or None after the queue timeout"""
+        deadline = time.monotonic() + config['PARSER_QUEUE_TIMEOUT']
+        with self._cond:
+            while True:
+                while self._idle:
+                    worker = self._idle.pop()
+                    if worker.alive():
+                        return worker
+                    self._size -= 1
+                    worker.conn.close()
+                if self._size < config['PARSER_MAX_WORKERS']:
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._cond.wait(remaining):
+                    return None
+        
+        try:
+            return _Worker(
+                self.target,
+                cpu_seconds=config['PARSER_CPU_SECONDS'],
+                address_space_bytes=config['PARSER_MAX_ADDRESS_SPACE_MB'] * 1024 * 1024
+            )
+        except BaseException:
+            self._discard()
+            raise
+    
+    def _release(self, worker: _Worker, max_tasks: int):
+        """Return a healthy worker to the pool, or retire it"""
+        worker.tasks += 1
+        if worker.alive() and (not max_tasks or worker.tasks < max_tasks):
+            with self._cond:
+                self._idle.append(worker)
+                self._cond.notify()
+        else:
+            worker.stop()
+            self._discard()
+    
+    def _discard(self):
+        """Free a worker's slot"""
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+    
+    def parse(self, file_path: str, file_type: str) -> Dict[str, Any]:
+        """Parse a file in a sandboxed worker; failures come back with an 'error' key"""
+        config = current_app.config
+        worker = self._acquire(config)
+        if worker is None:
+            return self._failure('Parser queue is full, please retry later')
+        
+        result, healthy = self._run(
+            worker,
+            file_path,
+            file_type,
+            cpu_seconds=config['PARSER_CPU_SECONDS'],
+            wall_seconds=config['PARSER_WALL_SECONDS'],
+            max_rss_bytes=config['PARSER_MAX_RSS_MB'] * 1024 * 1024,
+            address_space_bytes=config['PARSER_MAX_ADDRESS_SPACE_MB'] * 1024 * 1024,
+            parser_options={'pdf_backend': config['PDF_BACKEND']},
+        )
+        if healthy:
+            self._release(worker, config['PARSER_MAX_TASKS_PER_WORKER'])
+        else:
+            worker.kill()
+            self._discard()
+        return result
+    
+    def _run(self, worker: _Worker, file_path: str, file_type: str, cpu_seconds: int, wall_seconds: int,
+             max_rss_bytes: int, address_space_bytes: int, parser_options: Dict[str, Any]):
+        """Hand one file to a worker and watch its wall time and memory until it reports back.
+        
+        Returns the result and whether the worker can be reused.
+        """
+        try:
+            worker.conn.send((file_path, file_type, parser_options))
+        except (OSError, ValueError):
+            return self._failure('Parser worker is not running'), False
+        
+        deadline = time.monotonic() + wall_seconds
+        while True:
+            if worker.conn.poll(POLL_INTERVAL):
+                try:
+                    status, value = worker.conn.recv()
+                except (EOFError, OSError):
+                    break  # Worker died before sending anything
+                if status == 'ok':
+                    return value, True
+                if status == 'memory':
+                    return self._failure(self._memory_message(address_space_bytes)), False
+                return self._failure(value), True
+            
+            if not worker.alive():
+                break
+            
+            if time.monotonic() > deadline:
+                return self._failure(f'Parsing exceeded the {wall_seconds}s time limit'), False
+            
+            rss = self._rss_bytes(worker.process.pid)
+            if max_rss_bytes and rss is not None and rss > max_rss_bytes:
+                return self._failure(self._memory_message(max_rss_bytes)), False
+        
+        worker.process.join(timeout=1)
+        return self._failure(self._exit_reason(worker.process.exitcode, cpu_seconds)), False
+    
+    def shutdown(self):
+        """Stop the idle workers"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for worker in idle:
+            worker.stop()
+    
+    def _memory_message(self, limit_bytes: int) -> str:
+        return f'Parsing exceeded the {limit_bytes // (1024 * 1024)}MB memory limit'
+    
+    def _rss_bytes(self, pid: int) -> Optional[int]:
+        """Resident set size of a process, or None where /proc is unavailable"""
+        try:
+            with open(f'/proc/{pid}/statm') as statm:
+                return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError, IndexError):
+            return None
+    
+    def _exit_reason(self, exitcode: Optional[int], cpu_seconds: int) -> str:
+        """Describe why a worker exited on its own without a result.
+        
+        The parent's wall-time and memory kills are reported where they are
+        made, so only the worker's own RLIMIT_CPU signal means a CPU overrun.
+        """
+        if exitcode is not None and exitcode < 0:
+            if -exitcode == getattr(signal, 'SIGXCPU', None):
+                return f'Parsing exceeded the {cpu_seconds}s CPU time limit'
+            if -exitcode == getattr(signal, 'SIGKILL', None):
+                # Not sent by the pool: usually the kernel's out-of-memory killer
+                return 'Parser was killed (SIGKILL), most likely for running out of memory'
+            return f'Parser was killed by signal {-exitcode}'
+        return f'Parser exited unexpectedly (exit code {exitcode})'
+    
+    def _failure(self, reason: str) -> Dict[str, Any]:
+        """Build a parse result describing a failure"""
+        return {
+            'error': reason,
+            'questions': [],
+            'concepts': [],
+            'total_questions': 0,
+            'total_concepts': 0
+        }
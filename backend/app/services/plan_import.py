@@ -0,0 +1,276 @@
+import csv
+import io
+import json
+import time
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+from .. import db
+from ..models import User, Plan, Task, PlanTopic
+from ..models.stats import StatsDeltas
+
+TASK_STATUSES = ('pending', 'completed', 'skipped')
+MAX_REPORTED_ERRORS = 20
+
+class PlanImportError(ValueError):
+    """Raised when an import file is malformed; carries every problem found"""
+    
+    def __init__(self, errors: List[str]):
+        self.errors = errors[:MAX_REPORTED_ERRORS]
+        more = len(errors) - len(self.errors)
+        message = '; '.join(self.errors) + (f' (and {more} more)' if more > 0 else '')
+        super().__init__(message)
+
+class PlanImporter:
+    """Bulk-loads study plans from JSON or CSV without going through the LLM.
+    
+    The whole file is parsed and validated first, then plans, topics and tasks
+    are written with set-based executemany inserts, committing every
+    `chunk_size` task rows so a large cohort import never holds one huge
+    transaction open.
+    
+    JSON: a list of plans (or {"plans": [...]}), each with title, topics,
+    optional start_date/target_date/user_email, and either "tasks" (date,
+    title, description, status) or the "daily_tasks" shape the AI planner
+    produces. CSV: one row per task with the columns plan_title, topics
+    (separated by ';'), date, title and optionally description, status,
+    start_date, target_date and user_email.
+    """
+    
+    def __init__(self, chunk_size: int = 5000):
+        self.chunk_size = max(1, chunk_size)
+    
+    def parse(self, content: str, file_format: str) -> List[Dict[str, Any]]:
+        """Parse and validate an import file into plan dictionaries"""
+        if file_format == 'json':
+            raw_plans = self._read_json(content)
+        elif file_format == 'csv':
+            raw_plans = self._read_csv(content)
+        else:
+            raise PlanImportError([f"Unsupported import format '{file_format}'. Use json or csv."])
+        
+        errors = []
+        plans = [self._validate_plan(raw, index, errors) for index, raw in enumerate(raw_plans, 1)]
+        if not plans:
+            errors.append('The file contains no plans')
+        if errors:
+            raise PlanImportError(errors)
+        return plans
+    
+    def _read_json(self, content: str) -> List[Dict[str, Any]]:
+        """Plans from a JSON document"""
+        try:
+            data = json.loads(content)
+        except ValueError as e:
+            raise PlanImportError([f'Invalid JSON: {e}'])
+        
+        if isinstance(data, dict):
+            data = data.get('plans')
+        if not isinstance(data, list) or not all(isinstance(plan, dict) for plan in data):
+            raise PlanImportError(['JSON must be a list of plans or an object with a "plans" list'])
+        
+        for plan in data:
+            if 'tasks' not in plan and isinstance(plan.get('daily_tasks'), list):
+                plan['tasks'] = [
+                    dict(task, date=day.get('date'))
+                    for day in plan['daily_tasks'] if isinstance(day, dict)
+                    for task in day.get('tasks', []) if isinstance(task, dict)
+                ]
+        return data
+    
+    def _read_csv(self, content: str) -> List[Dict[str, Any]]:
+        """Plans from task rows, grouped by (user_email, plan_title) in file order"""
+        reader = csv.DictReader(io.StringIO(content))
+        missing = {'plan_title', 'topics', 'date', 'title'} - set(reader.fieldnames or [])
+        if missing:
+            raise PlanImportError([f"CSV is missing column(s): {', '.join(sorted(missing))}"])
+        
+        plans = {}
+        for row in reader:
+            key = ((row.get('user_email') or '').strip(), (row['plan_title'] or '').strip())
+            plan = plans.get(key)
+            if plan is None:
+                plan = plans[key] = {
+                    'title': row['plan_title'],
+                    'topics': (row['topics'] or '').split(';'),
+                    'start_date': row.get('start_date') or None,
+                    'target_date': row.get('target_date') or None,
+                    'user_email': key[0] or None,
+                    'tasks': []
+                }
+            plan['tasks'].append({
+                'date': row['date'],
+                'title': row['title'],
+                'description': row.get('description') or '',
+                'status': row.get('status') or 'pending'
+            })
+        return list(plans.values())
+    
+    def _parse_date(self, value, label: str, errors: List[str]):
+        """Date from YYYY-MM-DD, recording an error when it does not parse"""
+        try:
+            return datetime.strptime(str(value).strip(), '%Y-%m-%d').date()
+        except (TypeError, ValueError):
+            errors.append(f'{label}: invalid date {value!r}, use YYYY-MM-DD')
+            return None
+    
+    def _validate_plan(self, raw: Dict[str, Any], index: int, errors: List[str]) -> Dict[str, Any]:
+        """Normalize one plan, appending any problems to `errors`"""
+        label = f'Plan {index}'
+        title = str(raw.get('title') or '').strip()
+        if not title or len(title) > 200:
+            errors.append(f'{label}: title is required and must be at most 200 characters')
+        
+        topics = raw.get('topics')
+        topics = PlanTopic.normalize(topics) if isinstance(topics, list) else []
+        if not topics:
+            errors.append(f'{label}: topics must be a non-empty list')
+        
+        tasks = []
+        for task_index, task in enumerate(raw.get('tasks') or [], 1):
+            task_label = f'{label}, task {task_index}'
+            if not isinstance(task, dict):
+                errors.append(f'{task_label}: must be an object')
+                continue
+            task_title = str(task.get('title') or '').strip()
+            if not task_title or len(task_title) > 200:
+                errors.append(f'{task_label}: title is required and must be at most 200 characters')
+            status = task.get('status') or 'pending'
+            if status not in TASK_STATUSES:
+                errors.append(f"{task_label}: status must be one of {', '.join(TASK_STATUSES)}")
+            tasks.append({
+                'date': self._parse_date(task.get('date'), task_label, errors),
+                'title': task_title,
+                'description': task.get('description') or '',
+                'status': status
+            })
+        
+        # Missing plan dates default to the span of the plan's tasks
+        task_dates = [task['date'] for task in tasks if task['date']]
+        if raw.get('start_date'):
+            start_date = self._parse_date(raw['start_date'], label, errors)
+        else:
+            start_date = min(task_dates, default=None)
+            if start_date is None:
+                errors.append(f'{label}: start_date is required when the plan has no tasks')
+        if raw.get('target_date'):
+            target_date = self._parse_date(raw['target_date'], label, errors)
+        else:
+            target_date = max(task_dates, default=None)
+        if start_date and target_date and target_date < start_date:
+            errors.append(f'{label}: target_date is before start_date')
+        
+        # Keep the planner's per-day ordering: order_index counts up within each date
+        per_day = {}
+        for task in tasks:
+            task['order_index'] = per_day.get(task['date'], 0)
+            per_day[task['date']] = task['order_index'] + 1
+        
+        return {
+            'title': title,
+            'topics': topics,
+            'start_date': start_date,
+            'target_date': target_date or start_date,
+            'user_email': (raw.get('user_email') or '').strip().lower() or None,
+            'tasks': tasks
+        }
+    
+    def resolve_users(self, plans: List[Dict[str, Any]], default_user_id: Optional[int] = None) -> None:
+        """Set user_id on every plan from its user_email, or the default user"""
+        emails = {plan['user_email'] for plan in plans if plan['user_email']}
+        user_ids = dict(
+            db.session.query(User.email, User.id).filter(User.email.in_(emails)).all()
+        ) if emails else {}
+        
+        errors = []
+        for index, plan in enumerate(plans, 1):
+            if plan['user_email']:
+                plan['user_id'] = user_ids.get(plan['user_email'])
+                if plan['user_id'] is None:
+                    errors.append(f"Plan {index}: unknown user {plan['user_email']}")
+            elif default_user_id is not None:
+                plan['user_id'] = int(default_user_id)
+            else:
+                errors.append(f'Plan {index}: user_email is required')
+        if errors:
+            raise PlanImportError(errors)
+    
+    def _chunks(self, plans: List[Dict[str, Any]]):
+        """Group whole plans into batches of roughly chunk_size task rows"""
+        chunk, rows = [], 0
+        for plan in plans:
+            chunk.append(plan)
+            rows += len(plan['tasks']) + 1
+            if rows >= self.chunk_size:
+                yield chunk
+                chunk, rows = [], 0
+        if chunk:
+            yield chunk
+    
+    def _insert_chunk(self, plans: List[Dict[str, Any]]) -> int:
+        """Insert one batch of plans with their topics and tasks; returns rows written"""
+        plan_ids = db.session.execute(
+            db.insert(Plan).returning(Plan.id, sort_by_parameter_order=True),
+            [
+                {
+                    'user_id': plan['user_id'],
+                    'title': plan['title'],
+                    'topics': json.dumps(plan['topics']),
+                    'start_date': plan['start_date'],
+                    'target_date': plan['target_date'],
+                    'json_blob': json.dumps({'title': plan['title'], 'source': 'import'})
+                }
+                for plan in plans
+            ]
+        ).scalars().all()
+        
+        topic_rows = [
+            {'plan_id': plan_id, 'user_id': plan['user_id'], 'topic': topic, 'position': position}
+            for plan_id, plan in zip(plan_ids, plans)
+            for position, topic in enumerate(plan['topics'])
+        ]
+        db.session.execute(db.insert(PlanTopic), topic_rows)
+        
+        task_rows = [
+            {
+                'plan_id': plan_id,
+                'date': task['date'],
+                'title': task['title'],
+                'description': task['description'],
+                'status': task['status'],
+                'order_index': task['order_index']
+            }
+            for plan_id, plan in zip(plan_ids, plans)
+            for task in plan['tasks']
+        ]
+        if task_rows:
+            db.session.execute(db.insert(Task), task_rows)
+        
+        # Core inserts bypass the ORM flush hooks, so fold the chunk into the rollups here
+        deltas = StatsDeltas()
+        for plan in plans:
+            for task in plan['tasks']:
+                deltas.add(plan['user_id'], plan['topics'], task['date'], task['status'])
+        deltas.apply(db.session.connection())
+        
+        db.session.commit()
+        return len(plan_ids) + len(topic_rows) + len(task_rows)
+    
+    def import_plans(self, plans: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Write validated plans in chunked transactions and report throughput"""
+        started = time.perf_counter()
+        rows = 0
+        chunks = 0
+        for chunk in self._chunks(plans):
+            rows += self._insert_chunk(chunk)
+            chunks += 1
+        seconds = time.perf_counter() - started
+        
+        return {
+            'plans': len(plans),
+            'tasks': sum(len(plan['tasks']) for plan in plans),
+            'rows': rows,
+            'chunks': chunks,
+            'seconds': round(seconds, 3),
+            'rows_per_second': round(rows / seconds) if seconds > 0 else None
+        }
@@ -0,0 +1,173 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from flask import current_app, jsonify, request
+
+try:
+    import redis
+except ImportError:  # Only needed for PROGRESS_CACHE_BACKEND=redis
+    redis = None
+
+# Cache outages degrade to uncached responses instead of failing the request
+CACHE_ERRORS = (redis.RedisError,) if redis else ()
+
+CachedPayload = namedtuple('CachedPayload', ['etag', 'body'])
+
+class ProgressCache:
+    """Per-user cache of serialized progress payloads (dashboard, analytics).
+
+    Payloads only change when the user's tasks, plans or uploads do, so the
+    routes that write those call `invalidate(user_id)` after committing, and
+    PROGRESS_CACHE_TTL bounds staleness from anything else (such as the date
+    window moving at midnight). Each user has a generation counter that
+    invalidation bumps; a payload built while an invalidation happened is not
+    stored, so a slow read can never cache data older than the write.
+
+    PROGRESS_CACHE_BACKEND picks where entries live: 'redis' (shared by every
+    worker, at REDIS_URL), 'off', or 'memory' (bounded to PROGRESS_CACHE_SIZE
+    users). Memory entries are only invalidated in the process that handled
+    the write, so that backend is for single-process deployments only.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()  # user id -> {variant: (expires_at, CachedPayload)}
+        self._generations = {}
+        self._lock = threading.Lock()
+        self._redis = None
+        self._redis_url = None
+        self.hits = 0
+        self.misses = 0
+
+    def _backend(self):
+        return current_app.config['PROGRESS_CACHE_BACKEND']
+
+    def _client(self):
+        """Redis client for REDIS_URL, created on first use"""
+        url = current_app.config['REDIS_URL']
+        if self._redis is None or self._redis_url != url:
+            if redis is None:
+                raise RuntimeError('PROGRESS_CACHE_BACKEND=redis requires the redis package')
+            self._redis = redis.Redis.from_url(url)
+            self._redis_url = url
+        return self._redis
+
+    @staticmethod
+    def _keys(user_id):
+        return f'progress:{user_id}', f'progress:{user_id}:generation'
+
+    def generation(self, user_id):
+        """Current invalidation generation of a user's entries"""
+        user_id = int(user_id)
+        if self._backend() == 'redis':
+            return self._client().get(self._keys(user_id)[1]) or b'0'
+        with self._lock:
+            return self._generations.get(user_id, 0)
+
+    def get(self, user_id, variant):
+        """Cached payload for a user, or None on a miss"""
+        user_id = int(user_id)
+        backend = self._backend()
+        payload = None
+        if backend == 'redis':
+            stored = self._client().hget(self._keys(user_id)[0], variant)
+            if stored:
+                etag, body = stored.split(b' ', 1)
+                payload = CachedPayload(etag.decode(), body)
+        elif backend == 'memory':
+            with self._lock:
+                entry = self._entries.get(user_id, {}).get(variant)
+                if entry and entry[0] > time.monotonic():
+                    self._entries.move_to_end(user_id)
+                    payload = entry[1]
+
+        if payload is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return payload
+
+    def set(self, user_id, variant, payload, generation):
+        """Store a payload built at `generation`, unless the user was invalidated meanwhile"""
+        user_id = int(user_id)
+        backend = self._backend()
+        ttl = current_app.config['PROGRESS_CACHE_TTL']
+
+        if backend == 'redis':
+            entries_key, generation_key = self._keys(user_id)
+            with self._client().pipeline() as pipe:
+                try:
+                    pipe.watch(generation_key)
+                    if (pipe.get(generation_key) or b'0') == generation:
+                        pipe.multi()
+                        pipe.hset(entries_key, variant, payload.etag.encode() + b' ' + payload.body)
+                        pipe.expire(entries_key, ttl)
+                        pipe.execute()
+                except redis.WatchError:
+                    pass  # Invalidated while building; served once without caching
+        elif backend == 'memory':
+            max_users = current_app.config['PROGRESS_CACHE_SIZE']
+            with self._lock:
+                if self._generations.get(user_id, 0) == generation:
+                    self._entries.setdefault(user_id, {})[variant] = (time.monotonic() + ttl, payload)
+                    self._entries.move_to_end(user_id)
+                    while len(self._entries) > max_users:
+                        self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        """Drop every cached payload of a user"""
+        user_id = int(user_id)
+        backend = self._backend()
+        if backend == 'redis':
+            entries_key, generation_key = self._keys(user_id)
+            try:
+                with self._client().pipeline() as pipe:
+                    pipe.incr(generation_key)
+                    pipe.expire(generation_key, current_app.config['PROGRESS_CACHE_TTL'])
+                    pipe.delete(entries_key)
+                    pipe.execute()
+            except CACHE_ERRORS as e:
+                # The write is already committed; the stale entries expire after PROGRESS_CACHE_TTL
+                current_app.logger.error('Progress cache invalidation failed for user %s: %s', user_id, e)
+        elif backend == 'memory':
+            with self._lock:
+                self._entries.pop(user_id, None)
+                self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def response(self, user_id, variant, build):
+        """JSON response for `build()`, served from the cache with an ETag.
+
+        Clients that send the current ETag in If-None-Match get an empty 304.
+        """
+        try:
+            payload = self.get(user_id, variant)
+            generation = self.generation(user_id) if payload is None else None
+        except CACHE_ERRORS as e:
+            current_app.logger.warning('Progress cache unavailable: %s', e)
+            payload, generation = None, None
+
+        if payload is None:
+            body = jsonify(build()).get_data()
+            payload = CachedPayload(hashlib.blake2b(body, digest_size=16).hexdigest(), body)
+            if generation is not None:
+                try:
+                    self.set(user_id, variant, payload, generation)
+                except CACHE_ERRORS as e:
+                    current_app.logger.warning('Progress cache unavailable: %s', e)
+
+        response = current_app.response_class(payload.body, mimetype='application/json')
+        response.set_etag(payload.etag)
+        # Browsers keep the body but must revalidate it on every load
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+
+    def clear(self):
+        """Drop every in-process entry"""
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+            self.hits = 0
+            self.misses = 0
+
+progress_cache = ProgressCache()
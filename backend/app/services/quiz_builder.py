@@ -0,0 +1,256 @@
+import heapq
+import random
+import threading
+import time
+from datetime import datetime
+from flask import current_app
+from typing import Dict, List, Any, Optional
+
+from .. import db
+from ..models import Question
+
+try:
+    import redis
+except ImportError:  # Only needed for QUIZ_INDEX_SYNC=redis
+    redis = None
+
+# Generation lookups that fail rebuild the index instead of failing the quiz
+GENERATION_ERRORS = (redis.RedisError,) if redis else ()
+
+# Sampling weights: unseen questions first, then ones answered wrong, and
+# anything seen within the cool-down window is pushed to the back.
+UNSEEN_WEIGHT = 3.0
+WRONG_ANSWER_BOOST = 2.0
+RECENCY_COOLDOWN_HOURS = 72
+MIN_WEIGHT = 0.05
+
+class QuizBuilder:
+    """Assembles quizzes locally from a user's extracted exam questions.
+    
+    Each user's question pool is kept in a small in-memory index (id, text and
+    review stats only) so sampling never touches the answers or upload blobs.
+    The index is rebuilt after QUIZ_INDEX_TTL seconds or when invalidated.
+    
+    Indexes live in each worker process, but they are keyed on a per-user
+    generation counter that `invalidate` bumps. With QUIZ_INDEX_SYNC=redis
+    the counter is kept at REDIS_URL, so a write handled by one worker
+    makes every worker rebuild; 'memory' keeps it per process, which only
+    suits single-process deployments.
+    """
+    
+    def __init__(self):
+        self._indexes = {}
+        self._generations = {}
+        self._lock = threading.Lock()
+        self._redis = None
+        self._redis_url = None
+    
+    def _shared(self) -> bool:
+        return current_app.config['QUIZ_INDEX_SYNC'] == 'redis'
+    
+    def _client(self):
+        """Redis client for REDIS_URL, created on first use"""
+        url = current_app.config['REDIS_URL']
+        if self._redis is None or self._redis_url != url:
+            if redis is None:
+                raise RuntimeError('QUIZ_INDEX_SYNC=redis requires the redis package')
+            self._redis = redis.Redis.from_url(url)
+            self._redis_url = url
+        return self._redis
+    
+    @staticmethod
+    def _generation_key(user_id) -> str:
+        return f'quiz:{user_id}:generation'
+    
+    def generation(self, user_id):
+        """Current invalidation generation of a user's questions"""
+        user_id = int(user_id)
+        if self._shared():
+            return self._client().get(self._generation_key(user_id)) or b'0'
+        with self._lock:
+            return self._generations.get(user_id, 0)
+    
+    def invalidate(self, user_id):
+        """Make every worker rebuild a user's question index"""
+        user_id = int(user_id)
+        with self._lock:
+            self._indexes.pop(user_id, None)
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+        if self._shared():
+            try:
+                with self._client().pipeline() as pipe:
+                    pipe.incr(self._generation_key(user_id))
+                    # Indexes built before a lost counter are past their TTL anyway
+                    pipe.expire(self._generation_key(user_id), current_app.config['QUIZ_INDEX_TTL'])
+                    pipe.execute()
+            except GENERATION_ERRORS as e:
+                # The write is already committed; other workers catch up after QUIZ_INDEX_TTL
+                current_app.logger.error('Quiz index invalidation failed for user %s: %s', user_id, e)
+    
+    def clear(self):
+        """Drop every cached question index"""
+        with self._lock:
+            self._indexes.clear()
+            self._generations.clear()
+    
+    def _get_index(self, user_id) -> Dict[int, Dict[str, Any]]:
+        """Return the user's question index, rebuilding it when stale"""
+        user_id = int(user_id)
+        ttl = current_app.config['QUIZ_INDEX_TTL']
+        
+        try:
+            generation = self.generation(user_id)
+        except GENERATION_ERRORS as e:
+            current_app.logger.warning('Quiz index generation unavailable, rebuilding: %s', e)
+            generation = None
+        
+        with self._lock:
+            cached = self._indexes.get(user_id)
+            if (cached and generation is not None and cached['generation'] == generation
+                    and time.monotonic() - cached['built_at'] < ttl):
+                return cached['entries']
+        
+        rows = db.session.query(
+            Question.id,
+            Question.upload_id,
+            Question.text,
+            Question.times_seen,
+            Question.times_wrong,
+            Question.last_seen_at
+        ).filter(Question.user_id == user_id).all()
+        
+        entries = {
+            row.id: {
+                'upload_id': row.upload_id,
+                'text': row.text.lower(),
+                'times_seen': row.times_seen or 0,
+                'times_wrong': row.times_wrong or 0,
+                'last_seen_at': row.last_seen_at
+            }
+            for row in rows
+        }
+        
+        with self._lock:
+            self._indexes[user_id] = {'entries': entries, 'generation': generation, 'built_at': time.monotonic()}
+        return entries
+    
+    def _weight(self, entry: Dict[str, Any], now: datetime) -> float:
+        """Sampling weight for a question based on its review history"""
+        if not entry['times_seen']:
+            return UNSEEN_WEIGHT
+        
+        wrong_ratio = entry['times_wrong'] / entry['times_seen']
+        weight = 1 + WRONG_ANSWER_BOOST * wrong_ratio
+        
+        if entry['last_seen_at']:
+            hours_since = (now - entry['last_seen_at']).total_seconds() / 3600
+            weight *= min(1.0, max(hours_since, 0) / RECENCY_COOLDOWN_HOURS)
+        
+        return max(MIN_WEIGHT, weight)
+    
+    def pool_size(self, user_id, topic: Optional[str] = None, upload_ids: Optional[List[int]] = None) -> int:
+        """Number of questions available for a quiz"""
+        return len(self._candidates(user_id, topic, upload_ids))
+    
+    def _candidates(self, user_id, topic: Optional[str], upload_ids: Optional[List[int]]):
+        """Index entries matching the optional topic and upload filters"""
+        entries = self._get_index(user_id)
+        terms = [term for term in (topic or '').lower().split() if len(term) > 2]
+        upload_filter = set(upload_ids) if upload_ids else None
+        
+        return [
+            (question_id, entry)
+            for question_id, entry in entries.items()
+            if (upload_filter is None or entry['upload_id'] in upload_filter)
+            and all(term in entry['text'] for term in terms)
+        ]
+    
+    def build_quiz(self, user_id, num_questions: int, topic: Optional[str] = None,
+                   upload_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        """Sample a quiz from the user's questions, weighted toward unseen and missed ones"""
+        candidates = self._candidates(user_id, topic, upload_ids)
+        if not candidates:
+            return []
+        
+        now = datetime.utcnow()
+        # Weighted sampling without replacement (Efraimidis-Spirakis keys)
+        chosen = heapq.nlargest(
+            num_questions,
+            candidates,
+            key=lambda candidate: random.random() ** (1.0 / self._weight(candidate[1], now))
+        )
+        chosen_ids = [question_id for question_id, _ in chosen]
+        
+        questions = Question.query.options(db.selectinload(Question.answers)).filter(
+            Question.id.in_(chosen_ids)
+        ).all()
+        by_id = {question.id: question for question in questions}
+        
+        self._mark_seen(user_id, chosen_ids, now)
+        
+        return [
+            {
+                'question_id': question.id,
+                'upload_id': question.upload_id,
+                'question': question.text,
+                'options': [answer.text for answer in question.answers],
+                'correct_answer': None,
+                'explanation': None
+            }
+            for question in (by_id.get(question_id) for question_id in chosen_ids)
+            if question is not None
+        ]
+    
+    def _mark_seen(self, user_id, question_ids: List[int], now: datetime):
+        """Record that questions were served, in the database and the index"""
+        Question.query.filter(
+            Question.user_id == user_id,
+            Question.id.in_(question_ids)
+        ).update({
+            Question.times_seen: Question.times_seen + 1,
+            Question.last_seen_at: now
+        }, synchronize_session=False)
+        db.session.commit()
+        
+        entries = self._get_index(user_id)
+        with self._lock:
+            for question_id in question_ids:
+                if question_id in entries:
+                    entries[question_id]['times_seen'] += 1
+                    entries[question_id]['last_seen_at'] = now
+    
+    def record_results(self, user_id, results: List[Dict[str, Any]]) -> int:
+        """Record which served questions were answered wrong; malformed entries raise ValueError"""
+        wrong_ids = set()
+        for position, result in enumerate(results):
+            if not isinstance(result, dict):
+                raise ValueError(f'Result {position} must be an object')
+            question_id = result.get('question_id')
+            if question_id is None:
+                continue
+            if isinstance(question_id, bool) or not isinstance(question_id, (int, str)) or not str(question_id).isdigit():
+                raise ValueError(f'Result {position} has an invalid question_id')
+            if not result.get('correct'):
+                wrong_ids.add(int(question_id))
+        wrong_ids = list(wrong_ids)
+        if not wrong_ids:
+            return 0
+        
+        updated = Question.query.filter(
+            Question.user_id == user_id,
+            Question.id.in_(wrong_ids)
+        ).update({
+            Question.times_wrong: Question.times_wrong + 1
+        }, synchronize_session=False)
+        db.session.commit()
+        
+        entries = self._get_index(user_id)
+        with self._lock:
+            for question_id in wrong_ids:
+                if question_id in entries:
+                    entries[question_id]['times_wrong'] += 1
+        
+        return updated
+
+# Shared so upload changes can invalidate the index used by the quiz endpoint
+quiz_builder = QuizBuilder()
@@ -0,0 +1,287 @@
+import threading
+from datetime import datetime
+from typing import Dict, List, Iterable, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import event
+
+from .. import db
+from ..models import Reminder
+from ..utils.db_routing import RoutingSession
+
+try:
+    import redis
+except ImportError:  # Only needed for REMINDER_INDEX_BACKEND=redis
+    redis = None
+
+# Index outages fall back to querying the reminders table
+INDEX_ERRORS = (redis.RedisError,) if redis else ()
+
+EPOCH = datetime(1970, 1, 1)
+
+DUE_KEY = 'reminders:due'
+
+# Atomically take up to ARGV[2] members scored <= ARGV[1] and re-score them to the lease end ARGV[3]
+POP_DUE_SCRIPT = """
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, id in ipairs(ids) do
+    redis.call('ZADD', KEYS[1], ARGV[3], id)
+end
+return ids
+"""
+
+# (reminder id, user id, next fire time or None when it should not fire again)
+IndexEntry = Tuple[int, int, Optional[datetime]]
+
+def _score(moment: datetime) -> float:
+    """Sorted set score of a naive UTC datetime"""
+    return (moment - EPOCH).total_seconds()
+
+def _user_key(user_id) -> str:
+    return f'reminders:user:{user_id}'
+
+class TimingWheel:
+    """Hashed timing wheel: the in-process stand-in for the Redis sorted set.
+    
+    Members hash into `slots` buckets of `tick` seconds by score. Popping
+    walks the buckets from the first undrained tick up to now, at most one
+    rotation, so a pop touches the buckets it passes and their members
+    rather than every scheduled member. Scheduling a member before the
+    cursor moves the cursor back to it.
+    """
+    
+    def __init__(self, tick: int = 60, slots: int = 1024):
+        self.tick = tick
+        self.slots = slots
+        self._buckets = [{} for _ in range(slots)]  # member -> score
+        self._bucket_of = {}
+        self._cursor = None  # First tick that may still hold due members
+    
+    def __len__(self):
+        return len(self._bucket_of)
+    
+    def add(self, member, score: float):
+        self.remove(member)
+        tick = int(score // self.tick)
+        if self._cursor is None or tick < self._cursor:
+            self._cursor = tick
+        self._buckets[tick % self.slots][member] = score
+        self._bucket_of[member] = tick % self.slots
+    
+    def remove(self, member):
+        slot = self._bucket_of.pop(member, None)
+        if slot is not None:
+            del self._buckets[slot][member]
+    
+    def pop_due(self, now: float, limit: int, lease: float) -> List:
+        """Up to `limit` members scored <= now, re-scored to `lease`"""
+        if self._cursor is None:
+            return []
+        now_tick = int(now // self.tick)
+        due = []
+        tick = self._cursor
+        while tick <= now_tick and tick < self._cursor + self.slots:
+            bucket = self._buckets[tick % self.slots]
+            for member, score in sorted(bucket.items(), key=lambda item: item[1]):
+                if score <= now:
+                    due.append(member)
+                    if len(due) == limit:
+                        break
+            if len(due) == limit:
+                break
+            tick += 1
+        else:
+            # Every bucket up to now was walked; nothing due is left behind
+            tick = now_tick
+        
+        # Leased members are re-added at their lease, ahead of the cursor
+        self._cursor = tick
+        for member in due:
+            self.add(member, lease)
+        return due
+
+class ReminderIndex:
+    """Scheduling index of active reminders, scored by next_fire_at.
+    
+    A global sorted set is the dispatch queue: `pop_due` takes the due
+    members in O(log n) each and re-scores them to a lease, so concurrent
+    dispatchers never pop the same reminder and one that crashes gives its
+    batch back when the lease ends. A sorted set per user answers "which
+    reminders are due" for the reminders endpoint without touching the
+    reminders table when nothing is due.
+    
+    The database stays the source of truth: the index only narrows lookups,
+    every popped id is re-checked against its row, and stale members are
+    re-synced from the row. ORM commits keep it current (see the session
+    hooks below); bulk writes call `apply`, and `rebuild` reloads it.
+    
+    REMINDER_INDEX_BACKEND picks where it lives: 'redis' (at REDIS_URL,
+    shared by every worker), 'memory' (a TimingWheel per process, for tests
+    and single-process setups) or 'off' (query the table as before).
+    """
+    
+    def __init__(self):
+        self._wheel = TimingWheel()
+        self._users: Dict[int, Dict[int, float]] = {}
+        self._lock = threading.Lock()
+        self._redis = None
+        self._redis_url = None
+        self._pop_script = None
+    
+    def _backend(self):
+        return current_app.config['REMINDER_INDEX_BACKEND']
+    
+    def enabled(self) -> bool:
+        return self._backend() in ('redis', 'memory')
+    
+    def _client(self):
+        """Redis client for REDIS_URL, created on first use"""
+        url = current_app.config['REDIS_URL']
+        if self._redis is None or self._redis_url != url:
+            if redis is None:
+                raise RuntimeError('REMINDER_INDEX_BACKEND=redis requires the redis package')
+            self._redis = redis.Redis.from_url(url)
+            self._redis_url = url
+            self._pop_script = self._redis.register_script(POP_DUE_SCRIPT)
+        return self._redis
+    
+    def apply(self, entries: Iterable[IndexEntry]) -> None:
+        """Schedule reminders at their fire time, or drop those with none"""
+        entries = list(entries)
+        backend = self._backend()
+        if not entries or backend not in ('redis', 'memory'):
+            return
+        
+        if backend == 'redis':
+            with self._client().pipeline(transaction=False) as pipe:
+                for reminder_id, user_id, fire_at in entries:
+                    if fire_at is None:
+                        pipe.zrem(DUE_KEY, reminder_id)
+                        pipe.zrem(_user_key(user_id), reminder_id)
+                    else:
+                        pipe.zadd(DUE_KEY, {reminder_id: _score(fire_at)})
+                        pipe.zadd(_user_key(user_id), {reminder_id: _score(fire_at)})
+                pipe.execute()
+            return
+        
+        with self._lock:
+            for reminder_id, user_id, fire_at in entries:
+                user = self._users.setdefault(int(user_id), {})
+                if fire_at is None:
+                    self._wheel.remove(reminder_id)
+                    user.pop(reminder_id, None)
+                else:
+                    self._wheel.add(reminder_id, _score(fire_at))
+                    user[reminder_id] = _score(fire_at)
+    
+    def pop_due(self, now: datetime, limit: int, lease_until: datetime) -> List[int]:
+        """Take up to `limit` due reminder ids for this dispatcher until `lease_until`"""
+        if self._backend() == 'redis':
+            self._client()
+            ids = self._pop_script(keys=[DUE_KEY], args=[_score(now), limit, _score(lease_until)])
+            return [int(reminder_id) for reminder_id in ids]
+        with self._lock:
+            return self._wheel.pop_due(_score(now), limit, _score(lease_until))
+    
+    def due_for_user(self, user_id, now: datetime) -> List[int]:
+        """Ids of a user's reminders scored at or before `now`, soonest first"""
+        if self._backend() == 'redis':
+            return [int(reminder_id) for reminder_id in self._client().zrangebyscore(_user_key(user_id), '-inf', _score(now))]
+        with self._lock:
+            scores = self._users.get(int(user_id), {})
+            return sorted((reminder_id for reminder_id, score in scores.items() if score <= _score(now)), key=scores.get)
+    
+    def sync(self, reminder_ids: Iterable[int]) -> None:
+        """Re-index reminders from their rows; ids without a row are dropped"""
+        reminder_ids = set(reminder_ids)
+        rows = db.session.query(Reminder.id, Reminder.user_id, Reminder.next_fire_at, Reminder.is_active).filter(
+            Reminder.id.in_(reminder_ids)
+        ).all() if reminder_ids else []
+        entries = [(row.id, row.user_id, row.next_fire_at if row.is_active else None) for row in rows]
+        if self._backend() == 'redis':
+            # The user of a missing row is unknown; its per-user member only ever narrows a DB query
+            missing = reminder_ids - {row.id for row in rows}
+            if missing:
+                self._client().zrem(DUE_KEY, *missing)
+        else:
+            with self._lock:
+                for reminder_id in reminder_ids - {row.id for row in rows}:
+                    self._wheel.remove(reminder_id)
+                    for user in self._users.values():
+                        user.pop(reminder_id, None)
+        self.apply(entries)
+    
+    def rebuild(self, user_ids=None, batch_size: int = 1000) -> int:
+        """Load active reminders from the database, replacing the whole index unless limited to some users"""
+        if user_ids is None:
+            self.reset()
+        query = db.select(Reminder.id, Reminder.user_id, Reminder.next_fire_at).where(Reminder.is_active == True)
+        if user_ids is not None:
+            query = query.where(Reminder.user_id.in_(list(user_ids)))
+        
+        indexed = 0
+        result = db.session.execute(query.order_by(Reminder.id), execution_options={'yield_per': batch_size})
+        for partition in result.partitions():
+            self.apply((row.id, row.user_id, row.next_fire_at) for row in partition)
+            indexed += len(partition)
+        return indexed
+    
+    def reset(self):
+        """Empty the index in the configured backend"""
+        if self._backend() == 'redis':
+            client = self._client()
+            keys = [DUE_KEY, *client.scan_iter(match=_user_key('*'))]
+            client.delete(*keys)
+        self.clear()
+    
+    def clear(self):
+        """Drop every in-process entry"""
+        with self._lock:
+            self._wheel = TimingWheel()
+            self._users.clear()
+
+reminder_index = ReminderIndex()
+
+def insert_reminders(rows: List[dict]) -> int:
+    """Bulk-insert reminder rows in one transaction and index them, which the session hooks cannot see"""
+    if not reminder_index.enabled():
+        db.session.execute(db.insert(Reminder), rows)
+        db.session.commit()
+        return len(rows)
+    
+    ids = db.session.execute(
+        db.insert(Reminder).returning(Reminder.id, sort_by_parameter_order=True), rows
+    ).scalars().all()
+    db.session.commit()
+    try:
+        reminder_index.apply((reminder_id, row['user_id'], row['next_fire_at']) for reminder_id, row in zip(ids, rows))
+    except INDEX_ERRORS as e:
+        current_app.logger.error('Reminder index update failed: %s', e)
+    return len(rows)
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _collect_reminder_changes(session, flush_context):
+    """Remember which reminders a flush scheduled, rescheduled or removed"""
+    changes = None
+    for reminder in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(reminder, Reminder):
+            if changes is None:
+                changes = session.info.setdefault('reminder_index', {})
+            fire_at = reminder.next_fire_at if reminder.is_active and reminder not in session.deleted else None
+            changes[reminder.id] = (reminder.id, reminder.user_id, fire_at)
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _index_reminder_changes(session):
+    """Apply the committed reminder changes to the index"""
+    changes = session.info.pop('reminder_index', None)
+    if not changes:
+        return
+    try:
+        reminder_index.apply(changes.values())
+    except INDEX_ERRORS as e:
+        # The database already has the change; drains sweep the table for what the index missed
+        current_app.logger.error('Reminder index update failed: %s', e)
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _forget_reminder_changes(session):
+    session.info.pop('reminder_index', None)
@@ -0,0 +1,138 @@
+import smtplib
+import time
+from collections import deque
+from typing import Dict, List, Any
+
+from flask import current_app
+from flask_mail import Message, BadHeaderError
+
+from .. import mail
+from ..models import User, Reminder
+
+MAX_REPORTED_ERRORS = 20
+
+# Failures of a single message; the SMTP session stays usable for the next one
+MESSAGE_ERRORS = (
+    smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError, BadHeaderError, AssertionError
+)
+
+def is_permanent(error: Exception) -> bool:
+    """Whether resending the same message cannot succeed: bad headers or a 5xx reply"""
+    if isinstance(error, (BadHeaderError, AssertionError)):
+        return True  # Flask-Mail rejects the message before it is sent
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500
+    return False
+
+# Failures of the SMTP session itself (refused connection, TLS or login failure, dropped link)
+CONNECTION_ERRORS = (smtplib.SMTPException, OSError)
+
+def reminder_message(user: User, reminder: Reminder) -> Message:
+    """Reminder email for a user"""
+    return Message(
+        subject=f"Study Reminder: {reminder.title}",
+        recipients=[user.email],
+        body=f"""
+        Hi {user.email},
+        
+        This is a reminder for your study session:
+        
+        {reminder.title}
+        {reminder.content}
+        
+        Keep up the great work!
+        
+        Best regards,
+        Your Personal Learning Assistant
+        """
+    )
+
+class ReminderMailer:
+    """Sends reminder emails in batches over persistent SMTP sessions.
+    
+    Recipients are loaded in one query for all reminders, then each batch of
+    up to `batch_size` messages goes over one `mail.connect()` session, so
+    the connection and TLS handshake are paid per batch instead of per
+    message. A message the server rejects is recorded and the session moves
+    on to the next one; if the session itself drops, the message in flight
+    fails and the rest of the batch continues on a new connection.
+    
+    Failures are reported in two lists: `rejected_ids` can never be
+    delivered as they are (5xx replies, bad headers, deleted users), while
+    `failed_ids` may succeed when retried.
+    """
+    
+    def __init__(self, batch_size: int = 100):
+        self.batch_size = max(1, batch_size)
+    
+    @classmethod
+    def from_config(cls, config, **overrides):
+        """Mailer configured from the REMINDER_EMAIL_* app settings"""
+        options = {'batch_size': config['REMINDER_EMAIL_BATCH_SIZE']}
+        options.update({key: value for key, value in overrides.items() if value is not None})
+        return cls(**options)
+    
+    def _send_batch(self, pending: deque, report: Dict[str, Any], errors: List[str]) -> None:
+        """Send (reminder, message) pairs, reconnecting after a dropped session"""
+        def fail(reminder, error):
+            report['rejected_ids' if is_permanent(error) else 'failed_ids'].append(reminder.id)
+            errors.append(f'Reminder {reminder.id}: {error}')
+        
+        while pending:
+            handled = 0
+            try:
+                with mail.connect() as connection:
+                    report['connections'] += 1
+                    while pending:
+                        reminder, message = pending[0]
+                        try:
+                            connection.send(message)
+                            report['sent'] += 1
+                        except MESSAGE_ERRORS as e:
+                            fail(reminder, e)
+                        pending.popleft()
+                        handled += 1
+            except CONNECTION_ERRORS as e:
+                if not handled:
+                    # The server cannot be reached; do not try once per remaining message
+                    while pending:
+                        fail(pending.popleft()[0], e)
+                elif pending:
+                    fail(pending.popleft()[0], e)
+    
+    def send(self, reminders: List[Reminder]) -> Dict[str, Any]:
+        """Email each reminder to its user and report throughput and failures"""
+        started = time.perf_counter()
+        report = {'sent': 0, 'failed_ids': [], 'rejected_ids': [], 'batches': 0, 'connections': 0}
+        errors = []
+        
+        user_ids = {reminder.user_id for reminder in reminders}
+        users = {user.id: user for user in User.query.filter(User.id.in_(user_ids))} if user_ids else {}
+        messages = deque()
+        for reminder in reminders:
+            user = users.get(reminder.user_id)
+            if user is None:
+                report['rejected_ids'].append(reminder.id)
+                errors.append(f'Reminder {reminder.id}: user {reminder.user_id} not found')
+            else:
+                messages.append((reminder, reminder_message(user, reminder)))
+        
+        while messages:
+            batch = deque(messages.popleft() for _ in range(min(self.batch_size, len(messages))))
+            self._send_batch(batch, report, errors)
+            report['batches'] += 1
+        
+        if errors:
+            current_app.logger.warning('%d reminder email(s) failed: %s', len(errors), '; '.join(errors[:MAX_REPORTED_ERRORS]))
+        
+        seconds = time.perf_counter() - started
+        report.update({
+            'failed': len(report['failed_ids']),
+            'rejected': len(report['rejected_ids']),
+            'errors': errors[:MAX_REPORTED_ERRORS],
+            'seconds': round(seconds, 3),
+            'messages_per_second': round(report['sent'] / seconds) if seconds > 0 and report['sent'] else 0
+        })
+        return report
@@ -0,0 +1,213 @@
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional, Callable
+
+from flask import current_app
+
+from .. import db
+from ..models import Reminder
+from .reminder_index import reminder_index, INDEX_ERRORS
+
+# Dropped reminder ids named in one log line
+MAX_REPORTED_IDS = 20
+
+# Dialects that can lock rows with FOR UPDATE SKIP LOCKED
+SKIP_LOCKED_DIALECTS = ('postgresql', 'mysql', 'mariadb', 'oracle')
+
+class ReminderQueue:
+    """Drains due reminders in bounded batches that workers claim exclusively.
+    
+    On databases with row locks, each batch is selected FOR UPDATE SKIP
+    LOCKED, delivered and advanced in one short transaction: concurrent
+    workers skip the rows another worker holds instead of waiting for them
+    or processing them twice. SQLite has no row locks but serializes
+    writers, so there a batch is claimed by one UPDATE that leases the rows
+    (pushes next_fire_at `lease_seconds` ahead) and commits; rows of a
+    worker that dies before finishing come due again when the lease ends.
+    Either way a reminder is delivered by exactly one worker per firing, so
+    throughput grows with the number of workers draining the queue.
+    
+    With the reminder index enabled, workers pop due ids from the index
+    instead of scanning the table, and only load and verify those rows.
+    When the index has nothing due, one bounded table claim picks up any
+    due reminder the index lost, so the table stays the source of truth.
+    """
+    
+    def __init__(self, batch_size: int = 100, lease_seconds: int = 300, max_attempts: int = 5):
+        self.batch_size = max(1, batch_size)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max(1, max_attempts)
+    
+    @classmethod
+    def from_config(cls, config, **overrides):
+        """Queue configured from the REMINDER_* app settings"""
+        options = {
+            'batch_size': config['REMINDER_BATCH_SIZE'],
+            'lease_seconds': config['REMINDER_LEASE_SECONDS'],
+            'max_attempts': config['REMINDER_MAX_ATTEMPTS'],
+        }
+        options.update({key: value for key, value in overrides.items() if value is not None})
+        return cls(**options)
+    
+    @staticmethod
+    def _due(now: datetime):
+        return (Reminder.is_active == True, Reminder.next_fire_at <= now)
+    
+    def locked_claim_query(self, now: datetime):
+        """Next batch of due reminders, skipping rows other workers have locked"""
+        return db.select(Reminder).where(*self._due(now)).order_by(
+            Reminder.next_fire_at, Reminder.id
+        ).limit(self.batch_size).with_for_update(skip_locked=True)
+    
+    def _claim_leased(self, now: datetime, candidates=None) -> List[Reminder]:
+        """Claim a batch with one atomic UPDATE and commit the lease.
+        
+        `candidates` are the ids to claim from when they are already known,
+        otherwise the next batch of due rows is selected.
+        """
+        if candidates is None:
+            candidates = db.select(Reminder.id).where(*self._due(now)).order_by(
+                Reminder.next_fire_at, Reminder.id
+            ).limit(self.batch_size).scalar_subquery()
+        claimed = db.session.execute(
+            db.update(Reminder)
+            .where(Reminder.id.in_(candidates), *self._due(now))
+            .values(next_fire_at=now + timedelta(seconds=self.lease_seconds))
+            .returning(Reminder.id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        db.session.commit()
+        if not claimed:
+            return []
+        return Reminder.query.filter(Reminder.id.in_(claimed)).order_by(Reminder.id).all()
+    
+    def _claim_indexed(self, now: datetime) -> List[Reminder]:
+        """Claim a batch popped from the reminder index, keeping the ids whose rows are still due"""
+        lease_until = now + timedelta(seconds=self.lease_seconds)
+        while True:
+            ids = reminder_index.pop_due(now, self.batch_size, lease_until)
+            if not ids:
+                return []
+            if db.engine.dialect.name in SKIP_LOCKED_DIALECTS:
+                reminders = db.session.scalars(
+                    db.select(Reminder).where(Reminder.id.in_(ids), *self._due(now))
+                    .order_by(Reminder.id).with_for_update(skip_locked=True)
+                ).all()
+            else:
+                # Lease the rows in the table too, so a table sweep cannot claim them again
+                reminders = self._claim_leased(now, ids)
+            
+            # The index was behind the table for the rest; re-sync them from their rows
+            stale = set(ids) - {reminder.id for reminder in reminders}
+            if stale:
+                reminder_index.sync(stale)
+            if reminders:
+                return reminders
+    
+    def _claim_table(self, now: datetime) -> List[Reminder]:
+        """Claim the next batch of due reminders by scanning the table"""
+        if db.engine.dialect.name in SKIP_LOCKED_DIALECTS:
+            # The row locks last until complete() commits
+            return db.session.scalars(self.locked_claim_query(now)).all()
+        return self._claim_leased(now)
+    
+    def claim(self, now: Optional[datetime] = None) -> List[Reminder]:
+        """Claim the next batch of due reminders for this worker"""
+        now = now or datetime.utcnow()
+        if reminder_index.enabled():
+            try:
+                reminders = self._claim_indexed(now)
+                if reminders:
+                    return reminders
+            except INDEX_ERRORS as e:
+                current_app.logger.warning('Reminder index unavailable, scanning the table: %s', e)
+            else:
+                # Once the index has nothing due, sweep the table for reminders it missed (an index
+                # write that failed after its commit, rows written outside the app); completing them
+                # puts them back in the index
+                reminders = self._claim_table(now)
+                if reminders:
+                    current_app.logger.warning('%d due reminder(s) were missing from the index', len(reminders))
+                return reminders
+        return self._claim_table(now)
+    
+    def complete(self, reminders: List[Reminder], failed_ids=(), rejected_ids=(),
+                 now: Optional[datetime] = None) -> List[int]:
+        """Schedule the next firing of a batch and release it; returns the ids whose firing was dropped.
+        
+        Failed reminders retry after a lease, up to `max_attempts` sends per
+        firing. Rejected ones, and failed ones out of attempts, are not
+        retried: they move on to their next tier like delivered ones.
+        """
+        failed_ids = set(failed_ids)
+        rejected_ids = set(rejected_ids)
+        retry_at = (now or datetime.utcnow()) + timedelta(seconds=self.lease_seconds)
+        dropped = []
+        for reminder in reminders:
+            if reminder.id in failed_ids:
+                reminder.delivery_attempts = (reminder.delivery_attempts or 0) + 1
+                if reminder.delivery_attempts < self.max_attempts:
+                    reminder.next_fire_at = retry_at
+                    continue
+                dropped.append(reminder.id)
+            elif reminder.id in rejected_ids:
+                dropped.append(reminder.id)
+            reminder.delivery_attempts = 0
+            if not reminder.advance_tier():
+                reminder.is_active = False
+        db.session.commit()
+        
+        if dropped:
+            current_app.logger.warning(
+                'Dropped the current firing of %d undeliverable reminder(s): %s',
+                len(dropped), ', '.join(str(reminder_id) for reminder_id in dropped[:MAX_REPORTED_IDS])
+            )
+        return dropped
+    
+    def drain(self, deliver: Callable[[List[Reminder]], Any], now: Optional[datetime] = None,
+              max_batches: Optional[int] = None) -> Dict[str, Any]:
+        """Claim, deliver and complete batches until nothing due at `now` is left.
+        
+        `deliver` may return the ids of reminders it could not deliver, which
+        are retried once the lease has passed, or a mapping with those as
+        'failed_ids' and the permanently undeliverable ones as 'rejected_ids'
+        (such as a ReminderMailer report), which are not retried.
+        """
+        now = now or datetime.utcnow()
+        started = time.perf_counter()
+        processed = 0
+        failed = 0
+        rejected = 0
+        dropped = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            try:
+                reminders = self.claim(now)
+                if not reminders:
+                    db.session.rollback()  # End the read transaction
+                    break
+                outcome = deliver(reminders) or ()
+                if isinstance(outcome, dict):
+                    failed_ids, rejected_ids = set(outcome.get('failed_ids', ())), set(outcome.get('rejected_ids', ()))
+                else:
+                    failed_ids, rejected_ids = set(outcome), set()
+                dropped += len(self.complete(reminders, failed_ids, rejected_ids, now))
+            except Exception:
+                # Locked batches are released; leased ones come due again after the lease
+                db.session.rollback()
+                raise
+            processed += len(reminders) - len(failed_ids) - len(rejected_ids)
+            failed += len(failed_ids)
+            rejected += len(rejected_ids)
+            batches += 1
+        
+        seconds = time.perf_counter() - started
+        return {
+            'processed': processed,
+            'failed': failed,
+            'rejected': rejected,
+            'dropped': dropped,
+            'batches': batches,
+            'seconds': round(seconds, 3),
+            'reminders_per_second': round(processed / seconds) if seconds > 0 and processed else 0
+        }
@@ -0,0 +1,139 @@
+import gzip
+import io
+import json
+import os
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Any, Optional
+from sqlalchemy import and_
+
+from .. import db
+from ..models import ChatLog, Reminder
+
+def _json_default(value):
+    """Encode the column types json cannot handle on its own"""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+class RetentionPipeline:
+    """Purges expired rows in small id-ordered batches.
+    
+    Each batch selects at most `batch_size` expired rows above the id
+    watermark, optionally appends them to a gzip NDJSON archive, deletes
+    exactly those ids and commits, then sleeps `pause_seconds`. Short
+    transactions and the pause keep row locks and I/O away from live chat
+    traffic, so the pipeline can run continuously.
+    """
+    
+    def __init__(self, batch_size: int = 1000, pause_seconds: float = 0.1, archive_dir: Optional[str] = None,
+                 chat_log_days: int = 90, reminder_days: int = 90):
+        self.batch_size = max(1, batch_size)
+        self.pause_seconds = max(0.0, pause_seconds)
+        self.archive_dir = archive_dir
+        self.chat_log_days = chat_log_days
+        self.reminder_days = reminder_days
+    
+    @classmethod
+    def from_config(cls, config, **overrides):
+        """Pipeline configured from the RETENTION_* app settings"""
+        options = {
+            'batch_size': config['RETENTION_BATCH_SIZE'],
+            'pause_seconds': config['RETENTION_PAUSE_SECONDS'],
+            'archive_dir': config['RETENTION_ARCHIVE_DIR'],
+            'chat_log_days': config['RETENTION_CHAT_LOG_DAYS'],
+            'reminder_days': config['RETENTION_REMINDER_DAYS'],
+        }
+        options.update({key: value for key, value in overrides.items() if value is not None})
+        return cls(**options)
+    
+    def policies(self, now: Optional[datetime] = None):
+        """(model, expired condition) pairs covered by retention"""
+        now = now or datetime.utcnow()
+        return [
+            (ChatLog, ChatLog.timestamp < now - timedelta(days=self.chat_log_days)),
+            (Reminder, and_(
+                Reminder.is_active == False,
+                Reminder.updated_at < now - timedelta(days=self.reminder_days)
+            )),
+        ]
+    
+    def run(self, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Apply every retention policy and return one report per table"""
+        return [self.purge(model, condition) for model, condition in self.policies(now)]
+    
+    def _archive_path(self, table_name: str) -> str:
+        """New archive file for one table's purge run"""
+        os.makedirs(self.archive_dir, exist_ok=True)
+        stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S')
+        return os.path.join(self.archive_dir, f'{table_name}-{stamp}.ndjson.gz')
+    
+    def purge(self, model, condition) -> Dict[str, Any]:
+        """Delete rows of `model` matching `condition`, one bounded batch at a time"""
+        table = model.__table__
+        archive_path = self._archive_path(table.name) if self.archive_dir else None
+        archive_file = open(archive_path, 'ab') if archive_path else None
+        # Appending to an existing file starts a new gzip member, which readers treat as a continuation
+        archive = io.TextIOWrapper(gzip.GzipFile(fileobj=archive_file, mode='ab'), encoding='utf-8') if archive_file else None
+        
+        started = time.perf_counter()
+        watermark = 0
+        deleted = 0
+        batches = 0
+        try:
+            while True:
+                columns = [table] if archive else [table.c.id]
+                rows = db.session.execute(
+                    db.select(*columns)
+                    .where(table.c.id > watermark, condition)
+                    .order_by(table.c.id)
+                    .limit(self.batch_size)
+                ).all()
+                if not rows:
+                    db.session.rollback()  # End the read transaction
+                    break
+                
+                ids = [row.id for row in rows]
+                if archive:
+                    for row in rows:
+                        archive.write(json.dumps(dict(row._mapping), default=_json_default) + '\n')
+                    # The archive must be on disk before the rows are gone from the database
+                    archive.flush()
+                    os.fsync(archive_file.fileno())
+                
+                result = db.session.execute(
+                    db.delete(model).where(model.id.in_(ids)).execution_options(synchronize_session=False)
+                )
+                db.session.commit()
+                
+                deleted += result.rowcount
+                batches += 1
+                watermark = ids[-1]
+                
+                if len(rows) < self.batch_size:
+                    break
+                if self.pause_seconds:
+                    time.sleep(self.pause_seconds)
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            if archive:
+                archive.close()  # Writes the gzip trailer; the file object is not closed with it
+                archive_file.flush()
+                os.fsync(archive_file.fileno())
+                archive_file.close()
+        
+        if archive_path and not deleted:
+            os.remove(archive_path)
+            archive_path = None
+        
+        seconds = time.perf_counter() - started
+        return {
+            'table': table.name,
+            'deleted': deleted,
+            'batches': batches,
+            'seconds': round(seconds, 3),
+            'rows_per_second': round(deleted / seconds) if seconds > 0 and deleted else 0,
+            'archive': archive_path
+        }
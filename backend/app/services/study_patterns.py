@@ -0,0 +1,128 @@
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional
+
+from .. import db
+from ..models import Reminder, UserDailyStats
+from ..utils.db_routing import read_engine
+from .analytics import DailySeries
+from .reminder_index import insert_reminders
+
+PATTERN_REMINDER_TITLE = 'Study Pattern Analysis'
+PATTERN_REMINDER_TIER = 2
+
+def study_suggestion(avg_completion_rate: float) -> str:
+    """Suggestion for a user's average daily completion rate"""
+    if avg_completion_rate < 0.5:
+        return "Consider breaking down larger tasks into smaller, more manageable chunks."
+    elif avg_completion_rate < 0.8:
+        return "You're doing well! Try setting specific time blocks for studying to improve consistency."
+    return "Excellent work! Consider challenging yourself with more advanced topics."
+
+def pattern_reminder_content(avg_completion_rate: float) -> str:
+    """Body of the study pattern reminder"""
+    return f"Based on your recent study patterns, here's a suggestion: {study_suggestion(avg_completion_rate)}"
+
+class StudyPatternAnalyzer:
+    """Analyzes every active user's recent completion pattern in one streamed pass.
+    
+    A single query over user_daily_stats, ordered by user, is streamed from
+    the read replica (when configured) with a server-side cursor. Rows are cut
+    into chunks of `chunk_size` users; each chunk's metrics are computed as
+    one NumPy matrix and its suggestion reminders are bulk-inserted and
+    committed on the primary. Users with no tasks in the window are skipped.
+    
+    Databases without server-side cursors (SQLite) read keyset pages of
+    `chunk_size` users instead, since an open SQLite cursor would hold its
+    read lock across the chunk commits.
+    """
+    
+    def __init__(self, chunk_size: int = 5000, window_days: int = 30):
+        self.chunk_size = max(1, chunk_size)
+        self.window_days = window_days
+    
+    def _rows(self, query, window):
+        """User-ordered (user_id, date, total, completed) rows of `query`"""
+        engine = read_engine()
+        # Reads run on their own connection so the per-chunk commits do not end them
+        if engine.dialect.supports_server_side_cursors:
+            with engine.connect() as connection:
+                yield from connection.execution_options(
+                    stream_results=True, yield_per=self.chunk_size * 10
+                ).execute(query)
+            return
+        
+        last_user_id = None
+        while True:
+            users = db.select(UserDailyStats.user_id).where(*window).distinct()
+            if last_user_id is not None:
+                users = users.where(UserDailyStats.user_id > last_user_id)
+            users = users.order_by(UserDailyStats.user_id).limit(self.chunk_size)
+            with engine.connect() as connection:
+                page = connection.execute(query.where(UserDailyStats.user_id.in_(users.scalar_subquery()))).all()
+            if not page:
+                return
+            yield from page
+            last_user_id = page[-1].user_id
+    
+    def _user_chunks(self, rows):
+        """Group user-ordered (user_id, date, total, completed) rows into chunks of whole users"""
+        user_ids, chunk = [], []
+        for row in rows:
+            if not user_ids or user_ids[-1] != row.user_id:
+                if len(user_ids) == self.chunk_size:
+                    yield user_ids, chunk
+                    user_ids, chunk = [], []
+                user_ids.append(row.user_id)
+            chunk.append(row)
+        if user_ids:
+            yield user_ids, chunk
+    
+    def _insert_reminders(self, series: DailySeries, now: datetime) -> int:
+        """Bulk-insert one suggestion reminder per user of the series"""
+        next_fire_at = Reminder.next_fire_for_tier(PATTERN_REMINDER_TIER, now)
+        rows: List[Dict[str, Any]] = [
+            {
+                'user_id': user_id,
+                'title': PATTERN_REMINDER_TITLE,
+                'content': pattern_reminder_content(rate),
+                'tier': PATTERN_REMINDER_TIER,
+                'next_fire_at': next_fire_at,
+                'is_active': True
+            }
+            for user_id, rate in zip(series.user_ids, series.average_completion_rate().tolist())
+        ]
+        return insert_reminders(rows)
+    
+    def run(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Analyze all active users and report throughput"""
+        now = now or datetime.utcnow()
+        end_date = now.date()
+        start_date = end_date - timedelta(days=self.window_days)
+        
+        window = (UserDailyStats.date >= start_date, UserDailyStats.date <= end_date)
+        query = db.select(
+            UserDailyStats.user_id,
+            UserDailyStats.date,
+            UserDailyStats.total_tasks,
+            UserDailyStats.completed_tasks
+        ).where(*window).order_by(UserDailyStats.user_id)
+        
+        started = time.perf_counter()
+        users = 0
+        reminders = 0
+        chunks = 0
+        for user_ids, rows in self._user_chunks(self._rows(query, window)):
+            series = DailySeries.from_rows(user_ids, start_date, end_date, rows)
+            reminders += self._insert_reminders(series, now)
+            users += len(user_ids)
+            chunks += 1
+        
+        seconds = time.perf_counter() - started
+        return {
+            'users': users,
+            'reminders': reminders,
+            'chunks': chunks,
+            'seconds': round(seconds, 3),
+            'users_per_second': round(users / seconds) if seconds > 0 and users else 0
+        }
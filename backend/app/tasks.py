@@ -1,31 +1,46 @@
 from . import celery, db
-from .models import Reminder, Task, Plan, User
+from .models import Reminder, Task, Plan, User, ChatLog
 from .services.gpt_handler import GPTHandler
-from flask_mail import Message
+from .services.retention import RetentionPipeline
+from .services.reminder_queue import ReminderQueue
+from .services.reminder_mail import ReminderMailer, reminder_message
+from .services.analytics import DailySeries
+from .services.daily_insights import DailyInsightPipeline, DAILY_INSIGHT_TITLE, DAILY_INSIGHT_TIER
+from .services.study_patterns import (
+    StudyPatternAnalyzer, PATTERN_REMINDER_TITLE, PATTERN_REMINDER_TIER, pattern_reminder_content
+)
+from .utils.db_routing import read_replica
+from flask import current_app
 from . import mail
 from datetime import datetime, timedelta
 import json
 
+def _deliver_reminders(reminders):
+    """Send one claimed batch of reminders; returns the mailer's failed and rejected ids"""
+    if current_app.config['REMINDER_DELIVERY'] == 'email':
+        # One recipient query and one SMTP session per batch instead of a task per reminder
+        report = ReminderMailer.from_config(current_app.config).send(reminders)
+        return {'failed_ids': report['failed_ids'], 'rejected_ids': report['rejected_ids']}
+    
+    for reminder in reminders:
+        print(f"Reminder for user {reminder.user_id}: {reminder.title}")
+    return []
+
 @celery.task
-def process_reminders():
-    """Process scheduled reminders"""
+def process_reminders(fan_out=True):
+    """Process scheduled reminders in claimed batches; any number of workers can run this at once"""
     try:
-        # Get reminders that should fire now
-        active_reminders = Reminder.query.filter(
-            Reminder.is_active == True,
-            Reminder.next_fire_at <= datetime.utcnow()
-        ).all()
-        
-        for reminder in active_reminders:
-            # Send reminder (in a real app, this would be email/push notification)
-            print(f"Reminder for user {reminder.user_id}: {reminder.title}")
-            
-            # For now, just advance the tier
-            if not reminder.advance_tier():
-                reminder.is_active = False
-        
-        db.session.commit()
-        return f"Processed {len(active_reminders)} reminders"
+        # Extra drainers share the due queue without duplicates, so throughput grows with workers
+        if fan_out:
+            for _ in range(current_app.config['REMINDER_WORKERS'] - 1):
+                process_reminders.delay(fan_out=False)
+        
+        report = ReminderQueue.from_config(current_app.config).drain(_deliver_reminders)
+        return (
+            f"Processed {report['processed']} reminders ({report['failed']} failed, {report['rejected']} rejected, "
+            f"{report['dropped']} dropped) in {report['batches']} batch(es), "
+            f"{report['seconds']}s ({report['reminders_per_second']} reminders/s)"
+        )
         
     except Exception as e:
         db.session.rollback()
@@ -35,41 +50,38 @@ def process_reminders():
 def send_reminder_email(user_id, reminder_id):
     """Send reminder email to user"""
     try:
-        user = User.query.get(user_id)
-        reminder = Reminder.query.get(reminder_id)
+        user = db.session.get(User, user_id)
+        reminder = db.session.get(Reminder, reminder_id)
         
         if not user or not reminder:
             return "User or reminder not found"
         
-        msg = Message(
-            subject=f"Study Reminder: {reminder.title}",
-            recipients=[user.email],
-            body=f"""
-            Hi {user.email},
-            
-            This is a reminder for your study session:
-            
-            {reminder.title}
-            {reminder.content}
-            
-            Keep up the great work!
-            
-            Best regards,
-            Your Personal Learning Assistant
-            """
-        )
-        
-        mail.send(msg)
+        mail.send(reminder_message(user, reminder))
         return f"Reminder email sent to {user.email}"
         
     except Exception as e:
         return f"Error sending reminder email: {str(e)}"
 
+@celery.task
+def send_reminder_emails(reminder_ids):
+    """Send many reminder emails over shared SMTP sessions"""
+    try:
+        reminders = Reminder.query.filter(Reminder.id.in_(reminder_ids)).order_by(Reminder.id).all()
+        report = ReminderMailer.from_config(current_app.config).send(reminders)
+        
+        return (
+            f"Sent {report['sent']} reminder emails ({report['failed']} failed, {report['rejected']} rejected) over {report['connections']} "
+            f"connection(s), {report['seconds']}s ({report['messages_per_second']} messages/s)"
+        )
+    
+    except Exception as e:
+        return f"Error sending reminder emails: {str(e)}"
+
 @celery.task
 def generate_daily_insights(user_id):
     """Generate daily insights for user"""
     try:
-        user = User.query.get(user_id)
+        user = db.session.get(User, user_id)
         if not user:
             return "User not found"
         
@@ -85,24 +97,14 @@ def generate_daily_insights(user_id):
         
         # Generate insights using GPT
         gpt_handler = GPTHandler()
-        
-        task_summary = "\n".join([f"- {task.title}" for task in today_tasks])
-        
-        insight_prompt = f"""
-        Based on these study tasks for today:
-        {task_summary}
-        
-        Provide a brief, encouraging insight or tip (max 100 words) to help the student stay motivated.
-        """
-        
-        insight = gpt_handler.chat_response(insight_prompt, [], f"User is a {user.persona}.")
+        insight = gpt_handler.daily_insight([task.title for task in today_tasks], user.persona)
         
         # Create a reminder with the insight
         reminder = Reminder(
             user_id=user_id,
-            title="Daily Study Insight",
+            title=DAILY_INSIGHT_TITLE,
             content=insight,
-            tier=1
+            tier=DAILY_INSIGHT_TIER
         )
         
         db.session.add(reminder)
@@ -114,23 +116,32 @@ def generate_daily_insights(user_id):
         db.session.rollback()
         return f"Error generating daily insights: {str(e)}"
 
+@celery.task
+def generate_all_daily_insights():
+    """Generate today's insights for every user with tasks, one model call per distinct study situation"""
+    try:
+        report = DailyInsightPipeline.from_config(current_app.config).run()
+        
+        return (
+            f"Generated daily insights for {report['users']} users from {report['groups']} group(s) "
+            f"({report['failed_groups']} failed), {report['seconds']}s ({report['users_per_second']} users/s)"
+        )
+    
+    except Exception as e:
+        db.session.rollback()
+        return f"Error generating daily insights: {str(e)}"
+
 @celery.task
 def cleanup_old_data():
     """Clean up old data to maintain performance"""
     try:
-        # Remove old chat logs (older than 90 days)
-        cutoff_date = datetime.utcnow() - timedelta(days=90)
-        old_chat_logs = ChatLog.query.filter(ChatLog.timestamp < cutoff_date).delete()
-        
-        # Remove old reminders (older than 30 days and inactive)
-        old_reminders = Reminder.query.filter(
-            Reminder.is_active == False,
-            Reminder.updated_at < cutoff_date
-        ).delete()
-        
-        db.session.commit()
+        # Expired chat logs and inactive reminders go in small batches so live
+        # chat traffic never waits behind one huge delete
+        reports = RetentionPipeline.from_config(current_app.config).run()
         
-        return f"Cleaned up {old_chat_logs} chat logs and {old_reminders} reminders"
+        return "Cleaned up " + ", ".join(
+            f"{report['deleted']} {report['table']} ({report['rows_per_second']} rows/s)" for report in reports
+        )
         
     except Exception as e:
         db.session.rollback()
@@ -148,40 +159,25 @@ def analyze_study_patterns(user_id):
         end_date = datetime.now().date()
         start_date = end_date - timedelta(days=30)
         
-        # Analyze task completion patterns
-        daily_completions = db.session.query(
-            Task.date,
-            db.func.count(Task.id).label('total'),
-            db.func.sum(db.case([(Task.status == 'completed', 1)], else_=0)).label('completed')
-        ).join(Plan).filter(
-            Plan.user_id == user_id,
-            Task.date >= start_date,
-            Task.date <= end_date
-        ).group_by(Task.date).all()
+        # Analyze task completion patterns (on the read replica when configured)
+        with read_replica():
+            metrics = DailySeries.load([user_id], start_date, end_date).summaries()[int(user_id)]
         
-        if not daily_completions:
+        if not metrics['active_days']:
             return "No study data to analyze"
         
         # Calculate patterns
-        completion_rates = [day.completed / day.total if day.total > 0 else 0 for day in daily_completions]
-        avg_completion_rate = sum(completion_rates) / len(completion_rates)
+        avg_completion_rate = metrics['average_completion_rate']
         
         # Generate personalized suggestions
         gpt_handler = GPTHandler()
         
-        if avg_completion_rate < 0.5:
-            suggestion = "Consider breaking down larger tasks into smaller, more manageable chunks."
-        elif avg_completion_rate < 0.8:
-            suggestion = "You're doing well! Try setting specific time blocks for studying to improve consistency."
-        else:
-            suggestion = "Excellent work! Consider challenging yourself with more advanced topics."
-        
         # Create a reminder with the suggestion
         reminder = Reminder(
             user_id=user_id,
-            title="Study Pattern Analysis",
-            content=f"Based on your recent study patterns, here's a suggestion: {suggestion}",
-            tier=2
+            title=PATTERN_REMINDER_TITLE,
+            content=pattern_reminder_content(avg_completion_rate),
+            tier=PATTERN_REMINDER_TIER
         )
         
         db.session.add(reminder)
@@ -191,4 +187,20 @@ def analyze_study_patterns(user_id):
         
     except Exception as e:
         db.session.rollback()
-        return f"Error analyzing study patterns: {str(e)}" 
\ No newline at end of file
+        return f"Error analyzing study patterns: {str(e)}"
+
+@celery.task
+def analyze_all_study_patterns():
+    """Analyze every active user's study patterns in one batched pass"""
+    try:
+        # One streamed query over the daily rollup; reminders are bulk-inserted per chunk of users
+        report = StudyPatternAnalyzer(chunk_size=current_app.config['STUDY_PATTERN_CHUNK_SIZE']).run()
+        
+        return (
+            f"Analyzed study patterns for {report['users']} users in {report['chunks']} chunk(s), "
+            f"{report['seconds']}s ({report['users_per_second']} users/s)"
+        )
+    
+    except Exception as e:
+        db.session.rollback()
+        return f"Error analyzing study patterns: {str(e)}"
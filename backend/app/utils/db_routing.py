@@ -0,0 +1,166 @@
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, has_request_context
+from flask_jwt_extended import get_jwt_identity
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql.dml import UpdateBase
+
+try:
+    import redis
+except ImportError:  # Only needed for REPLICA_READ_YOUR_WRITES_SYNC=redis
+    redis = None
+
+# Marker lookups that fail fall back to this worker's markers instead of failing the request
+MARKER_ERRORS = (redis.RedisError,) if redis else ()
+
+# SQLALCHEMY_BINDS key of the read replica engine
+REPLICA_BIND = 'replica'
+
+class RoutingSession(Session):
+    """Session that can send reads to a read replica while writes stay on the primary.
+    
+    Inside `using_replica()` every SELECT goes to the 'replica' bind when one is
+    configured; flushes and INSERT/UPDATE/DELETE statements always go to the
+    primary. Without a replica bind everything runs on the primary as before.
+    Objects expired by a commit inside the block are refreshed from the replica,
+    so blocks that write should read back what they need before committing.
+    """
+    
+    def __init__(self, db, **kwargs):
+        super().__init__(db, **kwargs)
+        self._replica_depth = 0
+        self._wrote = False
+    
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or isinstance(clause, UpdateBase):
+                self._wrote = True
+            elif self._replica_depth and REPLICA_BIND in self._db.engines:
+                return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+    
+    @property
+    def has_replica(self):
+        """Whether a replica bind is configured"""
+        return REPLICA_BIND in self._db.engines
+    
+    @contextmanager
+    def using_replica(self):
+        """Route the reads made inside the block to the replica"""
+        self._replica_depth += 1
+        try:
+            yield self
+        finally:
+            self._replica_depth -= 1
+
+# Read-your-writes: users who committed a write recently keep reading from the
+# primary until REPLICA_READ_YOUR_WRITES_SECONDS pass, covering replication lag.
+# With REPLICA_READ_YOUR_WRITES_SYNC=redis the marker is a key at REDIS_URL that
+# expires with the window, so every worker sees it; each worker also keeps its
+# own markers, which are all 'memory' uses and what Redis outages fall back to.
+_recent_writes = {}
+_recent_writes_lock = threading.Lock()
+_redis = None
+_redis_url = None
+
+def _request_user_id():
+    """JWT identity of the current request, if any"""
+    if not has_request_context():
+        return None
+    try:
+        return get_jwt_identity()
+    except RuntimeError:
+        return None
+
+def _shared():
+    return current_app.config['REPLICA_READ_YOUR_WRITES_SYNC'] == 'redis'
+
+def _client():
+    """Redis client for REDIS_URL, created on first use"""
+    global _redis, _redis_url
+    url = current_app.config['REDIS_URL']
+    if _redis is None or _redis_url != url:
+        if redis is None:
+            raise RuntimeError('REPLICA_READ_YOUR_WRITES_SYNC=redis requires the redis package')
+        _redis = redis.Redis.from_url(url)
+        _redis_url = url
+    return _redis
+
+def _marker_key(user_id):
+    return f'replica:wrote:{user_id}'
+
+def note_write(user_id):
+    """Pin a user's reads to the primary for the read-your-writes window"""
+    window = current_app.config['REPLICA_READ_YOUR_WRITES_SECONDS']
+    now = time.monotonic()
+    with _recent_writes_lock:
+        _recent_writes[str(user_id)] = now + window
+        if len(_recent_writes) > 10000:
+            for key in [key for key, until in _recent_writes.items() if until <= now]:
+                del _recent_writes[key]
+    if _shared() and window > 0:
+        try:
+            _client().set(_marker_key(user_id), 1, ex=window)
+        except MARKER_ERRORS as e:
+            # Only this worker will pin the user to the primary
+            current_app.logger.error('Read-your-writes marker failed for user %s: %s', user_id, e)
+
+def wrote_recently(user_id):
+    """Whether a user committed a write within the read-your-writes window"""
+    with _recent_writes_lock:
+        until = _recent_writes.get(str(user_id))
+    if until is not None and until > time.monotonic():
+        return True
+    if not _shared():
+        return False
+    try:
+        return bool(_client().exists(_marker_key(user_id)))
+    except MARKER_ERRORS as e:
+        current_app.logger.warning('Read-your-writes marker unavailable, using this worker\'s: %s', e)
+        return False
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _remember_writer(session):
+    """Record which user just committed a write"""
+    if session._wrote and session.has_replica:
+        user_id = _request_user_id()
+        if user_id is not None:
+            note_write(user_id)
+    session._wrote = False
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _forget_write(session):
+    session._wrote = False
+
+@contextmanager
+def read_replica():
+    """Route the current session's reads inside the block to the replica, if configured"""
+    from .. import db
+    
+    with db.session().using_replica():
+        yield
+
+def read_engine():
+    """Engine for long read-only scans: the replica when configured, else the primary"""
+    from .. import db
+    
+    return db.engines.get(REPLICA_BIND, db.engine)
+
+def replica_reads(view):
+    """Serve a read-only view from the replica unless the user just wrote.
+    
+    Apply below @jwt_required() so the user's identity is available.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        user_id = _request_user_id()
+        if user_id is not None and wrote_recently(user_id):
+            return view(*args, **kwargs)
+        
+        with read_replica():
+            return view(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,75 @@
+import base64
+import json
+from datetime import date, datetime
+from flask import current_app, request
+from sqlalchemy import and_, or_
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+def encode_cursor(values):
+    """Encode the sort key of a row as an opaque, URL-safe cursor"""
+    payload = [value.isoformat() if isinstance(value, (date, datetime)) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor, columns):
+    """Decode a cursor back into typed sort-key values for the given columns"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if not isinstance(payload, list) or len(payload) != len(columns):
+            raise ValueError('wrong number of values')
+        
+        values = []
+        for column, value in zip(columns, payload):
+            python_type = column.type.python_type
+            if python_type is datetime:
+                values.append(datetime.fromisoformat(value))
+            elif python_type is date:
+                values.append(date.fromisoformat(value))
+            else:
+                values.append(python_type(value))
+        return values
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise InvalidCursor(f'Invalid cursor: {e}')
+
+def get_page_size():
+    """Page size from the ?limit= query parameter, clamped to MAX_PAGE_SIZE"""
+    limit = request.args.get('limit', current_app.config['PAGE_SIZE'], type=int)
+    return max(1, min(limit, current_app.config['MAX_PAGE_SIZE']))
+
+def _after(columns, values, descending):
+    """Row-value comparison (columns) > values, or < when descending.
+    
+    Written as "first <= v AND (first < v OR rest...)" so the leading column
+    stays an index range condition on every database.
+    """
+    first, first_value = columns[0], values[0]
+    if len(columns) == 1:
+        return first < first_value if descending else first > first_value
+    
+    rest = _after(columns[1:], values[1:], descending)
+    if descending:
+        return and_(first <= first_value, or_(first < first_value, rest))
+    return and_(first >= first_value, or_(first > first_value, rest))
+
+def keyset_paginate(query, columns, cursor=None, limit=20, descending=True):
+    """Fetch one page of a query ordered by the given unique key columns.
+    
+    Returns (items, next_cursor); next_cursor is None on the last page.
+    """
+    if cursor:
+        query = query.filter(_after(columns, decode_cursor(cursor, columns), descending))
+    
+    ordering = [column.desc() if descending else column.asc() for column in columns]
+    rows = query.order_by(*ordering).limit(limit + 1).all()
+    
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = cursor_for(items[-1], columns)
+    return items, next_cursor
+
+def cursor_for(item, columns):
+    """Cursor pointing at a specific row"""
+    return encode_cursor([getattr(item, column.key) for column in columns])
@@ -0,0 +1,30 @@
+from flask import request
+
+class InvalidProjection(ValueError):
+    """Raised when ?fields= or ?expand= asks for something a resource does not have"""
+
+def get_expansions(allowed, default=()):
+    """Heavy fields to include in a response, from ?fields= and ?expand=.
+    
+    ?fields=summary drops everything optional, ?fields=full includes all of
+    `allowed`, and ?expand=a,b adds individual fields on top. Without either
+    parameter the endpoint's `default` applies.
+    """
+    fields = request.args.get('fields')
+    if fields is None:
+        expansions = set(default)
+    elif fields == 'summary':
+        expansions = set()
+    elif fields == 'full':
+        expansions = set(allowed)
+    else:
+        raise InvalidProjection("fields must be 'summary' or 'full'")
+    
+    requested = {name.strip() for name in request.args.get('expand', '').split(',') if name.strip()}
+    unknown = requested - set(allowed)
+    if unknown:
+        raise InvalidProjection(
+            f"Cannot expand {', '.join(sorted(unknown))}; expected one of: {', '.join(allowed)}"
+        )
+    
+    return expansions | requested
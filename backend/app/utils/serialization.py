@@ -0,0 +1,126 @@
+import copy
+import json
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from flask import current_app
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Optional speedup; the stdlib provider is used without it
+    orjson = None
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Flask's default provider, except dates and datetimes are written as ISO 8601"""
+    
+    @staticmethod
+    def default(o):
+        if isinstance(o, (date, datetime)):
+            return o.isoformat()
+        return DefaultJSONProvider.default(o)
+
+class OrjsonProvider(StdlibJSONProvider):
+    """JSON provider backed by orjson, which encodes dates and datetimes natively.
+    
+    Calls that pass json.dumps/json.loads keyword options fall back to the
+    stdlib implementation since orjson has no equivalent for most of them.
+    """
+    
+    # Key order carries no meaning in API responses, so skip the sort
+    sort_keys = False
+    
+    def _options(self):
+        options = orjson.OPT_NON_STR_KEYS
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            options |= orjson.OPT_INDENT_2
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return options
+    
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._options()).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=self._options())
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+JSON_PROVIDERS = {
+    'stdlib': StdlibJSONProvider,
+    'orjson': OrjsonProvider,
+}
+
+def get_json_provider(name='auto'):
+    """Provider class for JSON_SERIALIZER; 'auto' prefers orjson when installed"""
+    if name == 'auto':
+        return OrjsonProvider if orjson is not None else StdlibJSONProvider
+    
+    if name not in JSON_PROVIDERS:
+        raise ValueError(f"Unknown JSON serializer '{name}'. Expected one of: auto, {', '.join(JSON_PROVIDERS)}")
+    if name == 'orjson' and orjson is None:
+        raise ValueError("JSON serializer 'orjson' is not installed")
+    return JSON_PROVIDERS[name]
+
+def loads(value):
+    """Decode a stored JSON column, using orjson when available"""
+    if orjson is not None:
+        return orjson.loads(value)
+    return json.loads(value)
+
+class SerializationCache:
+    """Bounded LRU of serialized model dictionaries.
+    
+    Entries are keyed on (model, id, updated_at, variant), so any ORM update
+    that bumps updated_at makes the old entry unreachable; it is evicted once
+    the cache is full. Bulk query updates skip onupdate and must not be
+    relied on to refresh cached rows. SERIALIZATION_CACHE_SIZE=0 disables it.
+    """
+    
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def fetch(self, instance, variant, build):
+        """Return a deep copy of the cached dictionary for an instance, building it on a miss"""
+        max_entries = current_app.config['SERIALIZATION_CACHE_SIZE']
+        if not max_entries or instance.id is None or instance.updated_at is None:
+            return build()
+        
+        key = (type(instance).__name__, instance.id, instance.updated_at, variant)
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(value)
+            self.misses += 1
+        
+        value = build()
+        with self._lock:
+            self._entries[key] = value
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+        # Callers add keys and edit nested lists; none of that may reach the cached entry
+        return copy.deepcopy(value)
+    
+    def clear(self):
+        """Drop every cached entry"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def __len__(self):
+        return len(self._entries)
+
+serialization_cache = SerializationCache()
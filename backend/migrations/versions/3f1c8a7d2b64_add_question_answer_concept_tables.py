@@ -0,0 +1,152 @@
+"""Add question, answer and concept tables
+
+Revision ID: 3f1c8a7d2b64
+Revises: edb2c39b9b42
+Create Date: 2026-10-19 09:12:44.518302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import json
+from datetime import datetime
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c8a7d2b64'
+down_revision = 'edb2c39b9b42'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 500
+
+
+def upgrade():
+    op.create_table('questions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('upload_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('text', sa.Text(), nullable=False),
+    sa.Column('line_number', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['upload_id'], ['uploads.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_questions_user_id_upload_id', 'questions', ['user_id', 'upload_id'], unique=False)
+    op.create_index('ix_questions_upload_id_position', 'questions', ['upload_id', 'position'], unique=False)
+    op.create_table('answers',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('question_id', sa.Integer(), nullable=False),
+    sa.Column('upload_id', sa.Integer(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('text', sa.Text(), nullable=False),
+    sa.ForeignKeyConstraint(['question_id'], ['questions.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['upload_id'], ['uploads.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_answers_question_id_position', 'answers', ['question_id', 'position'], unique=False)
+    op.create_index(op.f('ix_answers_upload_id'), 'answers', ['upload_id'], unique=False)
+    op.create_table('concepts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('upload_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('term', sa.String(length=255), nullable=False),
+    sa.Column('definition', sa.Text(), nullable=False),
+    sa.ForeignKeyConstraint(['upload_id'], ['uploads.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_concepts_user_id_upload_id', 'concepts', ['user_id', 'upload_id'], unique=False)
+    op.create_index('ix_concepts_upload_id_position', 'concepts', ['upload_id', 'position'], unique=False)
+
+    backfill_parsed_uploads()
+
+
+def backfill_parsed_uploads():
+    """Copy Q/A pairs and concepts out of uploads.parsed_json in id-ordered batches"""
+    connection = op.get_bind()
+
+    uploads = sa.table('uploads',
+        sa.column('id', sa.Integer), sa.column('user_id', sa.Integer),
+        sa.column('parsed_json', sa.Text), sa.column('status', sa.String))
+    # A full Table (not a lightweight table clause) so bulk inserts can return ids in order
+    questions = sa.Table('questions', sa.MetaData(),
+        sa.Column('id', sa.Integer, primary_key=True), sa.Column('upload_id', sa.Integer),
+        sa.Column('user_id', sa.Integer), sa.Column('position', sa.Integer), sa.Column('text', sa.Text),
+        sa.Column('line_number', sa.Integer), sa.Column('created_at', sa.DateTime))
+    answers = sa.table('answers',
+        sa.column('question_id', sa.Integer), sa.column('upload_id', sa.Integer),
+        sa.column('position', sa.Integer), sa.column('text', sa.Text))
+    concepts = sa.table('concepts',
+        sa.column('upload_id', sa.Integer), sa.column('user_id', sa.Integer), sa.column('position', sa.Integer),
+        sa.column('term', sa.String), sa.column('definition', sa.Text))
+
+    last_id = 0
+    while True:
+        batch = connection.execute(
+            sa.select(uploads.c.id, uploads.c.user_id, uploads.c.parsed_json)
+            .where(uploads.c.id > last_id, uploads.c.status == 'completed', uploads.c.parsed_json.isnot(None))
+            .order_by(uploads.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not batch:
+            break
+        last_id = batch[-1].id
+
+        question_rows, answer_lists, concept_rows = [], [], []
+        for upload in batch:
+            try:
+                parsed = json.loads(upload.parsed_json)
+            except ValueError:
+                continue
+
+            for position, question in enumerate(parsed.get('questions', [])):
+                question_rows.append({
+                    'upload_id': upload.id,
+                    'user_id': upload.user_id,
+                    'position': position,
+                    'text': question['question'],
+                    'line_number': question.get('line_number'),
+                    'created_at': datetime.utcnow()
+                })
+                answer_lists.append((upload.id, question.get('answers', [])))
+
+            for position, concept in enumerate(parsed.get('concepts', [])):
+                concept_rows.append({
+                    'upload_id': upload.id,
+                    'user_id': upload.user_id,
+                    'position': position,
+                    'term': concept['term'][:255],
+                    'definition': concept['definition']
+                })
+
+        if question_rows:
+            question_ids = connection.execute(
+                questions.insert().returning(questions.c.id, sort_by_parameter_order=True),
+                question_rows
+            ).scalars().all()
+
+            answer_rows = [
+                {'question_id': question_id, 'upload_id': upload_id, 'position': position, 'text': answer}
+                for question_id, (upload_id, answer_list) in zip(question_ids, answer_lists)
+                for position, answer in enumerate(answer_list)
+            ]
+            if answer_rows:
+                connection.execute(answers.insert(), answer_rows)
+
+        if concept_rows:
+            connection.execute(concepts.insert(), concept_rows)
+
+
+def downgrade():
+    op.drop_index('ix_concepts_upload_id_position', table_name='concepts')
+    op.drop_index('ix_concepts_user_id_upload_id', table_name='concepts')
+    op.drop_table('concepts')
+    op.drop_index(op.f('ix_answers_upload_id'), table_name='answers')
+    op.drop_index('ix_answers_question_id_position', table_name='answers')
+    op.drop_table('answers')
+    op.drop_index('ix_questions_upload_id_position', table_name='questions')
+    op.drop_index('ix_questions_user_id_upload_id', table_name='questions')
+    op.drop_table('questions')
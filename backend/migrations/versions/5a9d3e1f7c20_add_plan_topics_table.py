@@ -0,0 +1,84 @@
+"""Add plan_topics table
+
+Revision ID: 5a9d3e1f7c20
+Revises: c47a0e3b9d15
+Create Date: 2026-10-19 16:42:07.193584
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import json
+
+
+# revision identifiers, used by Alembic.
+revision = '5a9d3e1f7c20'
+down_revision = 'c47a0e3b9d15'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def upgrade():
+    op.create_table('plan_topics',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('plan_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('topic', sa.String(length=200), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['plan_id'], ['plans.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_plan_topics_user_id_topic', 'plan_topics', ['user_id', 'topic'], unique=False)
+    op.create_index('ix_plan_topics_plan_id', 'plan_topics', ['plan_id'], unique=False)
+
+    backfill_plan_topics()
+
+
+def backfill_plan_topics():
+    """Copy the topics out of plans.topics JSON in id-ordered batches"""
+    connection = op.get_bind()
+
+    plans = sa.table('plans',
+        sa.column('id', sa.Integer), sa.column('user_id', sa.Integer), sa.column('topics', sa.Text))
+    plan_topics = sa.table('plan_topics',
+        sa.column('plan_id', sa.Integer), sa.column('user_id', sa.Integer),
+        sa.column('topic', sa.String), sa.column('position', sa.Integer))
+
+    last_id = 0
+    while True:
+        batch = connection.execute(
+            sa.select(plans.c.id, plans.c.user_id, plans.c.topics)
+            .where(plans.c.id > last_id)
+            .order_by(plans.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not batch:
+            break
+        last_id = batch[-1].id
+
+        rows = []
+        for plan in batch:
+            try:
+                topics = json.loads(plan.topics) if plan.topics else []
+            except ValueError:
+                continue
+            if not isinstance(topics, list):
+                continue
+
+            seen = set()
+            for topic in topics:
+                topic = str(topic).strip()[:200]
+                if topic and topic not in seen:
+                    seen.add(topic)
+                    rows.append({'plan_id': plan.id, 'user_id': plan.user_id, 'topic': topic, 'position': len(seen) - 1})
+
+        if rows:
+            connection.execute(plan_topics.insert(), rows)
+
+
+def downgrade():
+    op.drop_index('ix_plan_topics_plan_id', table_name='plan_topics')
+    op.drop_index('ix_plan_topics_user_id_topic', table_name='plan_topics')
+    op.drop_table('plan_topics')
@@ -0,0 +1,30 @@
+"""Add question review stats for local quizzes
+
+Revision ID: 8b2e5d9c41f7
+Revises: 3f1c8a7d2b64
+Create Date: 2026-10-19 11:40:03.127455
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2e5d9c41f7'
+down_revision = '3f1c8a7d2b64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('questions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('times_seen', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('times_wrong', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('last_seen_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('questions', schema=None) as batch_op:
+        batch_op.drop_column('last_seen_at')
+        batch_op.drop_column('times_wrong')
+        batch_op.drop_column('times_seen')
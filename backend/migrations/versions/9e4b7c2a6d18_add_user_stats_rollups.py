@@ -0,0 +1,94 @@
+"""Add user_daily_stats and user_topic_stats rollups
+
+Revision ID: 9e4b7c2a6d18
+Revises: 5a9d3e1f7c20
+Create Date: 2026-10-19 21:17:42.508113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e4b7c2a6d18'
+down_revision = '5a9d3e1f7c20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_daily_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('total_tasks', sa.Integer(), nullable=False),
+    sa.Column('completed_tasks', sa.Integer(), nullable=False),
+    sa.Column('skipped_tasks', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'date')
+    )
+    op.create_table('user_topic_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('topic', sa.String(length=200), nullable=False),
+    sa.Column('total_tasks', sa.Integer(), nullable=False),
+    sa.Column('completed_tasks', sa.Integer(), nullable=False),
+    sa.Column('skipped_tasks', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'topic')
+    )
+
+    backfill_rollups()
+
+
+def backfill_rollups(batch_size=500):
+    """Aggregate the existing tasks into both rollups, one id range of users at a time"""
+    users = sa.table('users', sa.column('id', sa.Integer))
+    plans = sa.table('plans', sa.column('id', sa.Integer), sa.column('user_id', sa.Integer))
+    tasks = sa.table('tasks',
+        sa.column('plan_id', sa.Integer), sa.column('date', sa.Date), sa.column('status', sa.String))
+    plan_topics = sa.table('plan_topics',
+        sa.column('plan_id', sa.Integer), sa.column('user_id', sa.Integer), sa.column('topic', sa.String))
+    counters = ['total_tasks', 'completed_tasks', 'skipped_tasks']
+
+    def counts():
+        return [
+            sa.func.count(),
+            sa.func.coalesce(sa.func.sum(sa.case((tasks.c.status == 'completed', 1), else_=0)), 0),
+            sa.func.coalesce(sa.func.sum(sa.case((tasks.c.status == 'skipped', 1), else_=0)), 0),
+        ]
+
+    user_daily_stats = sa.table('user_daily_stats',
+        sa.column('user_id'), sa.column('date'), *(sa.column(name) for name in counters))
+    user_topic_stats = sa.table('user_topic_stats',
+        sa.column('user_id'), sa.column('topic'), *(sa.column(name) for name in counters))
+
+    connection = op.get_bind()
+    watermark = 0
+    while True:
+        batch = connection.execute(
+            sa.select(users.c.id).where(users.c.id > watermark).order_by(users.c.id).limit(batch_size)
+        ).scalars().all()
+        if not batch:
+            break
+        first, last = batch[0], batch[-1]
+
+        op.execute(user_daily_stats.insert().from_select(
+            ['user_id', 'date', *counters],
+            sa.select(plans.c.user_id, tasks.c.date, *counts())
+            .select_from(tasks.join(plans, tasks.c.plan_id == plans.c.id))
+            .where(plans.c.user_id.between(first, last))
+            .group_by(plans.c.user_id, tasks.c.date)
+        ))
+
+        op.execute(user_topic_stats.insert().from_select(
+            ['user_id', 'topic', *counters],
+            sa.select(plan_topics.c.user_id, plan_topics.c.topic, *counts())
+            .select_from(plan_topics.join(tasks, tasks.c.plan_id == plan_topics.c.plan_id))
+            .where(plan_topics.c.user_id.between(first, last))
+            .group_by(plan_topics.c.user_id, plan_topics.c.topic)
+        ))
+        watermark = last
+
+
+def downgrade():
+    op.drop_table('user_topic_stats')
+    op.drop_table('user_daily_stats')
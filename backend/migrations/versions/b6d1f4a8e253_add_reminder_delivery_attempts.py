@@ -0,0 +1,26 @@
+"""Add reminder delivery attempts
+
+Revision ID: b6d1f4a8e253
+Revises: 9e4b7c2a6d18
+Create Date: 2026-10-19 16:05:41.382107
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6d1f4a8e253'
+down_revision = '9e4b7c2a6d18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('reminders', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('delivery_attempts', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('reminders', schema=None) as batch_op:
+        batch_op.drop_column('delivery_attempts')
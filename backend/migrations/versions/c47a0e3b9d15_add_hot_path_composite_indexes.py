@@ -0,0 +1,34 @@
+"""Add composite indexes for hot query paths
+
+Revision ID: c47a0e3b9d15
+Revises: 8b2e5d9c41f7
+Create Date: 2026-10-19 14:05:51.660218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c47a0e3b9d15'
+down_revision = '8b2e5d9c41f7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_tasks_plan_id_date', 'tasks', ['plan_id', 'date'], unique=False)
+    op.create_index('ix_chat_logs_user_id_session_id_timestamp', 'chat_logs', ['user_id', 'session_id', 'timestamp'], unique=False)
+    op.create_index('ix_reminders_is_active_next_fire_at', 'reminders', ['is_active', 'next_fire_at'], unique=False)
+    op.create_index('ix_reminders_user_id_is_active_next_fire_at', 'reminders', ['user_id', 'is_active', 'next_fire_at'], unique=False)
+    op.create_index('ix_plans_user_id_created_at', 'plans', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_uploads_user_id_created_at', 'uploads', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_uploads_user_id_created_at', table_name='uploads')
+    op.drop_index('ix_plans_user_id_created_at', table_name='plans')
+    op.drop_index('ix_reminders_user_id_is_active_next_fire_at', table_name='reminders')
+    op.drop_index('ix_reminders_is_active_next_fire_at', table_name='reminders')
+    op.drop_index('ix_chat_logs_user_id_session_id_timestamp', table_name='chat_logs')
+    op.drop_index('ix_tasks_plan_id_date', table_name='tasks')
@@ -1,5 +1,5 @@
 from app import create_app, db
-from app.models import User, Plan, Task, Upload, Reminder, ChatLog
+from app.models import User, Plan, Task, PlanTopic, Upload, Question, Answer, Concept, Reminder, ChatLog, UserDailyStats, UserTopicStats
 
 app = create_app()
 
@@ -11,9 +11,15 @@ def make_shell_context():
         'User': User,
         'Plan': Plan,
         'Task': Task,
+        'PlanTopic': PlanTopic,
         'Upload': Upload,
+        'Question': Question,
+        'Answer': Answer,
+        'Concept': Concept,
         'Reminder': Reminder,
-        'ChatLog': ChatLog
+        'ChatLog': ChatLog,
+        'UserDailyStats': UserDailyStats,
+        'UserTopicStats': UserTopicStats
     }
 
 if __name__ == '__main__':
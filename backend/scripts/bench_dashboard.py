@@ -0,0 +1,138 @@
+"""Benchmark for the dashboard endpoint as a user's plan count grows.
+
+For each plan count, a fresh user gets that many plans with a month of tasks
+each in a SQLite database, then GET /api/progress/dashboard is timed and its
+SQL statements counted with the progress cache off, then a cached
+revalidation (If-None-Match answered with 304) is timed. The previous per-plan
+implementation (one task query per plan, counted in Python) is timed alongside
+for comparison.
+
+Usage (from backend/):
+    python scripts/bench_dashboard.py [--plans 10 100 1000] [--tasks-per-plan 30] [--repeat 5]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+_db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+os.environ['DATABASE_URL'] = f'sqlite:///{_db_file.name}'
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from app import create_app, db
+from app.models import User, Plan, Task, PlanTopic
+from app.models.stats import rebuild_stats
+from app.services.progress_cache import progress_cache
+
+def seed_user(email, plans, tasks_per_plan):
+    """Bulk-insert a user with `plans` plans of `tasks_per_plan` daily tasks"""
+    user = User(email=email, password='benchmark')
+    db.session.add(user)
+    db.session.commit()
+    
+    today = date.today()
+    start = today - timedelta(days=tasks_per_plan // 2)
+    plan_ids = db.session.execute(
+        db.insert(Plan).returning(Plan.id, sort_by_parameter_order=True),
+        [
+            {'user_id': user.id, 'title': f'Plan {i}', 'topics': f'["Topic {i % 20}"]',
+             'start_date': start, 'target_date': start + timedelta(days=tasks_per_plan)}
+            for i in range(plans)
+        ]
+    ).scalars().all()
+    db.session.execute(db.insert(PlanTopic), [
+        {'plan_id': plan_id, 'user_id': user.id, 'topic': f'Topic {i % 20}', 'position': 0}
+        for i, plan_id in enumerate(plan_ids)
+    ])
+    db.session.execute(db.insert(Task), [
+        {'plan_id': plan_id, 'date': start + timedelta(days=day), 'title': f'Task {day}',
+         'status': 'completed' if (plan_id + day) % 3 else 'pending', 'order_index': 0}
+        for plan_id in plan_ids
+        for day in range(tasks_per_plan)
+    ])
+    db.session.commit()
+    # Core inserts skip the rollup hooks; backfill like `flask stats rebuild` would
+    rebuild_stats(user_ids=[user.id])
+    return user.id
+
+def legacy_plan_loop(user_id):
+    """The old topics-mastered computation: every plan, then every plan's tasks"""
+    mastered_topics = []
+    for plan in Plan.query.filter_by(user_id=user_id).all():
+        plan_tasks = Task.query.filter_by(plan_id=plan.id).all()
+        if plan_tasks:
+            completion_rate = sum(1 for task in plan_tasks if task.status == 'completed') / len(plan_tasks)
+            if completion_rate >= 0.8:
+                mastered_topics.extend(plan.get_topics())
+    return len(set(mastered_topics))
+
+def timed(function, repeat):
+    """Median wall time in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        db.session.remove()
+        started = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--plans', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--tasks-per-plan', type=int, default=30)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    
+    app = create_app()
+    app.config['PROGRESS_CACHE_BACKEND'] = 'off'
+    client = app.test_client()
+    client.environ_base['HTTP_X_FORWARDED_PROTO'] = 'https'
+    
+    with app.app_context():
+        db.create_all()
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute', lambda *event_args: statements.append(1))
+        
+        print(f"{'plans':>7}{'tasks':>9}{'dashboard ms':>15}{'queries':>9}{'cached 304 ms':>15}"
+              f"{'legacy loop ms':>17}{'queries':>9}")
+        for plans in args.plans:
+            user_id = seed_user(f'bench{plans}@example.com', plans, args.tasks_per_plan)
+            headers = {'Authorization': f'Bearer {create_access_token(identity=str(user_id))}'}
+            
+            def request_dashboard(expected_status=200):
+                response = client.get('/api/progress/dashboard', headers=headers)
+                assert response.status_code == expected_status, response.get_json()
+                return response
+            
+            statements.clear()
+            request_dashboard()
+            dashboard_queries = len(statements)
+            dashboard_ms = timed(request_dashboard, args.repeat)
+            
+            app.config['PROGRESS_CACHE_BACKEND'] = 'memory'
+            headers['If-None-Match'] = request_dashboard().headers['ETag']
+            cached_ms = timed(lambda: request_dashboard(304), args.repeat)
+            app.config['PROGRESS_CACHE_BACKEND'] = 'off'
+            progress_cache.clear()
+            del headers['If-None-Match']
+            
+            statements.clear()
+            legacy_plan_loop(user_id)
+            legacy_queries = len(statements)
+            legacy_ms = timed(lambda: legacy_plan_loop(user_id), args.repeat)
+            
+            print(f'{plans:>7}{plans * args.tasks_per_plan:>9}{dashboard_ms:>15.1f}{dashboard_queries:>9}'
+                  f'{cached_ms:>15.1f}{legacy_ms:>17.1f}{legacy_queries:>9}')
+        
+        db.session.remove()
+        db.drop_all()
+    os.unlink(_db_file.name)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""Microbenchmark for API response serialization.
+
+Builds a large plan (tasks plus plan data) and a large parsed upload in an
+in-memory SQLite database, then times producing their JSON responses with
+each available JSON provider, with and without the serialization cache.
+
+Usage (from backend/):
+    python scripts/bench_serialization.py [--days 120] [--tasks-per-day 5] [--questions 3000] [--repeat 50]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from app import create_app, db
+from app.models import User, Plan, Task, Upload
+from app.utils.serialization import JSON_PROVIDERS, orjson, serialization_cache
+
+def build_fixtures(days, tasks_per_day, questions):
+    """Create one user with a large plan and a large parsed upload"""
+    user = User(email='bench@example.com', password='benchmark')
+    db.session.add(user)
+    db.session.flush()
+    
+    start = date(2025, 1, 1)
+    plan_data = {
+        'title': 'Benchmark plan',
+        'daily_tasks': [
+            {
+                'date': (start + timedelta(days=day)).isoformat(),
+                'tasks': [
+                    {'title': f'Task {day}.{i}', 'description': 'Review the chapter and solve exercises ' * 3}
+                    for i in range(tasks_per_day)
+                ]
+            }
+            for day in range(days)
+        ]
+    }
+    plan = Plan(
+        user_id=user.id,
+        title='Benchmark plan',
+        topics=['Algebra', 'Geometry', 'Calculus'],
+        start_date=start,
+        target_date=start + timedelta(days=days),
+        json_blob=json.dumps(plan_data)
+    )
+    db.session.add(plan)
+    db.session.flush()
+    
+    db.session.execute(db.insert(Task), [
+        {
+            'plan_id': plan.id,
+            'date': start + timedelta(days=day),
+            'title': f'Task {day}.{i}',
+            'description': 'Review the chapter and solve exercises',
+            'order_index': i
+        }
+        for day in range(days)
+        for i in range(tasks_per_day)
+    ])
+    
+    upload = Upload(user_id=user.id, filename='exam.pdf', file_url='/tmp/exam.pdf', file_type='pdf', file_size=1)
+    upload.set_parsed_data({
+        'questions': [
+            {'question': f'{n}. What is the value of x in equation {n}?', 'answers': ['a) 1', 'b) 2', 'c) 3', 'd) 4'],
+             'line_number': n}
+            for n in range(questions)
+        ],
+        'concepts': [{'term': f'Term {n}', 'definition': 'A definition ' * 10} for n in range(questions // 10)],
+        'total_questions': questions,
+        'total_concepts': questions // 10
+    })
+    db.session.add(upload)
+    db.session.commit()
+    return plan.id, upload.id
+
+def load(plan_id, upload_id):
+    """Fresh instances, as a new request would see them"""
+    db.session.expunge_all()
+    plan = db.session.get(Plan, plan_id, options=[db.undefer(Plan.json_blob), db.selectinload(Plan.tasks)])
+    upload = db.session.get(Upload, upload_id, options=[db.undefer(Upload.parsed_json)])
+    return plan, upload
+
+def time_responses(app, plan_id, upload_id, repeat):
+    """Average milliseconds to build both detail responses"""
+    plan, upload = load(plan_id, upload_id)
+    total = 0.0
+    size = 0
+    for _ in range(repeat):
+        # Drop the per-instance decode memo so every round does the full work
+        plan.__dict__.pop('_decoded_json', None)
+        started = time.perf_counter()
+        plan_body = app.json.response({'plan': plan.to_dict()}).get_data()
+        upload_body = app.json.response({'upload': upload.to_dict()}).get_data()
+        total += time.perf_counter() - started
+        size = len(plan_body) + len(upload_body)
+    return total / repeat * 1000, size
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--days', type=int, default=120)
+    parser.add_argument('--tasks-per-day', type=int, default=5)
+    parser.add_argument('--questions', type=int, default=3000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+    
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        plan_id, upload_id = build_fixtures(args.days, args.tasks_per_day, args.questions)
+        
+        print(f'Plan with {args.days * args.tasks_per_day} tasks, upload with {args.questions} questions, '
+              f'{args.repeat} rounds')
+        print(f"{'serializer':<10}{'cache':>8}{'ms/round':>12}{'bytes':>12}")
+        
+        cache_size = app.config['SERIALIZATION_CACHE_SIZE']
+        for name, provider_class in JSON_PROVIDERS.items():
+            if name == 'orjson' and orjson is None:
+                print(f'{name:<10}{"-":>8}{"not installed":>24}')
+                continue
+            app.json = provider_class(app)
+            
+            for cached in (False, True):
+                app.config['SERIALIZATION_CACHE_SIZE'] = cache_size if cached else 0
+                serialization_cache.clear()
+                milliseconds, size = time_responses(app, plan_id, upload_id, args.repeat)
+                print(f"{name:<10}{'on' if cached else 'off':>8}{milliseconds:>12.2f}{size:>12}")
+
+if __name__ == '__main__':
+    main()
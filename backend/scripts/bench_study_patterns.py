@@ -0,0 +1,83 @@
+"""Benchmark for the nightly study pattern analysis over many users.
+
+Users with a month of daily rollup rows are bulk-inserted into a SQLite
+database, then the batched StudyPatternAnalyzer is timed over all of them.
+The per-user task (one query and one commit per user) is timed on a sample
+and extrapolated for comparison.
+
+Usage (from backend/):
+    python scripts/bench_study_patterns.py [--users 100000] [--active-days 20] [--chunk-size 5000] [--sample 500]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+_db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+os.environ['DATABASE_URL'] = f'sqlite:///{_db_file.name}'
+
+from app import create_app, db
+from app.models import User, UserDailyStats, Reminder
+from app.services.study_patterns import StudyPatternAnalyzer
+from app.tasks import analyze_study_patterns
+
+def seed(users, active_days, batch=20000):
+    """Bulk-insert users with `active_days` of daily rollup rows in the last month"""
+    today = date.today()
+    db.session.execute(db.insert(User), [
+        {'email': f'learner{n}@example.com', 'password_hash': 'x'} for n in range(users)
+    ])
+    user_ids = db.session.execute(db.select(User.id)).scalars().all()
+    rows = (
+        {'user_id': user_id, 'date': today - timedelta(days=day), 'total_tasks': 3,
+         'completed_tasks': (user_id + day) % 4}
+        for user_id in user_ids
+        for day in range(min(active_days, 30))
+    )
+    pending = []
+    for row in rows:
+        pending.append(row)
+        if len(pending) == batch:
+            db.session.execute(db.insert(UserDailyStats), pending)
+            pending = []
+    if pending:
+        db.session.execute(db.insert(UserDailyStats), pending)
+    db.session.commit()
+    return user_ids
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--active-days', type=int, default=20)
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument('--sample', type=int, default=500, help='Users timed through the per-user task.')
+    args = parser.parse_args()
+    
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        user_ids = seed(args.users, args.active_days)
+        rows = db.session.query(UserDailyStats).count()
+        print(f'Seeded {len(user_ids)} users, {rows} daily rows in {time.perf_counter() - started:.1f}s')
+        
+        report = StudyPatternAnalyzer(chunk_size=args.chunk_size).run()
+        print(f"batched:  {report['users']} users, {report['reminders']} reminders, {report['chunks']} chunk(s) "
+              f"in {report['seconds']}s ({report['users_per_second']} users/s)")
+        
+        sample = user_ids[:args.sample]
+        started = time.perf_counter()
+        for user_id in sample:
+            analyze_study_patterns(user_id)
+        seconds = time.perf_counter() - started
+        print(f'per-user: {len(sample)} users in {seconds:.2f}s ({len(sample) / seconds:.0f} users/s), '
+              f'~{seconds / len(sample) * len(user_ids):.0f}s extrapolated to {len(user_ids)} users')
+        print(f'Reminders written: {Reminder.query.count()}')
+    
+    os.unlink(_db_file.name)
+
+if __name__ == '__main__':
+    main()
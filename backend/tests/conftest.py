@@ -0,0 +1,79 @@
+import os
+import sys
+import pytest
+
+# Make the backend package importable regardless of where pytest is started
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Tests run against an in-memory SQLite database unless told otherwise
+os.environ['DATABASE_URL'] = os.getenv('TEST_DATABASE_URL', 'sqlite://')
+
+from app import create_app, db
+
+@pytest.fixture
+def app():
+    """Application with a fresh schema for each test"""
+    app = create_app('testing')
+    app.config['TESTING'] = True
+    
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+    
+    # Row ids are reused by the next test's fresh schema
+    from app.utils.serialization import serialization_cache
+    from app.services.progress_cache import progress_cache
+    from app.services.reminder_index import reminder_index
+    from app.services.quiz_builder import quiz_builder
+    serialization_cache.clear()
+    progress_cache.clear()
+    reminder_index.clear()
+    quiz_builder.clear()
+
+@pytest.fixture
+def client(app):
+    """Test client that talks HTTPS so Talisman does not redirect"""
+    client = app.test_client()
+    client.environ_base['HTTP_X_FORWARDED_PROTO'] = 'https'
+    return client
+
+@pytest.fixture
+def user(app):
+    """A registered user"""
+    from app.models import User
+    
+    user = User(email='student@example.com', password='password123')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+@pytest.fixture
+def auth_headers(user):
+    """Authorization header for the test user"""
+    from flask_jwt_extended import create_access_token
+    
+    token = create_access_token(identity=str(user.id))
+    return {'Authorization': f'Bearer {token}'}
+
+@pytest.fixture
+def count_queries(app):
+    """Context manager collecting the SQL statements executed inside it"""
+    from contextlib import contextmanager
+    from sqlalchemy import event
+    
+    @contextmanager
+    def counter():
+        statements = []
+        
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+    
+    return counter
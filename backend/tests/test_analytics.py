@@ -0,0 +1,59 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from app.services.analytics import DailySeries
+
+START = date(2025, 6, 1)
+
+def series_for(*users):
+    """Series for users given as lists of (total, completed) per day from START"""
+    rows = [
+        (user_id, START + timedelta(days=day), total, completed)
+        for user_id, days in enumerate(users, 1)
+        for day, (total, completed) in enumerate(days)
+    ]
+    end = START + timedelta(days=max(len(days) for days in users) - 1)
+    return DailySeries.from_rows(range(1, len(users) + 1), START, end, rows)
+
+def reference_consistency(daily_counts):
+    """The score as the dashboard used to compute it, over days with tasks"""
+    if not daily_counts:
+        return 0
+    mean_count = sum(daily_counts) / len(daily_counts)
+    variance = sum((count - mean_count) ** 2 for count in daily_counts) / len(daily_counts)
+    return min(100, max(0, 100 - variance * 10))
+
+def test_metrics_for_one_user():
+    series = series_for([(2, 2), (0, 0), (3, 1), (2, 2), (4, 0), (2, 1)])
+    metrics = series.summaries(window=3)[1]
+    
+    assert metrics['total_tasks'] == 13 and metrics['completed_tasks'] == 6
+    assert metrics['active_days'] == 5
+    assert metrics['consistency_score'] == pytest.approx(reference_consistency([2, 3, 2, 4, 2]))
+    assert metrics['average_completion_rate'] == pytest.approx((1 + 1 / 3 + 1 + 0 + 0.5) / 5)
+    # Days 3-4 are the longest run with completions; the current run is just the last day
+    assert (metrics['current_streak'], metrics['longest_streak']) == (1, 2)
+    assert metrics['rolling_completion_rate'] == pytest.approx(3 / 8)
+    
+    days = np.array([0, 2, 3, 4, 5])
+    rates = np.array([1, 1 / 3, 1, 0, 0.5])
+    assert metrics['completion_trend'] == pytest.approx(np.polyfit(days, rates, 1)[0])
+
+def test_cohort_matrix_matches_single_user_series():
+    users = [
+        [(1, 1), (1, 1), (1, 0), (1, 1)],
+        [(0, 0), (0, 0), (0, 0), (0, 0)],
+        [(5, 5), (1, 1), (3, 3), (0, 0)],
+    ]
+    cohort = series_for(*users)
+    assert cohort.total.shape == (3, 4)
+    
+    summaries = cohort.summaries()
+    for user_id, days in enumerate(users, 1):
+        assert summaries[user_id] == pytest.approx(series_for(days).summaries()[1])
+    
+    assert summaries[2]['consistency_score'] == 0 and summaries[2]['rolling_completion_rate'] is None
+    # Today has no completions yet, so user 3's streak still counts the three days before it
+    assert summaries[3]['current_streak'] == 3
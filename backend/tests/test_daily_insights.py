@@ -0,0 +1,74 @@
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from app import db
+from app.models import User, Plan, Task, Reminder
+from app.services.daily_insights import DailyInsightPipeline, DAILY_INSIGHT_TITLE
+
+NOW = datetime(2025, 6, 2, 3, 0)
+TODAY = NOW.date()
+
+def add_user(email, persona, titles):
+    """A user with a plan whose tasks for today have these titles"""
+    user = User(email=email, password='password123', persona=persona)
+    db.session.add(user)
+    db.session.flush()
+    plan = Plan(user_id=user.id, title='Template', topics=['Cells'], start_date=TODAY, target_date=TODAY + timedelta(days=7))
+    db.session.add(plan)
+    db.session.flush()
+    db.session.add_all(Task(plan_id=plan.id, date=TODAY, title=title) for title in titles)
+    db.session.commit()
+    return user.id
+
+class FakeModel:
+    """Records calls and the most groups generated at once"""
+    
+    def __init__(self, fail_persona=None):
+        self.calls = []
+        self.running = self.peak = 0
+        self.fail_persona = fail_persona
+        self.lock = threading.Lock()
+    
+    def __call__(self, titles, persona):
+        with self.lock:
+            self.calls.append((persona, tuple(titles)))
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(0.01)
+        with self.lock:
+            self.running -= 1
+        if persona == self.fail_persona:
+            raise RuntimeError('rate limited')
+        return f'{persona}: {len(titles)} tasks'
+
+def test_one_model_call_per_persona_and_task_set(app):
+    for n in range(6):
+        # Same template tasks, written slightly differently and in another order
+        add_user(f's{n}@example.com', 'student', ['Read chapter 1', 'Quiz'] if n % 2 else ['quiz', ' read  Chapter 1'])
+    add_user('c@example.com', 'college', ['Read chapter 1', 'Quiz'])
+    add_user('p@example.com', 'student', ['Lab report'])
+    add_user('idle@example.com', 'student', [])
+    
+    model = FakeModel()
+    report = DailyInsightPipeline(generate=model, concurrency=2, chunk_size=3).run(now=NOW)
+    
+    assert (report['users'], report['groups'], report['reminders']) == (8, 3, 8)
+    assert len(model.calls) == 3 and model.peak <= 2
+    contents = {reminder.user.email: reminder.content for reminder in Reminder.query.filter_by(title=DAILY_INSIGHT_TITLE)}
+    assert contents['s0@example.com'] == contents['s5@example.com'] == 'student: 2 tasks'
+    assert contents['c@example.com'] == 'college: 2 tasks' and 'idle@example.com' not in contents
+    
+    # A rerun the same day only covers users still missing their insight
+    assert DailyInsightPipeline(generate=model).run(now=NOW)['users'] == 0
+
+def test_failed_group_does_not_block_the_others(app):
+    add_user('s@example.com', 'student', ['Quiz'])
+    add_user('c@example.com', 'college', ['Quiz'])
+    
+    report = DailyInsightPipeline(generate=FakeModel(fail_persona='college')).run(now=NOW)
+    
+    assert (report['reminders'], report['failed_groups']) == (1, 1)
+    assert report['errors'] == ['college group of 1 user(s): rate limited']
+    # The failed group is picked up by the next run
+    assert DailyInsightPipeline(generate=FakeModel()).run(now=NOW)['reminders'] == 1
@@ -0,0 +1,162 @@
+import gzip
+import io
+import json
+from datetime import date, timedelta
+
+from app import db
+from app.models import User, Plan, Task, Upload, Question, Reminder, ChatLog, UserDailyStats
+from app.services.data_export import DataExporter, DataImporter, IdMap
+
+def add_account_data(user_id):
+    """A plan with tasks, an upload with parsed questions, a task reminder and chat history"""
+    plan = Plan(user_id=user_id, title='Biology', topics=['Cells', 'Genetics'],
+                start_date=date.today() - timedelta(days=2), target_date=date.today())
+    db.session.add(plan)
+    db.session.flush()
+    tasks = [Task(plan_id=plan.id, date=date.today() - timedelta(days=day), title=f'Task {day}') for day in range(3)]
+    tasks[0].status = 'completed'
+    db.session.add_all(tasks)
+    
+    upload = Upload(user_id=user_id, filename='exam.pdf', file_url='/uploads/exam.pdf', file_type='pdf', file_size=10)
+    db.session.add(upload)
+    db.session.flush()
+    upload.set_parsed_data({
+        'questions': [{'question': 'What is DNA?', 'answers': ['A molecule', 'A cell']}],
+        'concepts': [{'term': 'Cell', 'definition': 'Basic unit of life'}]
+    })
+    Question.replace_for_upload(upload, upload.get_parsed_data())
+    
+    db.session.add(Reminder(user_id=user_id, title='Review', content='Review task 1', task_id=tasks[1].id))
+    db.session.add(ChatLog(user_id=user_id, session_id='s1', role='user', content='Hello'))
+    db.session.commit()
+
+def read_export(chunks):
+    """Header and rows of a gzip export"""
+    lines = gzip.decompress(b''.join(chunks)).decode('utf-8').splitlines()
+    return json.loads(lines[0]), [json.loads(line) for line in lines[1:]]
+
+def test_export_endpoint_streams_only_the_users_rows(client, user, auth_headers):
+    add_account_data(user.id)
+    other = User(email='other@example.com', password='password123')
+    db.session.add(other)
+    db.session.commit()
+    add_account_data(other.id)
+    
+    response = client.get('/api/data/export', headers=auth_headers)
+    assert response.status_code == 200
+    assert response.mimetype == 'application/gzip' and response.is_streamed
+    header, records = read_export(response.response)
+    
+    assert (header['format'], header['scope']) == ('pla-export', 'user')
+    tables = [record['table'] for record in records]
+    assert tables == ['users', 'plans', 'plan_topics', 'plan_topics', 'tasks', 'tasks', 'tasks', 'uploads',
+                      'questions', 'answers', 'answers', 'concepts', 'reminders', 'chat_logs']
+    assert 'password_hash' not in records[0]['row']
+    assert all(record['row'].get('user_id', user.id) == user.id for record in records)
+
+def test_import_into_another_account_remaps_references(app, user):
+    add_account_data(user.id)
+    export = b''.join(DataExporter(user_id=user.id, chunk_size=2).stream())
+    
+    target = User(email='new@example.com', password='password123')
+    db.session.add(target)
+    db.session.commit()
+    report = DataImporter(chunk_size=2, user_id=target.id).import_file(io.BytesIO(export))
+    
+    assert report['rows'] == 14 and report['tables']['tasks'] == 3
+    plan = Plan.query.filter_by(user_id=target.id).one()
+    assert plan.get_topics() == ['Cells', 'Genetics'] and len(plan.tasks) == 3
+    reminder = Reminder.query.filter_by(user_id=target.id).one()
+    assert reminder.task_id in {task.id for task in plan.tasks} and reminder.next_fire_at is not None
+    question = Question.query.filter_by(user_id=target.id).one()
+    assert [answer.text for answer in question.answers] == ['A molecule', 'A cell']
+    # Core inserts skip the rollup hooks, so the import rebuilds them
+    assert db.session.query(db.func.sum(UserDailyStats.completed_tasks)).filter_by(user_id=target.id).scalar() == 1
+
+def test_cli_round_trip_recreates_accounts(app, user, tmp_path):
+    add_account_data(user.id)
+    path = str(tmp_path / 'export.ndjson.gz')
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['data', 'export', path])
+    assert result.exit_code == 0, result.output
+    
+    db.drop_all()
+    db.create_all()
+    result = runner.invoke(args=['data', 'import', path])
+    assert result.exit_code == 0, result.output
+    
+    restored = User.query.filter_by(email='student@example.com').one()
+    assert restored.check_password('password123')
+    assert Task.query.join(Plan).filter(Plan.user_id == restored.id).count() == 3
+
+def test_invalid_import_writes_nothing(client, user, auth_headers):
+    lines = [
+        {'format': 'pla-export', 'version': 1},
+        {'table': 'plans', 'row': {'id': 1, 'user_id': 1, 'title': 'Plan', 'topics': '[]',
+                                   'start_date': '2025-01-01', 'target_date': '2025-01-05'}},
+        {'table': 'tasks', 'row': {'id': 1, 'plan_id': 1, 'date': 'soon', 'title': 'Task'}},
+        {'table': 'secrets', 'row': {'id': 1}},
+    ]
+    export = gzip.compress(''.join(json.dumps(line) + '\n' for line in lines).encode())
+    response = client.post('/api/data/import', headers=auth_headers,
+                           data={'file': (io.BytesIO(export), 'export.ndjson.gz')})
+    
+    assert response.status_code == 400
+    assert response.get_json()['details'] == ["Line 3: invalid date 'soon'", "Line 4: unknown table 'secrets'"]
+    assert Plan.query.count() == 0
+    
+    response = client.post('/api/data/import', headers=auth_headers,
+                           data={'file': (io.BytesIO(b'not gzip'), 'export.ndjson.gz')})
+    assert response.status_code == 400
+
+def test_unresolved_reference_is_rejected_before_writing(client, user, auth_headers):
+    add_account_data(user.id)
+    header, records = read_export(DataExporter(user_id=user.id).stream())
+    
+    def post(records):
+        lines = [header] + records
+        export = gzip.compress(''.join(json.dumps(line) + '\n' for line in lines).encode())
+        return client.post('/api/data/import', headers=auth_headers, data={'file': (io.BytesIO(export), 'export.ndjson.gz')})
+    
+    broken = json.loads(json.dumps(records))
+    task_line = next(number for number, record in enumerate(broken, 2) if record['table'] == 'tasks')
+    broken[task_line - 2]['row']['plan_id'] = 999
+    response = post(broken)
+    assert response.status_code == 400
+    assert response.get_json()['details'] == [f'Line {task_line}: plan_id 999 is not in the export']
+    # The plans before the bad task were not committed either
+    assert (Plan.query.count(), Task.query.count()) == (1, 3)
+    
+    # So a corrected retry imports exactly one copy, and quizzes see the new questions
+    from app.services.quiz_builder import quiz_builder
+    assert quiz_builder.pool_size(user.id) == 1
+    assert post(records).status_code == 201
+    assert (Plan.query.count(), Task.query.count()) == (2, 6)
+    assert quiz_builder.pool_size(user.id) == 2
+
+def test_imported_uploads_never_point_at_server_files(client, user, auth_headers, tmp_path):
+    client.application.config['UPLOAD_FOLDER'] = str(tmp_path / 'uploads')
+    victim = tmp_path / 'victim.txt'
+    victim.write_text('not yours')
+    add_account_data(user.id)
+    header, records = read_export(DataExporter(user_id=user.id).stream())
+    for record in records:
+        if record['table'] == 'uploads':
+            record['row']['file_url'] = str(victim)
+    export = gzip.compress(''.join(json.dumps(line) + '\n' for line in [header] + records).encode())
+    
+    response = client.post('/api/data/import', headers=auth_headers, data={'file': (io.BytesIO(export), 'export.ndjson.gz')})
+    assert response.status_code == 201
+    upload = Upload.query.order_by(Upload.id.desc()).first()
+    assert (upload.file_url, upload.status) == ('', 'failed')
+    assert Question.query.filter_by(upload_id=upload.id).count() == 1
+    
+    assert client.post(f'/api/uploads/uploads/{upload.id}/reparse', headers=auth_headers).status_code == 404
+    assert client.delete(f'/api/uploads/uploads/{upload.id}', headers=auth_headers).status_code == 200
+    assert victim.read_text() == 'not yours'
+
+def test_id_map_lookups():
+    id_map = IdMap()
+    for old_id, new_id in [(3, 10), (7, 11), (8, 12)]:
+        id_map.add(old_id, new_id)
+    assert [id_map.get(old_id) for old_id in (3, 7, 8, 5, 9)] == [10, 11, 12, None, None]
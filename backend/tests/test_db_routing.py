@@ -0,0 +1,86 @@
+import os
+from datetime import date
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app import create_app, db
+from app.models import User, Plan
+from app.utils import db_routing
+
+@pytest.fixture
+def replica_app(monkeypatch):
+    """Application whose 'replica' bind is a separate, initially empty database"""
+    monkeypatch.setenv('DATABASE_REPLICA_URL', 'sqlite://')
+    app = create_app('testing')
+    app.config['TESTING'] = True
+    
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(db.engines['replica'])
+        yield app
+        db.session.remove()
+        db.drop_all()
+    db_routing._recent_writes.clear()
+    
+    # The bind's metadata is registered on the shared extension; later apps have no replica
+    db.metadatas.pop('replica', None)
+
+def add_plan(user_id, title):
+    """A plan with no tasks"""
+    plan = Plan(user_id=user_id, title=title, topics=['Algebra'], start_date=date(2025, 6, 1),
+                target_date=date(2025, 6, 8))
+    db.session.add(plan)
+    return plan
+
+def test_reads_use_replica_and_writes_use_primary(replica_app):
+    user = User(email='student@example.com', password='password123')
+    db.session.add(user)
+    db.session.commit()
+    user_id = user.id
+    
+    with db.session().using_replica():
+        # Users only exist on the primary, so the replica read finds nothing
+        assert User.query.count() == 0
+        add_plan(user_id, 'Written inside a replica block')
+        db.session.commit()
+    
+    assert Plan.query.count() == 1
+
+def test_recent_writers_read_their_writes(replica_app):
+    user = User(email='student@example.com', password='password123')
+    db.session.add(user)
+    db.session.commit()
+    headers = {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+    client = replica_app.test_client()
+    client.environ_base['HTTP_X_FORWARDED_PROTO'] = 'https'
+    
+    # Seeded without a request, so no read-your-writes pin: served by the empty replica
+    add_plan(user.id, 'Algebra')
+    db.session.commit()
+    db.session.remove()
+    assert client.get('/api/planner/plans', headers=headers).get_json()['plans'] == []
+    
+    response = client.post('/api/planner/import', headers=headers, json=[
+        {'title': 'Geometry', 'topics': ['Geometry'], 'start_date': '2025-06-01'}
+    ])
+    assert response.status_code == 201
+    
+    plans = client.get('/api/planner/plans', headers=headers).get_json()['plans']
+    assert [plan['title'] for plan in plans] == ['Geometry', 'Algebra']
+
+@pytest.mark.skipif(not os.getenv('TEST_REDIS_URL'), reason='TEST_REDIS_URL is not set')
+def test_write_markers_reach_every_worker_through_redis(replica_app):
+    import redis
+    redis.Redis.from_url(os.environ['TEST_REDIS_URL']).flushdb()
+    replica_app.config.update(REPLICA_READ_YOUR_WRITES_SYNC='redis', REDIS_URL=os.environ['TEST_REDIS_URL'])
+    db_routing.note_write(7)
+    db_routing._recent_writes.clear()  # As seen from a worker that did not handle the write
+    assert db_routing.wrote_recently(7)
+    assert not db_routing.wrote_recently(8)
+
+def test_unreachable_marker_store_falls_back_to_this_worker(replica_app):
+    replica_app.config.update(REPLICA_READ_YOUR_WRITES_SYNC='redis', REDIS_URL='redis://127.0.0.1:1/0')
+    db_routing.note_write(7)  # Logged, not raised
+    assert db_routing.wrote_recently(7)
+    assert not db_routing.wrote_recently(8)
@@ -0,0 +1,111 @@
+import zipfile
+
+import pytest
+
+from app.services import file_parser
+from app.services.file_parser import (
+    FileParser, PDFBackend, PyPDF2Backend, PDFiumBackend, PDF_BACKENDS, DEFAULT_PDF_BACKEND,
+    get_pdf_backend, calibrate_pdf_backends
+)
+
+W = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+
+def paragraph(*runs):
+    """A w:p element whose runs hold the given XML fragments"""
+    return '<w:p>' + ''.join(f'<w:r>{run}</w:r>' for run in runs) + '</w:p>'
+
+def write_docx(path, body):
+    """Minimal .docx holding only word/document.xml"""
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('word/document.xml', f'<w:document xmlns:w="{W}"><w:body>{body}</w:body></w:document>')
+    return str(path)
+
+def test_docx_text_keeps_document_order_and_table_cells(tmp_path):
+    body = (
+        paragraph('<w:t>1. What is the powerhouse of the cell?</w:t>')
+        + '<w:tbl><w:tr>'
+        + '<w:tc>' + paragraph('<w:t>A. Mitochondria</w:t>') + '</w:tc>'
+        + '<w:tc>' + paragraph('<w:t>B. </w:t>', '<w:t>Nucleus</w:t>') + '</w:tc>'
+        + '</w:tr></w:tbl>'
+        + paragraph('<w:t>Tab</w:t><w:tab/><w:t>bed</w:t>', '<w:br/><w:t>line</w:t>')
+    )
+    path = write_docx(tmp_path / 'quiz.docx', body)
+    
+    parser = FileParser()
+    assert list(parser.iter_docx_text(path)) == [
+        '1. What is the powerhouse of the cell?', 'A. Mitochondria', 'B. Nucleus', 'Tab\tbed\nline'
+    ]
+    assert 'error' not in parser.parse_docx(path)
+
+def test_empty_and_broken_docx(tmp_path):
+    parser = FileParser()
+    empty = write_docx(tmp_path / 'empty.docx', '')
+    assert list(parser.iter_docx_text(empty)) == []
+    assert parser.parse_docx(empty)['questions'] == []
+    
+    broken = tmp_path / 'broken.docx'
+    broken.write_bytes(b'not a zip')
+    assert parser.parse_docx(str(broken))['error'].startswith('Failed to parse DOCX')
+
+def write_pdf(path, lines):
+    """Single-page PDF with one line of Helvetica text per entry"""
+    stream = 'BT /F1 12 Tf 72 720 Td 14 TL ' + ' '.join(f'({line}) Tj T*' for line in lines) + ' ET'
+    objects = [
+        '<< /Type /Catalog /Pages 2 0 R >>',
+        '<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        '<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R /Resources << /Font << /F1 5 0 R >> >> >>',
+        f'<< /Length {len(stream)} >>\nstream\n{stream}\nendstream',
+        '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    ]
+    data = b'%PDF-1.4\n'
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += f'{number} 0 obj\n{body}\nendobj\n'.encode()
+    xref = len(data)
+    data += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode()
+    data += ''.join(f'{offset:010d} 00000 n \n' for offset in offsets).encode()
+    data += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode()
+    path.write_bytes(data)
+    return str(path)
+
+class UpperCaseBackend(PDFBackend):
+    """Installed stand-in that extracts different text than the reference"""
+    name = 'upper'
+    module = 'json'
+    
+    def extract_pages(self, file_path):
+        for page in PyPDF2Backend().extract_pages(file_path):
+            yield page.upper()
+
+def test_pdf_backend_selection(monkeypatch):
+    assert FileParser().pdf_backend == DEFAULT_PDF_BACKEND == 'pypdf2'
+    assert isinstance(get_pdf_backend(), PyPDF2Backend)
+    with pytest.raises(ValueError):
+        get_pdf_backend('nope')
+    
+    monkeypatch.setitem(PDF_BACKENDS, 'upper', UpperCaseBackend)
+    monkeypatch.setattr(file_parser, 'PDF_BACKEND_PREFERENCE', ['pypdfium2', 'upper', 'pypdf2'])
+    # 'auto' is opt-in and takes the fastest installed backend
+    assert isinstance(get_pdf_backend('auto'), UpperCaseBackend)
+    if not PDFiumBackend().is_available():
+        with pytest.raises(RuntimeError):
+            get_pdf_backend('pypdfium2')
+    with pytest.raises(TypeError):
+        PDFBackend()
+
+def test_calibration_compares_backends_and_skips_unreadable_files(tmp_path, monkeypatch):
+    monkeypatch.setitem(PDF_BACKENDS, 'upper', UpperCaseBackend)
+    monkeypatch.setattr(file_parser, 'PDF_BACKEND_PREFERENCE', ['upper', 'pypdf2'])
+    exam = write_pdf(tmp_path / 'exam.pdf', ['Photosynthesis: The process plants use to make food'])
+    broken = tmp_path / 'broken.pdf'
+    broken.write_bytes(b'%PDF-1.4 truncated')
+    
+    report = calibrate_pdf_backends([exam, str(broken)])
+    
+    assert report['reference'] == 'pypdf2' and report['files'] == 1
+    assert report['skipped'][0].startswith('broken.pdf: ')
+    results = {result['backend']: result for result in report['results']}
+    assert results['pypdf2']['matching_files'] == 1 and results['pypdf2']['text_similarity'] == 1.0
+    assert results['upper']['matching_files'] == 0
+    assert report['recommended'] == 'pypdf2'
@@ -0,0 +1,113 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models import Plan, Upload, ChatLog
+
+CREATED = datetime(2026, 1, 1, 12, 0)
+
+def add_plans(user_id, count):
+    # Pairs of plans share a timestamp so the id tiebreaker decides their order
+    plans = [Plan(user_id, f'Plan {index}', ['Biology'], date(2026, 1, 1), date(2026, 2, 1)) for index in range(count)]
+    for index, plan in enumerate(plans):
+        plan.created_at = CREATED + timedelta(minutes=index // 2)
+    db.session.add_all(plans)
+    db.session.commit()
+    return plans
+
+def add_uploads(user_id, count):
+    uploads = [Upload(user_id, f'exam{index}.pdf', f'/uploads/exam{index}.pdf', 'pdf', 10) for index in range(count)]
+    for upload in uploads:
+        upload.created_at = CREATED
+    db.session.add_all(uploads)
+    db.session.commit()
+    return uploads
+
+def add_messages(user_id, count, session_id='session-1', start=CREATED):
+    messages = [ChatLog(user_id, session_id, 'user', f'Message {index}') for index in range(count)]
+    for index, message in enumerate(messages):
+        message.timestamp = start + timedelta(seconds=index // 2)
+    db.session.add_all(messages)
+    db.session.commit()
+    return messages
+
+def walk(client, headers, url, key, limit):
+    """Follow next_cursor to the end; returns the ids of every page"""
+    pages = []
+    cursor = None
+    while True:
+        params = {'limit': limit, **({'cursor': cursor} if cursor else {})}
+        response = client.get(url, headers=headers, query_string=params)
+        assert response.status_code == 200
+        body = response.get_json()
+        pages.append([item['id'] for item in body[key]])
+        cursor = body['next_cursor']
+        if cursor is None:
+            return pages
+
+@pytest.mark.parametrize('url, key, add', [
+    ('/api/planner/plans', 'plans', add_plans),
+    ('/api/uploads/uploads', 'uploads', add_uploads),
+])
+def test_cursor_round_trip_has_no_duplicates_or_gaps(client, user, auth_headers, url, key, add):
+    rows = add(user.id, 7)
+    newest_first = [row.id for row in sorted(rows, key=lambda row: (row.created_at, row.id), reverse=True)]
+    
+    pages = walk(client, auth_headers, url, key, limit=3)
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert [item_id for page in pages for item_id in page] == newest_first
+    
+    # A page that ends exactly on the last row has no cursor after it
+    assert [len(page) for page in walk(client, auth_headers, url, key, limit=7)] == [7]
+
+@pytest.mark.parametrize('url', [
+    '/api/planner/plans', '/api/uploads/uploads', '/api/ai/chat/history/session-1'
+])
+@pytest.mark.parametrize('cursor', ['not-a-cursor', 'WyJub3QgYSBkYXRlIiwgMV0', 'WzFd'])
+def test_invalid_cursor_is_a_bad_request(client, user, auth_headers, url, cursor):
+    param = 'before' if 'history' in url else 'cursor'
+    response = client.get(url, headers=auth_headers, query_string={param: cursor})
+    assert response.status_code == 400
+    assert response.get_json()['error'].startswith('Invalid cursor')
+
+def history(client, headers, **params):
+    response = client.get('/api/ai/chat/history/session-1', headers=headers, query_string=params)
+    assert response.status_code == 200
+    return response.get_json()
+
+def test_chat_history_pages_back_with_before(client, user, auth_headers):
+    messages = add_messages(user.id, 7)
+    add_messages(user.id, 3, session_id='other-session')
+    
+    seen = []
+    body = history(client, auth_headers, limit=3)
+    while True:
+        page = [message['id'] for message in body['messages']]
+        seen = page + seen
+        if body['previous_cursor'] is None:
+            break
+        body = history(client, auth_headers, limit=3, before=body['previous_cursor'])
+    assert seen == [message.id for message in messages]
+
+def test_chat_history_since_returns_only_new_messages(client, user, auth_headers):
+    add_messages(user.id, 4)
+    body = history(client, auth_headers)
+    latest = body['latest_cursor']
+    assert latest and len(body['messages']) == 4
+    
+    # Nothing new: the same cursor comes back
+    body = history(client, auth_headers, since=latest)
+    assert body['messages'] == [] and body['latest_cursor'] == latest
+    
+    # New messages arrive oldest first, a page at a time, including ones sharing the last timestamp
+    new = add_messages(user.id, 5, start=CREATED + timedelta(seconds=1))
+    delta = []
+    while True:
+        body = history(client, auth_headers, since=latest, limit=2)
+        if not body['messages']:
+            break
+        assert body['previous_cursor'] is None
+        delta += [message['id'] for message in body['messages']]
+        latest = body['latest_cursor']
+    assert delta == [message.id for message in new]
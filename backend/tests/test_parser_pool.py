@@ -0,0 +1,99 @@
+import os
+import signal
+import time
+
+import pytest
+
+from app.services.parser_pool import ParserPool
+
+def echo(file_path, file_type, parser_options):
+    return {'questions': [file_path], 'concepts': []}
+
+def slow(file_path, file_type, parser_options):
+    if file_path == 'slow':
+        time.sleep(30)
+    return echo(file_path, file_type, parser_options)
+
+def hungry(file_path, file_type, parser_options):
+    if file_path == 'hungry':
+        # Touch every page so the memory counts as resident
+        blocks = [bytearray(64 * 1024 * 1024) for _ in range(4)]
+        for block in blocks:
+            block[::4096] = b'x' * len(block[::4096])
+        time.sleep(30)
+    return echo(file_path, file_type, parser_options)
+
+def spike(file_path, file_type, parser_options):
+    if file_path == 'spike':
+        bytearray(1536 * 1024 * 1024)
+    return echo(file_path, file_type, parser_options)
+
+def spin(file_path, file_type, parser_options):
+    while file_path == 'spin':
+        pass
+    return echo(file_path, file_type, parser_options)
+
+def killed(file_path, file_type, parser_options):
+    if file_path == 'killed':
+        os.kill(os.getpid(), signal.SIGKILL)  # As the out-of-memory killer would
+    return echo(file_path, file_type, parser_options)
+
+@pytest.fixture
+def pool_config(app):
+    app.config.update(PARSER_MAX_WORKERS=1, PARSER_WALL_SECONDS=5, PARSER_CPU_SECONDS=10, PARSER_MAX_RSS_MB=512,
+                      PARSER_MAX_ADDRESS_SPACE_MB=2048, PARSER_QUEUE_TIMEOUT=1, PARSER_MAX_TASKS_PER_WORKER=3)
+    return app.config
+
+def run(pool, *paths):
+    try:
+        return [pool.parse(path, 'pdf') for path in paths]
+    finally:
+        pool.shutdown()
+
+def test_workers_are_reused_and_recycled(pool_config):
+    pool = ParserPool(target=echo)
+    pids = []
+    for n in range(4):
+        assert pool.parse(f'file{n}', 'pdf')['questions'] == [f'file{n}']
+        pids.append((pool._idle or [None])[0] and pool._idle[0].process.pid)
+    pool.shutdown()
+    # Three files share a worker, then it is replaced
+    assert pids[0] == pids[1] and pids[2] is None and pids[3] not in (None, pids[0])
+
+def test_wall_time_limit_kills_the_worker_and_the_pool_recovers(pool_config):
+    pool_config['PARSER_WALL_SECONDS'] = 1
+    slow_result, next_result = run(ParserPool(target=slow), 'slow', 'next')
+    assert slow_result['error'] == 'Parsing exceeded the 1s time limit'
+    assert next_result['questions'] == ['next']
+
+def test_cpu_limit_applies_to_each_file(pool_config):
+    pool_config.update(PARSER_CPU_SECONDS=1, PARSER_WALL_SECONDS=20)
+    spin_result, next_result = run(ParserPool(target=spin), 'spin', 'next')
+    assert spin_result['error'] == 'Parsing exceeded the 1s CPU time limit'
+    assert next_result['questions'] == ['next']
+
+def test_outside_kill_is_not_reported_as_a_cpu_overrun(pool_config):
+    result, next_result = run(ParserPool(target=killed), 'killed', 'next')
+    assert result['error'] == 'Parser was killed (SIGKILL), most likely for running out of memory'
+    assert next_result['questions'] == ['next']
+
+def test_address_space_cap_stops_allocation_spikes(pool_config):
+    pool_config.update(PARSER_MAX_ADDRESS_SPACE_MB=1024, PARSER_MAX_RSS_MB=0)
+    result, next_result = run(ParserPool(target=spike), 'spike', 'next')
+    assert result['error'] == 'Parsing exceeded the 1024MB memory limit'
+    assert next_result['questions'] == ['next']
+
+def test_resident_memory_watchdog_kills_the_worker(pool_config):
+    pool_config.update(PARSER_MAX_ADDRESS_SPACE_MB=0, PARSER_MAX_RSS_MB=128)
+    result, next_result = run(ParserPool(target=hungry), 'hungry', 'next')
+    assert result['error'] == 'Parsing exceeded the 128MB memory limit'
+    assert next_result['questions'] == ['next']
+
+def test_full_pool_times_out_waiting_for_a_worker(pool_config):
+    pool = ParserPool(target=echo)
+    worker = pool._acquire(pool_config)
+    try:
+        assert pool.parse('file', 'pdf')['error'] == 'Parser queue is full, please retry later'
+    finally:
+        worker.stop()
+        pool._discard()
@@ -0,0 +1,127 @@
+import io
+from datetime import date, timedelta
+
+from app import db
+from app.models import Plan, Task, PlanTopic
+
+def create_plans(user_id, count, tasks_per_plan=7):
+    """Create plans with a week of tasks each"""
+    start = date(2025, 6, 1)
+    for i in range(count):
+        plan = Plan(
+            user_id=user_id,
+            title=f'Plan {i}',
+            topics=['Algebra', 'Geometry'],
+            start_date=start,
+            target_date=start + timedelta(days=tasks_per_plan),
+            json_blob='{"title": "Plan"}'
+        )
+        db.session.add(plan)
+        db.session.flush()
+        for day in range(tasks_per_plan):
+            db.session.add(Task(plan_id=plan.id, date=start + timedelta(days=day), title=f'Task {day}'))
+    db.session.commit()
+    db.session.expunge_all()
+
+def plan_list_statements(client, auth_headers, count_queries, params=''):
+    """SQL statements issued by one plan listing request"""
+    with count_queries() as statements:
+        response = client.get(f'/api/planner/plans?limit=100{params}', headers=auth_headers)
+    assert response.status_code == 200
+    return statements, response.get_json()['plans']
+
+def test_plan_listing_query_count_is_constant(client, user, auth_headers, count_queries):
+    user_id = user.id
+    create_plans(user_id, 2)
+    few_statements, plans = plan_list_statements(client, auth_headers, count_queries, '&expand=tasks')
+    assert len(plans) == 2
+    
+    create_plans(user_id, 30)
+    many_statements, plans = plan_list_statements(client, auth_headers, count_queries, '&expand=tasks')
+    assert len(plans) == 32
+    assert all(len(plan['tasks']) == 7 for plan in plans)
+    
+    assert len(many_statements) == len(few_statements)
+    # One query for the plans and one batched query for all of their tasks
+    assert len(many_statements) <= 2
+
+def test_plan_listing_summary_skips_heavy_columns(client, user, auth_headers, count_queries):
+    create_plans(user.id, 3)
+    statements, plans = plan_list_statements(client, auth_headers, count_queries)
+    
+    assert all('json_blob' not in statement for statement in statements)
+    assert all('tasks' not in plan and 'plan_data' not in plan for plan in plans)
+    assert all(plan['total_tasks'] == 7 and plan['completed_tasks'] == 0 for plan in plans)
+    # One query for the plans and one grouped query for their task counts
+    assert len(statements) == 2
+
+def test_plan_detail_projection(client, user, auth_headers):
+    create_plans(user.id, 1)
+    plan_id = Plan.query.first().id
+    
+    full = client.get(f'/api/planner/plans/{plan_id}', headers=auth_headers).get_json()['plan']
+    assert full['plan_data'] == {'title': 'Plan'} and len(full['tasks']) == 7
+    
+    summary = client.get(f'/api/planner/plans/{plan_id}?fields=summary&expand=plan_data',
+                         headers=auth_headers).get_json()['plan']
+    assert summary['plan_data'] == {'title': 'Plan'} and 'tasks' not in summary
+    assert summary['total_tasks'] == 7
+    
+    response = client.get(f'/api/planner/plans/{plan_id}?expand=owner', headers=auth_headers)
+    assert response.status_code == 400
+
+def test_topic_stats_are_grouped_in_sql(app, user):
+    user_id = user.id
+    create_plans(user_id, 2, tasks_per_plan=5)
+    plan = Plan(user_id=user_id, title='Physics', topics=['Physics', ' Algebra ', 'Physics'],
+                start_date=date(2025, 6, 1), target_date=date(2025, 6, 5))
+    db.session.add(plan)
+    db.session.flush()
+    for day in range(4):
+        task = Task(plan_id=plan.id, date=date(2025, 6, 1) + timedelta(days=day), title=f'Task {day}')
+        task.status = 'completed'
+        db.session.add(task)
+    db.session.commit()
+    
+    assert [row.topic for row in plan.topic_rows] == ['Physics', 'Algebra']
+    assert [tuple(row) for row in PlanTopic.topic_stats(user_id)] == [
+        ('Algebra', 14, 4),
+        ('Geometry', 10, 0),
+        ('Physics', 4, 4)
+    ]
+    assert PlanTopic.mastered_topic_count(user_id) == 2
+
+def test_bulk_import_csv_and_json(client, user, auth_headers):
+    user_id = user.id
+    rows = ['plan_title,topics,date,title,status']
+    rows += [f'Term {p},Algebra;Geometry,2025-09-{day + 1:02d},Task {day},pending'
+             for p in range(3) for day in range(20)]
+    csv_file = (io.BytesIO('\n'.join(rows).encode('utf-8')), 'term.csv')
+    
+    response = client.post('/api/planner/import', headers=auth_headers,
+                           data={'file': csv_file}, content_type='multipart/form-data')
+    assert response.status_code == 201
+    report = response.get_json()['import']
+    assert (report['plans'], report['tasks'], report['rows']) == (3, 60, 3 + 6 + 60)
+    assert report['rows_per_second'] > 0
+    
+    response = client.post('/api/planner/import', headers=auth_headers, json={'plans': [{
+        'title': 'Physics',
+        'topics': ['Physics'],
+        'daily_tasks': [{'date': '2025-09-01', 'tasks': [{'title': 'Read'}, {'title': 'Practice'}]}]
+    }]})
+    assert response.status_code == 201
+    
+    plan = Plan.query.filter_by(user_id=user_id, title='Physics').one()
+    assert (plan.start_date, plan.target_date) == (date(2025, 9, 1), date(2025, 9, 1))
+    assert [task.order_index for task in plan.tasks] == [0, 1]
+    assert Task.query.count() == 62
+    assert PlanTopic.query.filter_by(user_id=user_id, topic='Algebra').count() == 3
+
+def test_bulk_import_rejects_invalid_files(client, user, auth_headers):
+    response = client.post('/api/planner/import', headers=auth_headers, json=[
+        {'title': 'Bad', 'topics': [], 'tasks': [{'date': '09/01/2025', 'title': 'Read', 'status': 'done'}]}
+    ])
+    assert response.status_code == 400
+    assert len(response.get_json()['details']) == 4
+    assert Plan.query.count() == 0
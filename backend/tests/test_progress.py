@@ -0,0 +1,197 @@
+import json
+import os
+import pytest
+from datetime import date, timedelta
+
+from app import db
+from app.models import Plan, Task, UserDailyStats, UserTopicStats
+from app.models.stats import rebuild_stats
+from app.services.progress_cache import progress_cache
+
+def create_active_plans(user_id, count, completed_per_plan=2, tasks_per_plan=4):
+    """Plans with one task per day over the last few days, some completed"""
+    today = date.today()
+    for i in range(count):
+        plan = Plan(user_id=user_id, title=f'Plan {i}', topics=[f'Topic {i % 3}'],
+                    start_date=today - timedelta(days=tasks_per_plan), target_date=today)
+        db.session.add(plan)
+        db.session.flush()
+        for day in range(tasks_per_plan):
+            task = Task(plan_id=plan.id, date=today - timedelta(days=day), title=f'Task {day}')
+            task.status = 'completed' if day < completed_per_plan else 'pending'
+            db.session.add(task)
+    db.session.commit()
+    db.session.expunge_all()
+    # Direct writes skip the routes' cache invalidation
+    progress_cache.invalidate(user_id)
+
+def dashboard(client, auth_headers, count_queries):
+    """Dashboard payload and the statements it issued"""
+    with count_queries() as statements:
+        response = client.get('/api/progress/dashboard', headers=auth_headers)
+    assert response.status_code == 200
+    return response.get_json()['dashboard'], statements
+
+def test_dashboard_metrics(client, user, auth_headers, count_queries):
+    user_id = user.id
+    create_active_plans(user_id, 3)
+    create_active_plans(user_id, 1, completed_per_plan=4)
+    
+    data, _ = dashboard(client, auth_headers, count_queries)
+    assert data['plan_adherence'] == 62.5
+    assert data['time_spent_minutes'] == 10 * 45
+    assert data['total_plans'] == 4 and data['total_uploads'] == 0
+    assert data['topics_mastered'] == 1
+    assert len(data['recent_plans']) == 4
+
+def test_dashboard_query_count_does_not_grow_with_plans(client, user, auth_headers, count_queries):
+    user_id = user.id
+    create_active_plans(user_id, 5)
+    _, few_statements = dashboard(client, auth_headers, count_queries)
+    
+    create_active_plans(user_id, 60)
+    _, many_statements = dashboard(client, auth_headers, count_queries)
+    
+    assert len(many_statements) == len(few_statements)
+
+@pytest.fixture(params=['memory', 'redis'])
+def cache_backend(request, app):
+    """Progress cache on each backend; redis only when TEST_REDIS_URL points at a scratch database"""
+    if request.param == 'redis':
+        url = os.getenv('TEST_REDIS_URL')
+        if not url:
+            pytest.skip('TEST_REDIS_URL is not set')
+        import redis
+        redis.Redis.from_url(url).flushdb()
+        app.config['REDIS_URL'] = url
+    app.config['PROGRESS_CACHE_BACKEND'] = request.param
+    return request.param
+
+def test_repeat_dashboard_loads_are_cache_hits_with_304(client, user, auth_headers, count_queries, cache_backend):
+    create_active_plans(user.id, 2)
+    
+    first = client.get('/api/progress/dashboard', headers=auth_headers)
+    assert first.status_code == 200 and first.headers['ETag']
+    assert 'no-cache' in first.headers['Cache-Control']
+    
+    with count_queries() as statements:
+        repeat = client.get('/api/progress/dashboard', headers={**auth_headers, 'If-None-Match': first.headers['ETag']})
+    assert repeat.status_code == 304 and repeat.data == b''
+    assert statements == []
+    
+    # Changing a task status invalidates the cached payload and its ETag
+    task_id = Task.query.filter_by(status='pending').first().id
+    client.patch(f'/api/planner/tasks/{task_id}', json={'status': 'completed'}, headers=auth_headers)
+    
+    changed = client.get('/api/progress/dashboard', headers={**auth_headers, 'If-None-Match': first.headers['ETag']})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != first.headers['ETag']
+    assert changed.get_json()['dashboard']['plan_adherence'] > first.get_json()['dashboard']['plan_adherence']
+
+def test_cli_imports_invalidate_cached_dashboards(app, client, user, auth_headers, cache_backend, tmp_path):
+    create_active_plans(user.id, 1)
+    assert client.get('/api/progress/dashboard', headers=auth_headers).get_json()['dashboard']['total_plans'] == 1
+    
+    path = tmp_path / 'plans.json'
+    path.write_text(json.dumps([{'title': 'Imported', 'topics': ['Algebra'], 'start_date': '2025-06-01'}]))
+    result = app.test_cli_runner().invoke(args=['plans', 'import', str(path), '--user-email', 'student@example.com'])
+    assert result.exit_code == 0, result.output
+    
+    assert client.get('/api/progress/dashboard', headers=auth_headers).get_json()['dashboard']['total_plans'] == 2
+
+def test_analytics_are_cached_per_window(client, user, auth_headers, cache_backend):
+    create_active_plans(user.id, 1)
+    
+    week = client.get('/api/progress/analytics?days=7', headers=auth_headers)
+    client.get('/api/progress/analytics?days=30', headers=auth_headers)
+    assert progress_cache.misses == 2
+    
+    repeat = client.get('/api/progress/analytics?days=7', headers={**auth_headers, 'If-None-Match': week.headers['ETag']})
+    assert repeat.status_code == 304
+    assert progress_cache.hits == 1
+
+def rollup_rows():
+    """Every row of both rollups, in key order"""
+    return (
+        [(row.user_id, row.date, row.total_tasks, row.completed_tasks, row.skipped_tasks)
+         for row in UserDailyStats.query.order_by(UserDailyStats.user_id, UserDailyStats.date)],
+        [(row.user_id, row.topic, row.total_tasks, row.completed_tasks, row.skipped_tasks)
+         for row in UserTopicStats.query.order_by(UserTopicStats.user_id, UserTopicStats.topic)]
+    )
+
+def test_rollups_follow_task_changes(client, user, auth_headers):
+    user_id = user.id
+    create_active_plans(user_id, 3)
+    today = date.today()
+    
+    task_id = Task.query.filter_by(status='pending').first().id
+    response = client.patch(f'/api/planner/tasks/{task_id}', json={'status': 'skipped'}, headers=auth_headers)
+    assert response.status_code == 200
+    
+    plan_id = Plan.query.filter_by(title='Plan 1').first().id
+    assert client.delete(f'/api/planner/plans/{plan_id}', headers=auth_headers).status_code == 200
+    
+    response = client.post('/api/planner/import', json=[{
+        'title': 'Imported', 'topics': ['Topic 0', 'Imported topic'],
+        'tasks': [{'date': today.isoformat(), 'title': 'Read', 'status': 'completed'}]
+    }], headers=auth_headers)
+    assert response.status_code == 201
+    
+    daily, topics = rollup_rows()
+    assert daily[-1] == (user_id, today, 3, 3, 0)
+    assert (user_id, 'Topic 1', 0, 0, 0) not in topics and len(topics) == 3
+    
+    # The incremental counters match a full recomputation from the tasks table
+    rebuild_stats()
+    assert rollup_rows() == (daily, topics)
+
+def test_analytics_reads_rollups_not_tasks(client, user, auth_headers, count_queries):
+    create_active_plans(user.id, 4)
+    
+    with count_queries() as statements:
+        response = client.get('/api/progress/analytics', headers=auth_headers)
+    assert response.status_code == 200
+    
+    analytics = response.get_json()['analytics']
+    assert analytics['range']['bucket'] == 'day'
+    assert [day['total'] for day in analytics['completions']] == [4, 4, 4, 4]
+    assert [topic['topic'] for topic in analytics['topic_stats']] == ['Topic 0', 'Topic 1', 'Topic 2']
+    assert analytics['trends']['current_streak'] == 2 and analytics['trends']['consistency_score'] == 100
+    assert all('FROM tasks' not in statement for statement in statements)
+
+def test_long_analytics_ranges_are_bucketed_in_sql(client, user, auth_headers):
+    user_id = user.id
+    today = date.today()
+    days = [today - timedelta(days=offset) for offset in range(0, 2000, 3)]
+    db.session.execute(db.insert(UserDailyStats), [
+        {'user_id': user_id, 'date': day, 'total_tasks': 2, 'completed_tasks': day.day % 3} for day in days
+    ])
+    db.session.commit()
+    
+    def analytics(query):
+        response = client.get(f'/api/progress/analytics?{query}', headers=auth_headers)
+        assert response.status_code == 200
+        return response.get_json()['analytics']
+    
+    year = analytics('days=365')
+    assert year['range']['bucket'] == 'week'
+    # Every week starts on a Monday (or the range start) and sums its days
+    start = date.fromisoformat(year['range']['start_date'])
+    expected = {}
+    for day in days:
+        if day >= start:
+            week = max(day - timedelta(days=day.weekday()), start)
+            expected[week] = expected.get(week, 0) + day.day % 3
+    assert {date.fromisoformat(row['start']): row['completed'] for row in year['completions']} == expected
+    
+    decade = analytics('days=3650')
+    assert decade['range'] == {**decade['range'], 'days': 1825, 'bucket': 'month'}
+    assert len(decade['completions']) <= 62
+    assert sum(row['total'] for row in decade['completions']) == 2 * sum(1 for day in days if day >= today - timedelta(days=1825))
+    
+    # Too many days for the requested bucket falls back to the next coarser one
+    assert analytics('days=365&bucket=day')['range']['bucket'] == 'week'
+    assert analytics('days=60&bucket=month')['range']['bucket'] == 'month'
+    
+    assert client.get('/api/progress/analytics?bucket=year', headers=auth_headers).status_code == 400
+    assert client.get('/api/progress/analytics?days=0', headers=auth_headers).status_code == 400
@@ -0,0 +1,111 @@
+"""Hot query paths must be served by an index, never a full table scan.
+
+The statements below mirror the queries issued by the routes and Celery tasks.
+They are explained on SQLite always, and on PostgreSQL when TEST_POSTGRES_URL
+points at a scratch database.
+"""
+import os
+import pytest
+from datetime import date, datetime, timedelta
+from sqlalchemy import create_engine, func, select
+
+from app import db
+from app.models import Plan, Task, PlanTopic, Upload, Reminder, ChatLog, UserDailyStats, UserTopicStats
+
+TODAY = date(2025, 6, 1)
+NOW = datetime(2025, 6, 1, 12, 0)
+
+def hot_queries():
+    """Statements for every hot path, keyed by (name, table that must use an index)"""
+    return {
+        ('tasks_for_plan_date', 'tasks'): select(Task).where(
+            Task.plan_id == 1, Task.date == TODAY
+        ).order_by(Task.order_index),
+        ('dashboard_task_window', 'tasks'): select(func.count(Task.id)).join(Plan).where(
+            Plan.user_id == 1, Task.date >= TODAY - timedelta(days=30), Task.date <= TODAY
+        ),
+        ('dashboard_plans', 'plans'): select(Plan).where(
+            Plan.user_id == 1
+        ).order_by(Plan.created_at.desc()).limit(5),
+        ('topic_stats', 'plan_topics'): select(PlanTopic.topic, func.count(Task.id)).outerjoin(
+            Task, Task.plan_id == PlanTopic.plan_id
+        ).where(PlanTopic.user_id == 1).group_by(PlanTopic.topic),
+        ('topic_stats', 'tasks'): select(PlanTopic.topic, func.count(Task.id)).outerjoin(
+            Task, Task.plan_id == PlanTopic.plan_id
+        ).where(PlanTopic.user_id == 1).group_by(PlanTopic.topic),
+        ('daily_stats_window', 'user_daily_stats'): select(UserDailyStats).where(
+            UserDailyStats.user_id == 1, UserDailyStats.date >= TODAY - timedelta(days=30), UserDailyStats.date <= TODAY
+        ).order_by(UserDailyStats.date),
+        ('daily_stats_buckets', 'user_daily_stats'): UserDailyStats.bucket_query(
+            1, TODAY - timedelta(days=365), TODAY, 'week'
+        ),
+        ('topic_stats_rollup', 'user_topic_stats'): select(UserTopicStats).where(
+            UserTopicStats.user_id == 1
+        ).order_by(UserTopicStats.topic),
+        ('dashboard_uploads', 'uploads'): select(Upload).where(
+            Upload.user_id == 1
+        ).order_by(Upload.created_at.desc()).limit(5),
+        ('chat_history', 'chat_logs'): select(ChatLog).where(
+            ChatLog.user_id == 1, ChatLog.session_id == 'session'
+        ).order_by(ChatLog.timestamp.asc()),
+        ('chat_sessions', 'chat_logs'): select(
+            ChatLog.session_id, func.max(ChatLog.timestamp)
+        ).where(ChatLog.user_id == 1).group_by(ChatLog.session_id),
+        ('due_reminders', 'reminders'): select(Reminder).where(
+            Reminder.is_active == True, Reminder.next_fire_at <= NOW
+        ),
+        ('user_reminders', 'reminders'): select(Reminder).where(
+            Reminder.user_id == 1, Reminder.is_active == True, Reminder.next_fire_at <= NOW
+        ).order_by(Reminder.next_fire_at.asc()),
+    }
+
+def explain(connection, statement):
+    """Return the query plan lines for a statement on the connection's dialect"""
+    compiled = statement.compile(dialect=connection.dialect)
+    if connection.dialect.name == 'sqlite':
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+        rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled}', params).all()
+        return [row[-1] for row in rows]
+    
+    rows = connection.exec_driver_sql(f'EXPLAIN {compiled}', compiled.params).all()
+    return [row[0] for row in rows]
+
+def full_scans(plan_lines, table, dialect):
+    """Plan lines that read the whole table instead of seeking an index"""
+    if dialect == 'sqlite':
+        # "SCAN tasks" or "SCAN tasks USING [COVERING] INDEX ..." both visit every row;
+        # an indexed lookup shows up as "SEARCH tasks USING ..."
+        return [line for line in plan_lines if line.startswith(f'SCAN {table}')]
+    return [line for line in plan_lines if f'Seq Scan on {table}' in line]
+
+@pytest.fixture(params=['sqlite', 'postgresql'])
+def connection(request, app):
+    """Connection with the full schema on each supported dialect"""
+    if request.param == 'sqlite':
+        with db.engine.connect() as connection:
+            yield connection
+        return
+    
+    url = os.getenv('TEST_POSTGRES_URL')
+    if not url:
+        pytest.skip('TEST_POSTGRES_URL is not set')
+    
+    engine = create_engine(url)
+    db.metadata.create_all(engine)
+    try:
+        with engine.connect() as connection:
+            # Empty tables make sequential scans look cheapest; this leaves the
+            # planner no alternative to a seq scan except a usable index
+            connection.exec_driver_sql('SET enable_seqscan = off')
+            yield connection
+    finally:
+        db.metadata.drop_all(engine)
+        engine.dispose()
+
+@pytest.mark.parametrize('name,table', list(hot_queries()))
+def test_hot_query_uses_index(connection, name, table):
+    statement = hot_queries()[(name, table)]
+    plan_lines = explain(connection, statement)
+    
+    scans = full_scans(plan_lines, table, connection.dialect.name)
+    assert not scans, f'{name} falls back to a full scan of {table}: {plan_lines}'
@@ -0,0 +1,120 @@
+import os
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models import User, Upload, Question
+from app.services.quiz_builder import QuizBuilder, quiz_builder
+
+def add_questions(user_id, texts):
+    """One upload holding a question per text; returns the questions in order"""
+    upload = Upload(user_id=user_id, filename='exam.pdf', file_url='/uploads/exam.pdf', file_type='pdf', file_size=10)
+    db.session.add(upload)
+    db.session.flush()
+    questions = [Question(upload_id=upload.id, user_id=user_id, position=position, text=text) for position, text in enumerate(texts)]
+    db.session.add_all(questions)
+    db.session.commit()
+    return questions
+
+def test_sampling_favours_unseen_questions(app, user, monkeypatch):
+    seen, unseen = add_questions(user.id, ['Seen an hour ago?', 'Never seen?'])
+    seen.times_seen = 1
+    seen.last_seen_at = datetime.utcnow() - timedelta(hours=1)
+    db.session.commit()
+    # Keep the review stats fixed so every draw uses the same weights
+    monkeypatch.setattr(quiz_builder, '_mark_seen', lambda *args: None)
+    random.seed(1)
+    
+    picks = [quiz_builder.build_quiz(user.id, 1)[0]['question_id'] for _ in range(200)]
+    assert picks.count(unseen.id) > 180
+    assert seen.id in picks  # Cooling down lowers the weight without excluding the question
+    
+    # A full-size quiz is a sample without replacement
+    quiz = quiz_builder.build_quiz(user.id, 5)
+    assert sorted(question['question_id'] for question in quiz) == [seen.id, unseen.id]
+
+def test_build_quiz_marks_questions_seen(app, user):
+    question, = add_questions(user.id, ['Only question?'])
+    quiz_builder.build_quiz(user.id, 1)
+    db.session.refresh(question)
+    assert question.times_seen == 1 and question.last_seen_at is not None
+    assert quiz_builder._get_index(user.id)[question.id]['times_seen'] == 1
+
+def test_index_is_rebuilt_after_invalidation_or_ttl(app, user):
+    add_questions(user.id, ['Cell biology?'])
+    assert quiz_builder.pool_size(user.id) == 1
+    
+    add_questions(user.id, ['Cell division?'])
+    assert quiz_builder.pool_size(user.id) == 1  # Served from the cached index
+    quiz_builder.invalidate(user.id)
+    assert quiz_builder.pool_size(user.id, topic='cell') == 2
+    
+    add_questions(user.id, ['Genetics?'])
+    app.config['QUIZ_INDEX_TTL'] = 0
+    assert quiz_builder.pool_size(user.id) == 3
+
+def test_record_results_counts_each_missed_question_once(app, user):
+    first, second = add_questions(user.id, ['First?', 'Second?'])
+    other = User(email='other@example.com', password='password123')
+    db.session.add(other)
+    db.session.commit()
+    foreign, = add_questions(other.id, ['Not yours?'])
+    
+    missed = quiz_builder.record_results(user.id, [
+        {'question_id': first.id, 'correct': False},
+        {'question_id': str(first.id), 'correct': False},
+        {'question_id': second.id, 'correct': True},
+        {'question_id': foreign.id, 'correct': False},
+        {'correct': False},
+    ])
+    assert missed == 1
+    assert [question.times_wrong for question in Question.query.order_by(Question.id)] == [1, 0, 0]
+
+def test_quiz_results_endpoint_rejects_malformed_entries(client, user, auth_headers):
+    question, = add_questions(user.id, ['First?'])
+    
+    def post(results):
+        return client.post('/api/ai/quiz/results', headers=auth_headers, json={'results': results})
+    
+    for results in (['not an object'], [{'question_id': 'abc'}], [{'question_id': 1.5}], [{'question_id': True}]):
+        response = post(results)
+        assert response.status_code == 400, results
+        assert 'Result 0' in response.get_json()['error']
+    
+    response = post([{'question_id': question.id, 'correct': False}])
+    assert response.status_code == 200
+    assert response.get_json()['missed_questions'] == 1
+
+@pytest.mark.skipif(not os.getenv('TEST_REDIS_URL'), reason='TEST_REDIS_URL is not set')
+def test_invalidation_reaches_every_worker_through_redis(app, user):
+    import redis
+    redis.Redis.from_url(os.environ['TEST_REDIS_URL']).flushdb()
+    app.config.update(QUIZ_INDEX_SYNC='redis', REDIS_URL=os.environ['TEST_REDIS_URL'])
+    writer, reader = QuizBuilder(), QuizBuilder()  # Two worker processes' builders
+    add_questions(user.id, ['Cell biology?'])
+    assert reader.pool_size(user.id) == 1
+    
+    add_questions(user.id, ['Cell division?'])
+    writer.invalidate(user.id)
+    assert reader.pool_size(user.id) == 2
+
+def test_unreachable_generation_store_rebuilds_instead_of_failing(app, user):
+    app.config.update(QUIZ_INDEX_SYNC='redis', REDIS_URL='redis://127.0.0.1:1/0')
+    builder = QuizBuilder()
+    add_questions(user.id, ['Cell biology?'])
+    assert builder.pool_size(user.id) == 1
+    add_questions(user.id, ['Cell division?'])
+    builder.invalidate(user.id)  # Logged, not raised
+    assert builder.pool_size(user.id) == 2
+
+def test_quiz_size_must_be_a_positive_integer_within_the_cap(client, user, auth_headers):
+    add_questions(user.id, ['Only question?'])
+    for num_questions in ('five', None, 0, -1, True, 2.5, 51):
+        response = client.post('/api/ai/quiz', headers=auth_headers, json={'source': 'uploads', 'num_questions': num_questions})
+        assert response.status_code == 400, num_questions
+        assert response.get_json()['error'] == 'num_questions must be an integer from 1 to 50'
+    
+    response = client.post('/api/ai/quiz', headers=auth_headers, json={'source': 'uploads', 'num_questions': 1})
+    assert response.status_code == 200 and response.get_json()['total_questions'] == 1
@@ -0,0 +1,142 @@
+import socketserver
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import create_app, db
+from app.models import User, Reminder
+from app.services.reminder_mail import ReminderMailer
+from app.services.reminder_queue import ReminderQueue
+from app.tasks import _deliver_reminders
+
+NOW = datetime(2025, 6, 1, 9, 0)
+
+class SMTPSink(socketserver.StreamRequestHandler):
+    """Just enough SMTP to accept mail; refuses `rejected` recipients for good and `deferred` ones for now"""
+    
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+    
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self.reply('220 sink ready')
+        while True:
+            line = self.rfile.readline().decode().strip()
+            verb = line.split(' ', 1)[0].upper()
+            if not line or verb == 'QUIT':
+                self.reply('221 bye')
+                return
+            if verb == 'RCPT' and any(address in line for address in server.rejected):
+                self.reply('550 no such user')
+            elif verb == 'RCPT' and any(address in line for address in server.deferred):
+                self.reply('450 mailbox busy')
+            elif verb == 'DATA':
+                self.reply('354 end with .')
+                data = []
+                while (chunk := self.rfile.readline()) not in (b'.\r\n', b''):
+                    data.append(chunk)
+                server.messages.append(b''.join(data))
+                self.reply('250 queued')
+                if len(server.messages) == server.drop_after:
+                    return  # Hang up mid-session
+            elif verb in ('EHLO', 'HELO', 'MAIL', 'RCPT', 'RSET', 'NOOP'):
+                self.reply('250 ok')
+            else:
+                self.reply('502 not implemented')
+
+@pytest.fixture
+def smtp_sink():
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), SMTPSink)
+    server.daemon_threads = True
+    server.connections, server.messages, server.rejected, server.deferred, server.drop_after = 0, [], set(), set(), None
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def mail_app(monkeypatch, smtp_sink):
+    """Application whose mail goes to the local SMTP sink without TLS"""
+    monkeypatch.setenv('SMTP_SERVER', '127.0.0.1')
+    monkeypatch.setenv('SMTP_PORT', str(smtp_sink.server_address[1]))
+    monkeypatch.setenv('SMTP_USE_TLS', 'false')
+    monkeypatch.setenv('SMTP_SENDER', 'reminders@example.com')
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def add_reminders(emails, per_user):
+    """Due reminders for a new user per email"""
+    users = [User(email=email, password='password123') for email in emails]
+    db.session.add_all(users)
+    db.session.commit()
+    db.session.execute(db.insert(Reminder), [
+        {'user_id': user.id, 'title': f'Reminder {n}', 'content': 'Review', 'tier': 1, 'is_active': True,
+         'next_fire_at': NOW - timedelta(minutes=n)}
+        for user in users for n in range(per_user)
+    ])
+    db.session.commit()
+    return Reminder.query.order_by(Reminder.id).all()
+
+def test_batches_share_one_smtp_session_and_isolate_rejected_messages(mail_app, smtp_sink):
+    smtp_sink.rejected.add('bounce@example.com')
+    reminders = add_reminders(['a@example.com', 'b@example.com', 'bounce@example.com'], 50)
+    
+    report = ReminderMailer(batch_size=100).send(reminders)
+    
+    assert (report['sent'], report['rejected'], report['batches'], report['connections']) == (100, 50, 2, 2)
+    assert smtp_sink.connections == 2 and len(smtp_sink.messages) == 100
+    assert set(report['rejected_ids']) == {r.id for r in reminders if r.user.email == 'bounce@example.com'}
+    assert report['failed_ids'] == []
+    assert len(report['errors']) == 20 and report['messages_per_second'] > 0
+    assert b'Subject: Study Reminder: Reminder 0' in smtp_sink.messages[0]
+
+def test_dropped_session_fails_the_message_in_flight_and_reconnects(mail_app, smtp_sink):
+    smtp_sink.drop_after = 3
+    reminders = add_reminders(['a@example.com'], 10)
+    
+    report = ReminderMailer(batch_size=10).send(reminders)
+    
+    assert (report['sent'], report['failed'], report['connections']) == (9, 1, 2)
+    assert report['failed_ids'] == [reminders[3].id]
+
+def test_unreachable_server_fails_the_batch_once(mail_app, smtp_sink):
+    smtp_sink.shutdown()
+    smtp_sink.server_close()
+    reminders = add_reminders(['a@example.com'], 5)
+    
+    report = ReminderMailer(batch_size=10).send(reminders)
+    assert (report['sent'], report['failed'], report['connections']) == (0, 5, 0)
+
+def test_temporary_failures_retry_and_permanent_ones_are_dropped(mail_app, smtp_sink):
+    mail_app.config['REMINDER_DELIVERY'] = 'email'
+    smtp_sink.rejected.add('bounce@example.com')
+    smtp_sink.deferred.add('busy@example.com')
+    reminders = add_reminders(['a@example.com', 'bounce@example.com', 'busy@example.com'], 1)
+    reminders[0].title = 'Bad\nheader'  # Flask-Mail refuses to send it
+    reminders.append(add_reminders(['c@example.com'], 1)[-1])
+    db.session.commit()
+    ids = {reminder.user.email: reminder.id for reminder in reminders}
+    queue = ReminderQueue(batch_size=10, lease_seconds=60, max_attempts=2)
+    
+    report = queue.drain(_deliver_reminders, now=NOW)
+    assert (report['processed'], report['failed'], report['rejected'], report['dropped']) == (1, 1, 2, 2)
+    # Rejected firings are not retried: those reminders move on like delivered ones
+    for email in ('a@example.com', 'bounce@example.com', 'c@example.com'):
+        assert db.session.get(Reminder, ids[email]).tier == 2
+    busy = db.session.get(Reminder, ids['busy@example.com'])
+    assert (busy.tier, busy.delivery_attempts, busy.next_fire_at) == (1, 1, NOW + timedelta(seconds=60))
+    
+    # The last allowed attempt fails too, so that firing is dropped
+    later = NOW + timedelta(seconds=61)
+    report = queue.drain(_deliver_reminders, now=later)
+    assert (report['processed'], report['failed'], report['dropped']) == (0, 1, 1)
+    db.session.refresh(busy)
+    assert (busy.tier, busy.delivery_attempts) == (2, 0)
+    assert queue.claim(now=later) == []
@@ -0,0 +1,202 @@
+import os
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+import redis
+from sqlalchemy.dialects import postgresql
+
+from app import create_app, db
+from app.models import User, Reminder
+from app.services.reminder_queue import ReminderQueue
+from app.services.reminder_index import reminder_index, TimingWheel
+
+NOW = datetime(2025, 6, 1, 9, 0)
+
+def add_reminders(user_id, count, tier=1, due=True):
+    """Active reminders due at NOW (or tomorrow)"""
+    db.session.execute(db.insert(Reminder), [
+        {'user_id': user_id, 'title': f'Reminder {n}', 'content': 'Review', 'tier': tier, 'is_active': True,
+         'next_fire_at': NOW - timedelta(minutes=n) if due else NOW + timedelta(days=1)}
+        for n in range(count)
+    ])
+    db.session.commit()
+
+def test_drain_delivers_each_due_reminder_once_in_batches(app, user):
+    add_reminders(user.id, 4)
+    add_reminders(user.id, 1, tier=4)
+    add_reminders(user.id, 2, due=False)
+    
+    delivered = []
+    report = ReminderQueue(batch_size=2).drain(lambda batch: delivered.extend(r.id for r in batch), now=NOW)
+    
+    assert (report['processed'], report['batches']) == (5, 3)
+    assert len(delivered) == len(set(delivered)) == 5
+    assert Reminder.query.filter_by(tier=2).count() == 4
+    # The last tier is not rescheduled
+    assert Reminder.query.filter_by(tier=4, is_active=False).count() == 1
+    assert ReminderQueue().claim(now=NOW) == []
+
+def test_claimed_batches_do_not_overlap_and_leases_expire(app, user):
+    add_reminders(user.id, 5)
+    queue = ReminderQueue(batch_size=3, lease_seconds=60)
+    
+    first = [reminder.id for reminder in queue.claim(now=NOW)]
+    second = [reminder.id for reminder in queue.claim(now=NOW)]
+    assert len(first) == 3 and len(second) == 2 and not set(first) & set(second)
+    assert queue.claim(now=NOW) == []
+    
+    # A worker that died holding a batch gives it back when the lease runs out
+    assert len(queue.claim(now=NOW + timedelta(seconds=61))) == 3
+
+def test_row_locking_databases_skip_locked_rows(app):
+    statement = ReminderQueue(batch_size=50).locked_claim_query(NOW).compile(dialect=postgresql.dialect())
+    assert 'FOR UPDATE SKIP LOCKED' in str(statement)
+
+@pytest.fixture
+def file_app(monkeypatch, tmp_path):
+    """Application on a SQLite file, so several threads get their own connections"""
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'reminders.db'}")
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def test_parallel_workers_drain_without_duplicates(file_app):
+    user = User(email='student@example.com', password='password123')
+    db.session.add(user)
+    db.session.commit()
+    add_reminders(user.id, 200)
+    
+    delivered = []
+    lock = threading.Lock()
+    
+    def deliver(batch):
+        with lock:
+            delivered.extend(reminder.id for reminder in batch)
+    
+    def worker():
+        with file_app.app_context():
+            ReminderQueue(batch_size=7).drain(deliver, now=NOW)
+    
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert len(delivered) == 200 and len(set(delivered)) == 200
+    assert Reminder.query.filter_by(tier=2).count() == 200
+
+def test_orm_commits_keep_the_index_current(app, user):
+    app.config['REMINDER_INDEX_BACKEND'] = 'memory'
+    reminder = Reminder(user_id=user.id, title='Review', content='Cells')
+    db.session.add(reminder)
+    db.session.commit()
+    fire_at = reminder.next_fire_at
+    assert reminder_index.due_for_user(user.id, fire_at) == [reminder.id]
+    
+    reminder.advance_tier()
+    db.session.commit()
+    assert reminder_index.due_for_user(user.id, fire_at) == []
+    assert reminder_index.due_for_user(user.id, reminder.next_fire_at) == [reminder.id]
+    
+    # Rolled back changes never reach the index
+    reminder.next_fire_at = fire_at
+    db.session.flush()
+    db.session.rollback()
+    assert reminder_index.due_for_user(user.id, fire_at) == []
+    
+    reminder.is_active = False
+    db.session.commit()
+    assert reminder_index.due_for_user(user.id, reminder.next_fire_at) == []
+
+def test_indexed_drain_verifies_popped_ids_against_the_table(app, user):
+    app.config['REMINDER_INDEX_BACKEND'] = 'memory'
+    add_reminders(user.id, 5)
+    add_reminders(user.id, 2, due=False)
+    assert reminder_index.rebuild() == 7
+    
+    # Changed behind the index's back: the table wins and the index is re-synced
+    db.session.execute(db.update(Reminder).where(Reminder.title == 'Reminder 0').values(is_active=False))
+    db.session.commit()
+    
+    delivered = []
+    report = ReminderQueue(batch_size=2).drain(lambda batch: delivered.extend(r.id for r in batch), now=NOW)
+    assert report['processed'] == 4 and len(set(delivered)) == 4
+    assert Reminder.query.filter_by(tier=2).count() == 4
+    assert reminder_index.pop_due(NOW + timedelta(hours=1), 10, NOW + timedelta(hours=2)) == []
+
+def test_reminders_endpoint_only_reads_rows_the_index_has_due(app, client, user, auth_headers):
+    app.config['REMINDER_INDEX_BACKEND'] = 'memory'
+    add_reminders(user.id, 2)
+    assert client.get('/api/progress/reminders', headers=auth_headers).get_json()['reminders'] == []
+    
+    reminder_index.rebuild()
+    reminders = client.get('/api/progress/reminders', headers=auth_headers).get_json()['reminders']
+    assert [reminder['title'] for reminder in reminders] == ['Reminder 1', 'Reminder 0']
+
+def test_timing_wheel_pops_due_members_once_per_lease():
+    wheel = TimingWheel(tick=10, slots=8)
+    for member, score in [('a', 105), ('b', 95), ('c', 250), ('d', 1000)]:
+        wheel.add(member, score)
+    
+    assert wheel.pop_due(110, limit=10, lease=400) == ['b', 'a']
+    assert wheel.pop_due(300, limit=1, lease=400) == ['c']
+    assert wheel.pop_due(300, limit=10, lease=400) == []
+    # Members scheduled behind the cursor are still found
+    wheel.add('e', 50)
+    assert wheel.pop_due(300, limit=10, lease=2000) == ['e']
+    assert sorted(wheel.pop_due(1000, limit=10, lease=2000)) == ['a', 'b', 'c', 'd']
+    assert len(wheel) == 5
+
+@pytest.mark.skipif(not os.getenv('TEST_REDIS_URL'), reason='needs TEST_REDIS_URL')
+def test_redis_index_pops_each_due_reminder_once(app, user):
+    app.config.update(REMINDER_INDEX_BACKEND='redis', REDIS_URL=os.environ['TEST_REDIS_URL'])
+    add_reminders(user.id, 3)
+    reminder_index.rebuild()
+    
+    lease_until = NOW + timedelta(minutes=5)
+    assert len(reminder_index.pop_due(NOW, 2, lease_until)) == 2
+    assert len(reminder_index.pop_due(NOW, 2, lease_until)) == 1
+    assert reminder_index.pop_due(NOW, 2, lease_until) == []
+    assert len(reminder_index.due_for_user(user.id, NOW)) == 3
+    reminder_index.reset()
+
+def test_indexed_drain_sweeps_the_table_for_reminders_the_index_lost(app, user, monkeypatch):
+    app.config['REMINDER_INDEX_BACKEND'] = 'memory'
+    add_reminders(user.id, 3)
+    reminder_index.rebuild()
+    
+    # An index write that failed after its commit: the row is due but the index never heard of it
+    def unavailable(entries):
+        raise redis.RedisError('down')
+    
+    monkeypatch.setattr(reminder_index, 'apply', unavailable)
+    lost = Reminder(user_id=user.id, title='Lost', content='Review')
+    lost.next_fire_at = NOW - timedelta(hours=1)
+    db.session.add(lost)
+    db.session.commit()
+    monkeypatch.undo()
+    assert lost.id not in reminder_index.due_for_user(user.id, NOW)
+    
+    delivered = []
+    report = ReminderQueue(batch_size=2).drain(lambda batch: delivered.extend(r.id for r in batch), now=NOW)
+    assert report['processed'] == 4 and len(set(delivered)) == 4
+    assert lost.id in delivered
+    # Completing it put it back in the index at its next firing
+    db.session.refresh(lost)
+    assert lost.id in reminder_index.due_for_user(user.id, lost.next_fire_at)
+
+def test_table_sweep_does_not_reclaim_reminders_popped_from_the_index(app, user):
+    app.config['REMINDER_INDEX_BACKEND'] = 'memory'
+    add_reminders(user.id, 3)
+    reminder_index.rebuild()
+    queue = ReminderQueue(batch_size=3, lease_seconds=60)
+    
+    first = queue.claim(now=NOW)
+    assert len(first) == 3
+    # The index is empty now and the sweep finds the rows leased, not due
+    assert queue.claim(now=NOW) == []
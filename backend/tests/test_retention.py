@@ -0,0 +1,64 @@
+import gzip
+import json
+import zlib
+from datetime import datetime, timedelta
+
+from app import db
+from app.models import ChatLog
+from app.services.retention import RetentionPipeline
+
+def add_chat_logs(user_id, count, age_days):
+    """Chat messages sent `age_days` ago"""
+    timestamp = datetime.utcnow() - timedelta(days=age_days)
+    db.session.execute(db.insert(ChatLog), [
+        {'user_id': user_id, 'session_id': 's', 'role': 'user', 'content': f'message {n}', 'timestamp': timestamp}
+        for n in range(count)
+    ])
+    db.session.commit()
+
+def test_purge_deletes_expired_rows_in_batches_and_archives_them(app, user, tmp_path):
+    user_id = user.id
+    add_chat_logs(user_id, 25, age_days=120)
+    add_chat_logs(user_id, 5, age_days=1)
+    
+    pipeline = RetentionPipeline(batch_size=10, pause_seconds=0, archive_dir=str(tmp_path))
+    chat_report, reminder_report = pipeline.run()
+    
+    assert (chat_report['deleted'], chat_report['batches']) == (25, 3)
+    assert reminder_report['deleted'] == 0 and reminder_report['archive'] is None
+    assert ChatLog.query.count() == 5
+    
+    with gzip.open(chat_report['archive'], 'rt') as archive:
+        archived = [json.loads(line) for line in archive]
+    assert len(archived) == 25
+    assert archived[0]['content'] == 'message 0' and archived[0]['user_id'] == user_id
+
+def gzip_members(path):
+    """Number of gzip members in a file"""
+    with open(path, 'rb') as archive:
+        data = archive.read()
+    members = 0
+    while data:
+        decompressor = zlib.decompressobj(wbits=31)
+        decompressor.decompress(data)
+        assert decompressor.eof
+        members += 1
+        data = decompressor.unused_data
+    return members
+
+def test_runs_sharing_an_archive_append_readable_members(app, user, tmp_path, monkeypatch):
+    user_id = user.id
+    path = str(tmp_path / 'chat_logs.ndjson.gz')
+    # Runs started within the same second get the same archive name
+    monkeypatch.setattr(RetentionPipeline, '_archive_path', lambda self, table_name: path)
+    pipeline = RetentionPipeline(batch_size=4, pause_seconds=0, archive_dir=str(tmp_path))
+    
+    add_chat_logs(user_id, 6, age_days=120)
+    assert pipeline.purge(*pipeline.policies()[0])['deleted'] == 6
+    add_chat_logs(user_id, 3, age_days=120)
+    assert pipeline.purge(*pipeline.policies()[0])['deleted'] == 3
+    
+    assert gzip_members(path) == 2
+    with gzip.open(path, 'rt') as archive:
+        archived = [json.loads(line) for line in archive]
+    assert [row['content'] for row in archived] == [f'message {n}' for n in range(6)] + [f'message {n}' for n in range(3)]
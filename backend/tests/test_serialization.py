@@ -0,0 +1,50 @@
+from datetime import date, datetime
+
+import pytest
+
+from app import db
+from app.models import Plan
+from app.utils.serialization import JSON_PROVIDERS, orjson, serialization_cache
+
+PROVIDERS = [
+    pytest.param(name, marks=pytest.mark.skipif(name == 'orjson' and orjson is None, reason='orjson not installed'))
+    for name in JSON_PROVIDERS
+]
+
+@pytest.mark.parametrize('name', PROVIDERS)
+def test_providers_write_dates_as_iso_8601(app, name):
+    provider = JSON_PROVIDERS[name](app)
+    payload = {'day': date(2025, 6, 1), 'at': datetime(2025, 6, 1, 8, 30, 0, 125000)}
+    
+    response = provider.response(payload)
+    assert provider.loads(response.get_data()) == {
+        'day': '2025-06-01',
+        'at': '2025-06-01T08:30:00.125000'
+    }
+
+def test_cached_plan_is_rebuilt_after_update(app, user):
+    plan = Plan(user_id=user.id, title='Algebra', topics=['Algebra'], start_date=date(2025, 6, 1),
+                target_date=date(2025, 6, 8), json_blob='{"title": "Algebra"}')
+    db.session.add(plan)
+    db.session.commit()
+    
+    first = plan.to_dict(expand=('plan_data',))
+    second = plan.to_dict(expand=('plan_data',))
+    assert first == second
+    assert serialization_cache.hits == 1
+    
+    # Callers get copies they are free to extend
+    second['total_tasks'] = 99
+    second['topics'].append('Geometry')
+    second['plan_data']['title'] = 'Changed'
+    third = plan.to_dict(expand=('plan_data',))
+    assert third['total_tasks'] == 0
+    assert third['topics'] == ['Algebra'] and third['plan_data'] == {'title': 'Algebra'}
+    
+    # Including the first copy, handed out on the miss
+    first['topics'].clear()
+    assert plan.to_dict(expand=('plan_data',))['topics'] == ['Algebra']
+    
+    plan.title = 'Geometry'
+    db.session.commit()
+    assert plan.to_dict(expand=('plan_data',))['title'] == 'Geometry'
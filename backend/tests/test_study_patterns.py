@@ -0,0 +1,55 @@
+from datetime import date, datetime, timedelta
+
+from app import db
+from app.models import Reminder, User, UserDailyStats
+from app.services.study_patterns import StudyPatternAnalyzer, pattern_reminder_content
+from app.tasks import analyze_study_patterns
+
+NOW = datetime(2025, 6, 30, 21, 0)
+
+def add_users_with_stats(daily_counts, today=NOW.date()):
+    """One user per entry of (total, completed) pairs for the last days, straight into the rollup"""
+    users = [User(email=f'learner{n}@example.com', password='password123') for n in range(len(daily_counts))]
+    db.session.add_all(users)
+    db.session.flush()
+    
+    db.session.execute(db.insert(UserDailyStats), [
+        {'user_id': user.id, 'date': today - timedelta(days=day), 'total_tasks': total, 'completed_tasks': completed}
+        for user, days in zip(users, daily_counts)
+        for day, (total, completed) in enumerate(days)
+    ])
+    db.session.commit()
+    return [user.id for user in users]
+
+def test_batch_analysis_reads_and_bulk_inserts_per_chunk(app, count_queries):
+    user_ids = add_users_with_stats([
+        [(2, 2), (2, 2)],
+        [(4, 1), (2, 0)],
+        [(2, 1), (2, 2), (1, 1)],
+        [(3, 3)],
+        [],
+    ])
+    
+    with count_queries() as statements:
+        report = StudyPatternAnalyzer(chunk_size=2).run(now=NOW)
+    
+    # The user without tasks in the window gets no reminder
+    assert (report['users'], report['reminders'], report['chunks']) == (4, 4, 2)
+    # SQLite has no server-side cursors, so it reads one keyset page per chunk plus a final empty one
+    assert sum(statement.startswith('SELECT') and 'FROM user_daily_stats' in statement for statement in statements) == 3
+    assert sum(statement.startswith('INSERT INTO reminders') for statement in statements) == 2
+    
+    reminders = {reminder.user_id: reminder for reminder in Reminder.query.all()}
+    assert sorted(reminders) == user_ids[:4]
+    assert reminders[user_ids[0]].content == pattern_reminder_content(1.0)
+    assert reminders[user_ids[1]].content == pattern_reminder_content(0.125)
+    assert reminders[user_ids[2]].content == pattern_reminder_content(2.5 / 3)
+    assert all(reminder.tier == 2 and reminder.next_fire_at == NOW + timedelta(days=4) for reminder in reminders.values())
+
+def test_batch_and_per_user_analysis_agree(app):
+    user_id, = add_users_with_stats([[(4, 1), (2, 1), (1, 1)]], today=date.today() - timedelta(days=1))
+    StudyPatternAnalyzer().run()
+    analyze_study_patterns(user_id)
+    
+    batch, single = Reminder.query.order_by(Reminder.id).all()
+    assert (batch.title, batch.content, batch.tier) == (single.title, single.content, single.tier)
@@ -0,0 +1,134 @@
+import importlib.util
+import io
+import json
+import os
+
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+
+from app import db
+from app.models import User, Upload, Question, Answer, Concept
+
+MIGRATIONS = os.path.join(os.path.dirname(__file__), '..', 'migrations', 'versions')
+
+PARSED = {
+    'questions': [
+        {'question': 'What is 50% of 10?', 'line_number': 1, 'answers': ['Five', 'Ten']},
+        {'question': 'Define cell_wall', 'line_number': 4, 'answers': []},
+        {'question': 'What is DNA?', 'line_number': 6, 'answers': ['A molecule']},
+    ],
+    'concepts': [{'term': 'Cell', 'definition': 'Basic unit of life'}]
+}
+
+def add_upload(user_id, parsed=PARSED, filename='exam.pdf'):
+    upload = Upload(user_id=user_id, filename=filename, file_url=f'/uploads/{filename}', file_type='pdf', file_size=10)
+    db.session.add(upload)
+    db.session.flush()
+    upload.set_parsed_data(parsed)
+    return upload
+
+def stored_questions(upload_id):
+    """(text, line number, answer texts) per stored question, in position order"""
+    questions = Question.query.filter_by(upload_id=upload_id).order_by(Question.position).all()
+    return [(question.text, question.line_number, [answer.text for answer in question.answers]) for question in questions]
+
+def test_replace_for_upload_maps_answers_to_their_questions(app, user):
+    upload = add_upload(user.id)
+    Question.replace_for_upload(upload, PARSED)
+    db.session.commit()
+    assert stored_questions(upload.id) == [
+        ('What is 50% of 10?', 1, ['Five', 'Ten']), ('Define cell_wall', 4, []), ('What is DNA?', 6, ['A molecule'])
+    ]
+    
+    # Re-parsing replaces the previous rows instead of adding to them
+    Question.replace_for_upload(upload, {'questions': [{'question': 'Only one?', 'answers': ['Yes']}], 'concepts': []})
+    db.session.commit()
+    assert stored_questions(upload.id) == [('Only one?', None, ['Yes'])]
+    assert Answer.query.count() == 1 and Concept.query.count() == 0
+
+def test_migration_backfills_parsed_uploads(app, user):
+    add_upload(user.id)
+    add_upload(user.id, parsed={'questions': [{'question': 'Second upload?', 'answers': ['Yes']}]}, filename='b.pdf')
+    failed = Upload(user_id=user.id, filename='bad.pdf', file_url='/uploads/bad.pdf', file_type='pdf', file_size=1)
+    failed.parsed_json = 'not json'
+    failed.status = 'completed'
+    db.session.add(failed)
+    db.session.commit()
+    
+    spec = importlib.util.spec_from_file_location(
+        'question_tables', os.path.join(MIGRATIONS, '3f1c8a7d2b64_add_question_answer_concept_tables.py')
+    )
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    migration.BACKFILL_BATCH_SIZE = 1
+    with Operations.context(MigrationContext.configure(db.session.connection())):
+        migration.backfill_parsed_uploads()
+    db.session.commit()
+    
+    uploads = Upload.query.order_by(Upload.id).all()
+    assert stored_questions(uploads[0].id)[0] == ('What is 50% of 10?', 1, ['Five', 'Ten'])
+    assert stored_questions(uploads[1].id) == [('Second upload?', None, ['Yes'])]
+    assert Question.query.count() == 4 and Concept.query.count() == 1
+
+def test_question_search_matches_wildcards_literally(client, user, auth_headers):
+    upload = add_upload(user.id)
+    Question.replace_for_upload(upload, PARSED)
+    other = User(email='other@example.com', password='password123')
+    db.session.add(other)
+    db.session.flush()
+    Question.replace_for_upload(add_upload(other.id), PARSED)
+    db.session.commit()
+    
+    def search(**params):
+        response = client.get('/api/uploads/questions', headers=auth_headers, query_string=params)
+        assert response.status_code == 200
+        return response.get_json()
+    
+    everything = search()
+    assert everything['total_questions'] == 3
+    assert everything['questions'][0]['answers'] and all(q['upload_id'] == upload.id for q in everything['questions'])
+    assert [q['question'] for q in search(search='50%')['questions']] == ['What is 50% of 10?']
+    assert [q['question'] for q in search(search='%')['questions']] == ['What is 50% of 10?']
+    assert [q['question'] for q in search(search='cell_wall')['questions']] == ['Define cell_wall']
+    assert search(search='_')['total_questions'] == 1
+    assert search(search='dna')['total_questions'] == 1
+    assert search(upload_id=upload.id + 1)['total_questions'] == 0
+    assert len(search(limit=2)['questions']) == 2
+
+def test_upload_is_parsed_before_its_row_is_written(client, user, auth_headers, monkeypatch, tmp_path):
+    from app.routes import uploads
+    client.application.config['UPLOAD_FOLDER'] = str(tmp_path)
+    
+    def parse(file_path, file_type):
+        # No row has been inserted yet, so no write transaction blocks other writers while parsing
+        assert Upload.query.count() == 0
+        return {'questions': PARSED['questions'], 'concepts': [], 'total_questions': 3, 'total_concepts': 0}
+    
+    monkeypatch.setattr(uploads.parser_pool, 'parse', parse)
+    monkeypatch.setattr(uploads.file_parser, 'validate_file', lambda path: {'valid': True, 'file_size': 4})
+    response = client.post('/api/uploads/exam', headers=auth_headers,
+                           data={'file': (io.BytesIO(b'%PDF'), 'exam.pdf')})
+    assert response.status_code == 201
+    upload = Upload.query.one()
+    assert upload.status == 'completed'
+    assert stored_questions(upload.id)[0] == ('What is 50% of 10?', 1, ['Five', 'Ten'])
+    
+    monkeypatch.setattr(uploads.parser_pool, 'parse', lambda file_path, file_type: {'error': 'Parser crashed'})
+    response = client.post('/api/uploads/exam', headers=auth_headers,
+                           data={'file': (io.BytesIO(b'%PDF'), 'exam.pdf')})
+    assert response.status_code == 201 and response.get_json()['parse_error'] == 'Parser crashed'
+    assert Upload.query.filter_by(status='failed').count() == 1
+
+def test_files_outside_the_upload_folder_are_never_touched(client, user, auth_headers, tmp_path):
+    client.application.config['UPLOAD_FOLDER'] = str(tmp_path / 'uploads')
+    victim = tmp_path / 'victim.txt'
+    victim.write_text('not yours')
+    # Rows written before imports stopped trusting file_url
+    for file_url in (str(victim), str(tmp_path / 'uploads' / '..' / 'victim.txt')):
+        upload = add_upload(user.id)
+        upload.file_url = file_url
+        db.session.commit()
+        
+        assert client.post(f'/api/uploads/uploads/{upload.id}/reparse', headers=auth_headers).status_code == 404
+        assert client.delete(f'/api/uploads/uploads/{upload.id}', headers=auth_headers).status_code == 200
+        assert victim.read_text() == 'not yours'
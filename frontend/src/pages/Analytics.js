@@ -2,6 +2,14 @@ import React, { useState, useEffect } from 'react';
 import { BarChart3, TrendingUp, Calendar, Target } from 'lucide-react';
 import api from '../services/api';
 
+// Completion buckets span day.start to day.end (YYYY-MM-DD, inclusive), read as local dates
+const formatDay = (isoDate) =>
+  new Date(`${isoDate}T00:00:00`).toLocaleDateString('en-US', {
+    weekday: 'short',
+    month: 'short',
+    day: 'numeric'
+  });
+
 function Analytics() {
   const [analyticsData, setAnalyticsData] = useState(null);
   const [loading, setLoading] = useState(true);
@@ -127,16 +135,13 @@ function Analytics() {
           <h3 className="card-title">Daily Task Completion</h3>
         </div>
         <div className="space-y-3">
-          {analyticsData?.daily_completions?.length > 0 ? (
-            analyticsData.daily_completions.slice(-7).map((day, index) => (
+          {analyticsData?.completions?.length > 0 ? (
+            analyticsData.completions.slice(-7).map((day, index) => (
               <div key={index} className="flex items-center justify-between p-3 bg-gray-50 rounded-lg">
                 <div>
                   <p className="font-medium text-gray-900">
-                    {new Date(day.date).toLocaleDateString('en-US', { 
-                      weekday: 'short', 
-                      month: 'short', 
-                      day: 'numeric' 
-                    })}
+                    {formatDay(day.start)}
+                    {day.end !== day.start && ` – ${formatDay(day.end)}`}
                   </p>
                   <p className="text-sm text-gray-600">
                     {day.completed} of {day.total} tasks
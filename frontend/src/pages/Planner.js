@@ -5,7 +5,9 @@ import toast from 'react-hot-toast';
 
 function Planner() {
   const [plans, setPlans] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [showCreateForm, setShowCreateForm] = useState(false);
   const [formData, setFormData] = useState({
     title: '',
@@ -19,8 +21,9 @@ function Planner() {
 
   const fetchPlans = async () => {
     try {
-      const plansData = await plannerService.getPlans();
-      setPlans(plansData);
+      const page = await plannerService.getPlans();
+      setPlans(page.plans);
+      setNextCursor(page.nextCursor);
     } catch (error) {
       toast.error('Failed to fetch study plans');
     } finally {
@@ -28,6 +31,19 @@ function Planner() {
     }
   };
 
+  const loadMorePlans = async () => {
+    setLoadingMore(true);
+    try {
+      const page = await plannerService.getPlans(nextCursor);
+      setPlans(prev => [...prev, ...page.plans]);
+      setNextCursor(page.nextCursor);
+    } catch (error) {
+      toast.error('Failed to fetch study plans');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleCreatePlan = async (e) => {
     e.preventDefault();
     
@@ -175,15 +191,15 @@ function Planner() {
                 <div className="flex justify-between text-sm">
                   <span className="text-gray-600">Progress</span>
                   <span className="font-medium">
-                    {plan.tasks?.filter(task => task.status === 'completed').length || 0} / {plan.tasks?.length || 0}
+                    {plan.completed_tasks || 0} / {plan.total_tasks || 0}
                   </span>
                 </div>
                 <div className="mt-2 bg-gray-200 rounded-full h-2">
                   <div
                     className="bg-blue-600 h-2 rounded-full transition-all"
                     style={{
-                      width: `${plan.tasks?.length > 0 
-                        ? (plan.tasks.filter(task => task.status === 'completed').length / plan.tasks.length) * 100 
+                      width: `${plan.total_tasks > 0 
+                        ? (plan.completed_tasks / plan.total_tasks) * 100 
                         : 0}%`
                     }}
                   ></div>
@@ -194,6 +210,18 @@ function Planner() {
         ))}
       </div>
 
+      {nextCursor && (
+        <div className="text-center">
+          <button
+            onClick={loadMorePlans}
+            className="btn btn-secondary"
+            disabled={loadingMore}
+          >
+            {loadingMore ? 'Loading...' : 'Load more'}
+          </button>
+        </div>
+      )}
+
       {plans.length === 0 && !showCreateForm && (
         <div className="text-center py-12">
           <Calendar className="mx-auto h-12 w-12 text-gray-400" />
@@ -5,7 +5,9 @@ import toast from 'react-hot-toast';
 
 function Uploads() {
   const [uploads, setUploads] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [uploading, setUploading] = useState(false);
 
   useEffect(() => {
@@ -16,6 +18,7 @@ function Uploads() {
     try {
       const response = await api.get('/uploads/uploads');
       setUploads(response.uploads);
+      setNextCursor(response.next_cursor);
     } catch (error) {
       toast.error('Failed to fetch uploads');
     } finally {
@@ -23,6 +26,19 @@ function Uploads() {
     }
   };
 
+  const loadMoreUploads = async () => {
+    setLoadingMore(true);
+    try {
+      const response = await api.get('/uploads/uploads', { params: { cursor: nextCursor } });
+      setUploads(prev => [...prev, ...response.uploads]);
+      setNextCursor(response.next_cursor);
+    } catch (error) {
+      toast.error('Failed to fetch uploads');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleFileUpload = async (e) => {
     const file = e.target.files[0];
     if (!file) return;
@@ -167,10 +183,10 @@ function Uploads() {
                     </span>
                   </div>
                   
-                  {upload.parsed_data && (
+                  {upload.status === 'completed' && (
                     <div className="mt-2 text-xs text-gray-600">
-                      <p>Questions: {upload.parsed_data.total_questions || 0}</p>
-                      <p>Concepts: {upload.parsed_data.total_concepts || 0}</p>
+                      <p>Questions: {upload.total_questions || 0}</p>
+                      <p>Concepts: {upload.total_concepts || 0}</p>
                     </div>
                   )}
                 </div>
@@ -178,6 +194,18 @@ function Uploads() {
             ))}
           </div>
         )}
+
+        {nextCursor && (
+          <div className="text-center">
+            <button
+              onClick={loadMoreUploads}
+              className="btn btn-secondary"
+              disabled={loadingMore}
+            >
+              {loadingMore ? 'Loading...' : 'Load more'}
+            </button>
+          </div>
+        )}
       </div>
     </div>
   );
@@ -6,19 +6,33 @@ export const aiService = {
     return response;
   },
 
-  async generateQuiz(topic, numQuestions = 5) {
-    const response = await api.post('/ai/quiz', { topic, num_questions: numQuestions });
+  async generateQuiz(topic, numQuestions = 5, source = 'ai') {
+    const response = await api.post('/ai/quiz', { topic, num_questions: numQuestions, source });
     return response;
   },
 
+  async recordQuizResults(results) {
+    return await api.post('/ai/quiz/results', { results });
+  },
+
   async chat(message, sessionId = null) {
     const response = await api.post('/ai/chat', { message, session_id: sessionId });
     return response;
   },
 
-  async getChatHistory(sessionId) {
-    const response = await api.get(`/ai/chat/history/${sessionId}`);
-    return response.messages;
+  // Latest page of a session's messages, in chronological order. Pass
+  // { before: previousCursor } to page back through older messages, or
+  // { since: latestCursor } to fetch only messages added after the last call.
+  async getChatHistory(sessionId, { before = null, since = null } = {}) {
+    const params = {};
+    if (before) params.before = before;
+    if (since) params.since = since;
+    const response = await api.get(`/ai/chat/history/${sessionId}`, { params });
+    return {
+      messages: response.messages,
+      previousCursor: response.previous_cursor,
+      latestCursor: response.latest_cursor
+    };
   },
 
   async getChatSessions() {
@@ -5,9 +5,10 @@ export const plannerService = {
     return await api.post('/planner/create', { topics, target_date: targetDate, title });
   },
 
-  async getPlans() {
-    const response = await api.get('/planner/plans');
-    return response.plans;
+  // One page of plans, newest first; pass the returned nextCursor to get the next page
+  async getPlans(cursor = null) {
+    const response = await api.get('/planner/plans', { params: cursor ? { cursor } : {} });
+    return { plans: response.plans, nextCursor: response.next_cursor };
   },
 
   async getPlan(planId) {